@@ -6,7 +6,6 @@ from scipy.ndimage import uniform_filter1d
 import pytools.timetools as tt
 import pytools.readtools.readtools as rt
 import pytools.caltools as ct
-from calendar import isleap
 
 class RMM_Tool:
 
@@ -82,9 +81,8 @@ class RMM_Tool:
       return var, time
 
     def get_anom( total, clim, time):
-      iday = [ t - tt.ymd2float( tt.year(t), 1, 1) for t in time]
-      iday = [ i+1 if not isleap(yr) and i > 60 else i for i, yr in zip(iday, [tt.year(t) for t in time]) ]
-      iday = [ int(i) for i in iday]
+      # clim has the 366 days of a leap year
+      iday = tt.dayOfYear229Array(time) - 1
 
       anom = total - clim[iday, :]
       return anom
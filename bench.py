@@ -0,0 +1,599 @@
+#!/usr/bin/env python
+'''
+benchmarks of the reading/calculating hot paths.
+Synthetic files are written to a temporary directory (or workDir).
+Only the timings are reported, the results are checked by the test_*.py files
+(against the former implementations kept here as references).
+'''
+import contextlib
+import io
+import os
+import time
+import tempfile
+import numpy as np
+
+
+def main():
+    bench_ncreadByDimRange()
+    bench_ncindex()
+    bench_multiNcReadWorkers()
+    bench_interp_1d()
+    bench_interpCache()
+    bench_timetoolsArray()
+    bench_ncreadtime()
+    bench_value2Slice()
+    bench_iterRead()
+    bench_readTotalWorkers()
+    bench_ensembleCube()
+    bench_normalizeUnits()
+    bench_climcache()
+    bench_dayOfClimIndex()
+    bench_dmsReadNd()
+    bench_grib2UniqueRecords()
+
+
+class _OpenCounter:
+    # count how many times netCDF4.Dataset is opened within the "with" block
+    def __enter__(self):
+        import netCDF4 as nc
+        counter = self
+
+        Dataset = nc.Dataset
+
+        def countedDataset(*args, **kwArgs):
+            counter.numOpens += 1
+            return Dataset(*args, **kwArgs)
+
+        self.numOpens = 0
+        self._module = nc
+        self._Dataset = Dataset
+        nc.Dataset = countedDataset
+        return self
+
+    def __exit__(self, *args):
+        self._module.Dataset = self._Dataset
+
+
+def _timeit(func, *args, **kwArgs):
+    timeStart = time.perf_counter()
+    out = func(*args, **kwArgs)
+    return time.perf_counter() - timeStart, out
+
+
+def _createDailyFiles(workDir, numFiles, shape=(1, 37, 72), varName='u'):
+    # one file per day: var(time, lat, lon), with a decreasing lat
+    from pytools import nctools as nct
+    lat = np.linspace(90, -90, shape[-2])
+    lon = np.linspace(0, 360, shape[-1], endpoint=False)
+    paths = []
+    for iFile in range(numFiles):
+        path = f'{workDir}/{varName}_{iFile:05d}.nc'
+        timeValues = np.arange(shape[0]) + iFile * shape[0]
+        data = np.random.rand(*shape).astype(np.float32)
+        if not os.path.exists(path):
+            nct.save(path, {varName: data, 'time': timeValues, 'lat': lat, 'lon': lon},
+                     overwrite=True)
+        paths.append(path)
+    return paths
+
+
+def bench_ncreadByDimRange(numFiles=1000, workDir=None):
+    from pytools import nctools as nct
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        workDir = workDir or tempDir
+        paths = _createDailyFiles(workDir, numFiles)
+        minMaxs = [[None, None], [-30, 30], [90, 180]]
+
+        print(f'[ncreadByDimRange] {numFiles} files')
+        for singleOpen in [False, True]:
+            with _OpenCounter() as counter:
+                elapsed, __ = _timeit(lambda: [
+                    nct.ncreadByDimRange(path, 'u', minMaxs, singleOpen=singleOpen)[0]
+                    for path in paths
+                ])
+            print(f'  {singleOpen=!s:5}: {counter.numOpens:6d} opens, '
+                  f'{elapsed:7.3f} s, {elapsed/numFiles*1e3:6.3f} ms/file')
+
+
+def bench_ncindex(numFiles=730, workDir=None):
+    # multi-file read without the index, with a cold and a warm index
+    from pytools import ncindex
+    from pytools.readtools import multiNcRead as mread
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        workDir = workDir or tempDir
+        paths = _createDailyFiles(workDir, numFiles)
+        minMaxs = [[None, None], [-30, 30], [90, 180]]
+
+        print(f'[ncindex] multiNcRead.read of {numFiles} files')
+        for label, dbPath in [
+            ('no index', None),
+            ('cold index', f'{tempDir}/ncindex.sqlite'),
+            ('warm index', f'{tempDir}/ncindex.sqlite'),
+        ]:
+            if dbPath is None:
+                ncindex.disable()
+            else:
+                ncindex.enable(dbPath)  # a new process-level index each time
+            with _OpenCounter() as counter:
+                elapsed, __ = _timeit(
+                    mread.read, paths, 'u', minMaxs, stackedAlong=0
+                )
+            print(f'  {label:10}: {counter.numOpens:6d} opens, {elapsed:7.3f} s')
+        ncindex.disable()
+
+
+def bench_multiNcReadWorkers(
+    numFiles=256, shape=(4, 361, 720), workersList=[1, 2, 4, 8, 16],
+    workerType='process', workDir=None
+):
+    from pytools.readtools import multiNcRead as mread
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        workDir = workDir or tempDir
+        paths = _createDailyFiles(workDir, numFiles, shape)
+        minMaxs = [[None, None], [None, None], [None, None]]
+
+        print(f'[multiNcRead.read] {numFiles} files of {shape}, {workerType=}')
+        elapsed1 = None
+        for workers in workersList:
+            elapsed, __ = _timeit(
+                mread.read, paths, 'u', minMaxs, stackedAlong=0,
+                workers=workers, workerType=workerType,
+            )
+            elapsed1 = elapsed1 or elapsed
+            print(f'  {workers=:3d}: {elapsed:7.3f} s, '
+                  f'speedup = {elapsed1/elapsed:5.2f}')
+
+
+def _interp_1d_loop(x, y, x_new, axis=0, extrapolate=False):
+    # reference: caltools.interp_1d before vectorization (checks omitted)
+    x = np.array(x, dtype=np.double)
+    y = np.array(y, dtype=np.double)
+    x_new = np.array(x_new, dtype=np.double)
+    if axis != 0:
+        y = np.swapaxes(y, 0, axis)
+    nx, nx_new = len(x), len(x_new)
+    ixl = np.zeros((nx_new,), dtype=np.int32)
+    for ix_new in range(nx_new):
+        dx = np.array(x_new[ix_new] - x)
+        if extrapolate:
+            if x_new[ix_new] < x[0]:
+                ixl[ix_new] = 0
+                continue
+            if x_new[ix_new] > x[-1]:
+                ixl[ix_new] = nx - 2
+                continue
+        ix = np.where(dx == 0)[0]
+        if len(ix):
+            ixl[ix_new] = max(ix[0] - 1, 0)
+            continue
+        ixl[ix_new] = np.where(dx < 0)[0][0] - 1
+    ixr = ixl + 1
+    y_new = x_new - x[ixl]
+    y_new /= x[ixr] - x[ixl]
+    y_new = np.tile(y_new, [1 for i in range(y.ndim)])
+    if y_new.ndim != 1:
+        y_new = np.swapaxes(y_new, 0, y_new.ndim-1)
+    y_new = y_new * (y[ixr, :] - y[ixl, :])
+    y_new += y[ixl]
+    if axis != 0:
+        y_new = np.swapaxes(y_new, 0, axis)
+    return y_new
+
+
+def bench_interp_1d(shape=(4, 10, 721, 1440)):
+    # regrid a 0.25-deg cube (..., lat, lon) to 1 deg along lat then lon
+    from pytools import caltools as ct
+
+    lat, lon = np.linspace(-90, 90, shape[-2]), np.linspace(0, 359.75, shape[-1])
+    latNew, lonNew = np.arange(-90, 91, 1.), np.arange(0, 360, 1.)
+    data = np.random.rand(*shape).astype(np.float32)
+
+    def regrid(interp, data, **kwArgs):
+        data = interp(lat, data, latNew, axis=-2, **kwArgs)
+        return interp(lon, data, lonNew, axis=-1, **kwArgs)
+
+    print(f'[interp_1d] {shape} -> {shape[:-2] + (len(latNew), len(lonNew))}')
+    elapsedRef, __ = _timeit(regrid, _interp_1d_loop, data)
+    print(f'  loop reference : {elapsedRef:7.3f} s')
+    for dtype in [np.float64, None]:
+        elapsed, out = _timeit(regrid, ct.interp_1d, data, dtype=dtype)
+        print(f'  vectorized, {str(out.dtype):7}: {elapsed:7.3f} s, '
+              f'speedup = {elapsedRef/elapsed:5.2f}')
+
+
+
+def bench_interpCache(numInits=30*52, shape=(1, 181, 360)):
+    # regrid a clim to the total grid for every init, as in the verification
+    from pytools import caltools as ct
+
+    lon, lat = np.arange(0, 360, 1.), np.linspace(-90, 90, shape[-2])
+    lonNew, latNew = np.arange(0, 360, 1.5), np.arange(-90, 90.1, 1.5)
+    data = np.random.rand(*shape)
+
+    def uncached():
+        return [
+            ct.Interpolator(lat, latNew, True)(
+                ct.Interpolator(lon, lonNew, True)(data, -1), -2
+            ) for __ in range(numInits)
+        ]
+
+    def cached():
+        return [
+            ct.interp_2d(lon, lat, data, lonNew, latNew, True)
+            for __ in range(numInits)
+        ]
+
+    print(f'[interpolator cache] {numInits} regrids of {shape}')
+    ct.clearInterpCache()
+    elapsedUncached, __ = _timeit(uncached)
+    elapsedCached, __ = _timeit(cached)
+    print(f'  uncached: {elapsedUncached:7.3f} s')
+    print(f'  cached  : {elapsedCached:7.3f} s, '
+          f'speedup = {elapsedUncached/elapsedCached:5.2f}')
+
+
+
+def bench_timetoolsArray(years=[1980, 2020], hours=6):
+    # decode a multi-year sub-daily axis with the scalar and array functions
+    from pytools import timetools as tt
+
+    times = np.arange(
+        tt.ymd2float(years[0], 1, 1), tt.ymd2float(years[1], 1, 1), hours / 24
+    )
+    print(f'[timetools] {len(times)} times of {years}, every {hours} hours')
+    for name in ['year', 'month', 'day', 'dayOfYear229', 'dayOfClim', 'float2format']:
+        scalarFunc, arrayFunc = getattr(tt, name), getattr(tt, f'{name}Array')
+        elapsedScalar, __ = _timeit(lambda: [scalarFunc(t) for t in times])
+        elapsedArray, __ = _timeit(arrayFunc, times)
+        print(f'  {name:13}: {elapsedScalar:7.3f} s -> {elapsedArray*1e3:7.2f} ms')
+
+
+
+def bench_ncreadtime(numTimes=350_000):
+    # an hourly ERA5-like axis, decoded per element (as before) and as an array
+    import netCDF4 as nc
+    from pytools import nctools as nct
+    from pytools import timetools as tt
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        path = f'{tempDir}/time.nc'
+        with nc.Dataset(path, 'w') as h:
+            h.createDimension('time', numTimes)
+            h.createVariable('time', np.int32, ('time',))
+            h['time'].units = 'hours since 1900-01-01 00:00:00.0'
+            h['time'][:] = np.arange(numTimes) + 692_496
+
+        with nc.Dataset(path, 'r') as h:
+            timeValue = np.array(h['time'][:])
+            timeOrigin = tt.string2float('1900-01-01 00:00:00.0')
+            elapsedRef, __ = _timeit(
+                lambda: np.array([timeOrigin + v*(1/24) for v in timeValue])
+            )
+            elapsed, __ = _timeit(nct.ncreadtime, path, hFile=h)
+
+    print(f'[ncreadtime] {numTimes} hourly steps')
+    print(f'  per element: {elapsedRef:7.3f} s')
+    print(f'  array      : {elapsed*1e3:7.2f} ms')
+
+
+
+def _value2SliceLoop(valueList, valueStart, valueEnd):
+    # reference: caltools.value2Slice before the binary search (checks omitted)
+    valueList = list(valueList)
+    for valueSmall, valueBig in zip(valueList, valueList[1:]):
+        if valueSmall >= valueBig:
+            raise ValueError('values in "valueList" must be strictly increasing.')
+    for sliceStart, value in enumerate(valueList):
+        if value >= valueStart:
+            break
+    for reversedSliceEnd, value in enumerate(valueList[::-1]):
+        if value <= valueEnd:
+            break
+    return slice(sliceStart, len(valueList)-reversedSliceEnd)
+
+
+def _w2gMaskReference(LON, lon_s, lon_e):
+    # reference: caltools.w2g before the binary search
+    if lon_s <= lon_e:
+        indices = np.where(np.logical_and(lon_s <= LON, LON <= lon_e))[0]
+    else:
+        indices = np.where(np.logical_or(lon_s <= LON, LON <= lon_e))[0]
+    if len(indices) == 0:
+        return None, None
+    return indices[0], indices[-1] + 1
+
+
+def bench_value2Slice(numPoints=1440, numCalls=20_000):
+    # lookups on a 0.25-deg lon axis, including the wrap-around of w2g
+    from pytools import caltools as ct
+
+    lon = np.linspace(0, 360, numPoints, endpoint=False)
+    ranges = np.random.uniform(-10, 370, (numCalls, 2))
+    increasing = [sorted(r) for r in np.random.uniform(0, 359, (numCalls, 2))]
+
+    print(f'[value2Slice/w2g] {numCalls} lookups on {numPoints} points')
+    elapsedRef, __ = _timeit(
+        lambda: [_value2SliceLoop(lon, *r) for r in increasing]
+    )
+    elapsed, __ = _timeit(lambda: [ct.value2Slice(lon, *r) for r in increasing])
+    print(f'  value2Slice: {elapsedRef:7.3f} s -> {elapsed:7.3f} s')
+
+    for label, LON in [('increasing', lon), ('decreasing', lon[::-1])]:
+        elapsedRef, __ = _timeit(
+            lambda: [_w2gMaskReference(LON, *r) for r in ranges]
+        )
+        with contextlib.redirect_stdout(io.StringIO()):  # no-value warnings
+            elapsed, __ = _timeit(lambda: [ct.w2g(LON, *r)[:2] for r in ranges])
+        print(f'  w2g {label}: {elapsedRef:7.3f} s -> {elapsed:7.3f} s')
+
+
+
+def bench_iterRead(numFiles=64, shape=(4, 361, 720), chunk=8):
+    # peak memory of a time mean: read everything vs. blocks of files
+    import tracemalloc
+    from pytools.readtools import multiNcRead as mread
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        paths = _createDailyFiles(tempDir, numFiles, shape)
+        minMaxs = [[None, None], [None, None], [None, None]]
+
+        def meanByRead():
+            data, __ = mread.read(paths, 'u', minMaxs, stackedAlong=0)
+            return data.mean(axis=0)
+
+        def meanByIterRead(readAhead):
+            total = 0
+            for data, __ in mread.iterRead(
+                paths, 'u', minMaxs, stackedAlong=0, chunk=chunk, readAhead=readAhead
+            ):
+                total = total + data.sum(axis=0)
+            return total / (numFiles * shape[0])
+
+        print(f'[iterRead] time mean of {numFiles} files of {shape}, {chunk=}')
+        for label, func in [
+            ('read', meanByRead),
+            ('iterRead', lambda: meanByIterRead(False)),
+            ('iterRead, readAhead', lambda: meanByIterRead(True)),
+        ]:
+            tracemalloc.start()
+            elapsed, __ = _timeit(func)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'  {label:20}: {elapsed:7.3f} s, peak = {peak/1e6:8.1f} MB')
+
+
+
+def _createModelFiles(rootDir, initTimes, members, shape=(45, 181, 360), varName='u10'):
+    # processed model files: {rootDir}/{model}/%Y/%m/%dz%H/E{member}/global_{var}.nc
+    from pytools import nctools as nct
+    from pytools import timetools as tt
+    lat = np.linspace(-90, 90, shape[-2])
+    lon = np.linspace(0, 360, shape[-1], endpoint=False)
+    for initTime in initTimes:
+        for member in members:
+            path = tt.float2format(
+                initTime, f'{rootDir}/bench/%Y/%m/%dz%H/E{member:03d}/global_{varName}.nc'
+            )
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            nct.save(path, {
+                varName: np.random.rand(*shape).astype(np.float32),
+                'time': initTime + np.arange(shape[0]), 'lat': lat, 'lon': lon,
+            }, overwrite=True)
+
+
+def bench_readTotalWorkers(numInits=26, numMembers=4, workersList=[1, 2, 4, 8]):
+    from pytools import timetools as tt
+    from pytools.modelreader import readTotal as rtm
+
+    initTimes = [tt.ymd2float(2020, 1, 1) + 7 * i for i in range(numInits)]
+    members = list(range(numMembers))
+    minMaxs = [[0, 44], [-30, 30], [None, None]]
+    with tempfile.TemporaryDirectory() as rootDir:
+        _createModelFiles(rootDir, initTimes, members)
+
+        print(f'[modelreader.readTotal] {numInits} inits x {numMembers} members')
+        elapsed1 = None
+        for workers in workersList:
+            elapsed, __ = _timeit(
+                rtm.readTotal, 'bench', 'global', 'u10', minMaxs, initTimes,
+                members, rootDir=rootDir, workers=workers,
+            )
+            elapsed1 = elapsed1 or elapsed
+            print(f'  {workers=:3d}: {elapsed:7.3f} s, '
+                  f'speedup = {elapsed1/elapsed:5.2f}')
+
+
+def bench_ensembleCube(numInits=8, numMembers=10):
+    # peak memory of the ensemble spread: readTotal + nanstd vs. streaming
+    import tracemalloc
+    from pytools import timetools as tt
+    from pytools.modelreader import readTotal as rtm
+    from pytools.modelreader.ensembleCube import EnsembleCube
+    from pytools.modelreader import readStats as rs
+
+    initTimes = [tt.ymd2float(2020, 1, 1) + 7 * i for i in range(numInits)]
+    members = list(range(numMembers))
+    minMaxs = [[0, 44], [None, None], [None, None]]
+    with tempfile.TemporaryDirectory() as rootDir:
+        _createModelFiles(rootDir, initTimes, members)
+
+        def stdByReadTotal():
+            data, __ = rtm.readTotal(
+                'bench', 'global', 'u10', minMaxs, initTimes, members, rootDir=rootDir
+            )
+            return np.nanstd(data, axis=(0, 1))
+
+        def stdByCube():
+            cube = EnsembleCube(
+                'bench', 'global', 'u10', minMaxs, initTimes, members, rootDir=rootDir
+            )
+            return cube.std(['init', 'member']).compute()[0]
+
+        def stdByReadStats(workers):
+            stats, __ = rs.readStats(
+                'bench', 'global', 'u10', minMaxs, initTimes, members,
+                statDims=['init', 'member'], rootDir=rootDir, workers=workers,
+            )
+            return stats['std']
+
+        print(f'[EnsembleCube] std of {numInits} inits x {numMembers} members')
+        for label, func in [
+            ('readTotal', stdByReadTotal),
+            ('EnsembleCube', stdByCube),
+            ('readStats', lambda: stdByReadStats(1)),
+            ('readStats, workers=2', lambda: stdByReadStats(2)),
+        ]:
+            tracemalloc.start()
+            elapsed, __ = _timeit(func)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'  {label:20}: {elapsed:7.3f} s, peak = {peak/1e6:8.1f} MB')
+
+
+def _normalizeMslpLoop(data):
+    # the former per-field loop of readTotal, data[init, member, lead, y, x]
+    fieldMean = np.nanmean(data, axis=(-1, -2))
+    for i in range(data.shape[0]):
+        for j in range(data.shape[1]):
+            for k in range(data.shape[2]):
+                if fieldMean[i, j, k] > 1000 * 50:
+                    data[i, j, k, :, :] /= 100
+                elif fieldMean[i, j, k] < 1000 / 50:
+                    data[i, j, k, :, :] *= 100
+
+
+def bench_normalizeUnits(shape=(8, 10, 45, 91, 180)):
+    from pytools.modelreader._shared import normalizeUnits
+
+    data = (1000 + 10 * np.random.rand(*shape)).astype(np.float32)
+    data[:, :, ::3] *= 100  # Pa
+    data[:, :, 1::3] /= 100  # GEPSv3
+
+    print(f'[normalizeUnits] mslp of {shape}')
+    elapsedLoop, __ = _timeit(_normalizeMslpLoop, data.copy())
+    elapsed, __ = _timeit(normalizeUnits, 'mslp', data.copy())
+    print(f'  loop      : {elapsedLoop:7.3f} s')
+    print(f'  vectorized: {elapsed:7.3f} s, speedup = {elapsedLoop/elapsed:5.1f}')
+
+
+def bench_climcache(numCalls=50, shape=(366, 181, 360)):
+    # repeated obsReader.clim calls on windows of 30 days
+    import netCDF4 as nc
+    from pytools import climcache
+    from pytools import nctools as nct
+    from pytools import timetools as tt
+    from pytools.readtools import obsReader
+
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(f'{root}/NOAA_OLR')
+        path = f'{root}/NOAA_OLR/olr_clim_2001_2020_1p0_5dma.nc'
+        nct.save(path, {
+            'olr': np.random.rand(*shape).astype(np.float32),
+            'time': tt.ymd2float(2000, 1, 1) + np.arange(shape[0]),
+            'lat': np.linspace(-90, 90, shape[1]),
+            'lon': np.linspace(0, 360, shape[2], endpoint=False),
+        }, overwrite=True)
+        with nc.Dataset(path, 'a') as h:
+            h['time'].units = 'days since 2000-01-01 00:00:00'
+
+        def calls():
+            for i in range(numCalls):
+                t = tt.ymd2float(2021, 1, 1) + 7 * i
+                obsReader.clim('olr', [[t, t + 29], [-30, 30], [None, None]], root=root)
+
+        print(f'[climcache] {numCalls} calls of obsReader.clim, {shape=}')
+        with contextlib.redirect_stdout(io.StringIO()):
+            climcache.setMaxBytes(0)
+            elapsedNoCache, __ = _timeit(calls)
+            climcache.setMaxBytes(climcache.DEFAULT_MAX_MB * 1e6)
+            climcache.clear()
+            elapsed, __ = _timeit(calls)
+        print(f'  no cache: {elapsedNoCache:7.3f} s (the annual cycle read per call)')
+        print(f'  cache   : {elapsed:7.3f} s, speedup = {elapsedNoCache/elapsed:5.1f}, '
+              f'{climcache.info()}')
+        climcache.clear()
+
+
+def bench_dayOfClimIndex(numInits=52, numLeads=45):
+    # days of climatology of [init, lead]: list.index per element vs. lookup table
+    from pytools import timetools as tt
+
+    timeClim = tt.ymd2float(2000, 1, 1) + np.arange(366)
+    initTimes = tt.ymd2float(2021, 1, 1) + 7 * np.arange(numInits)
+    valids = np.floor(np.add.outer(initTimes, np.arange(numLeads)))
+
+    def indexLoop():
+        jdClim = [tt.dayOfClim(t) for t in timeClim]
+        return np.array([
+            [jdClim.index(tt.dayOfClim(float(valid))) for valid in row]
+            for row in valids
+        ])
+
+    print(f'[dayOfClimIndexArray] {numInits} inits x {numLeads} leads')
+    elapsedLoop, __ = _timeit(indexLoop)
+    elapsed, __ = _timeit(tt.dayOfClimIndexArray, valids, timeClim)
+    print(f'  loop      : {elapsedLoop:7.3f} s')
+    print(f'  vectorized: {elapsed:7.3f} s, speedup = {elapsedLoop/elapsed:7.1f}')
+
+
+def bench_dmsReadNd(shape=(20, 37, 361, 720)):
+    # multi-level DMS fields: list of fromfile + np.array vs. readinto vs. memmap
+    from pytools import dmstools as dt
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        paths = []
+        for i in range(int(np.prod(shape[:-2]))):
+            paths.append(f'{tempDir}/field{i:04d}')
+            np.random.rand(*shape[-2:]).tofile(paths[-1])
+
+        def readNdList():
+            data = np.array([dt.read2d(path, shape[:-3:-1]) for path in paths])
+            return np.reshape(data, shape)
+
+        print(f'[dmstools.readNd] {len(paths)} fields of {shape[-2:]}')
+        elapsedList, __ = _timeit(readNdList)
+        print(f'  list + np.array  : {elapsedList:7.3f} s')
+        for workers in [1, 4]:
+            elapsed, __ = _timeit(dt.readNd, paths, shape, workers=workers)
+            print(f'  readinto, {workers=}: {elapsed:7.3f} s, '
+                  f'speedup = {elapsedList/elapsed:5.2f}')
+        elapsed, __ = _timeit(lambda: dt.memmapNd(paths, shape)[:, 10, 100:200, 300:400])
+        print(f'  memmap, a box    : {elapsed:7.3f} s')
+
+
+def _uniqueRecordsQuadratic(records):
+    splittedRecords = [r.split(':')[2:] for r in records]
+    iUniqueRecords = [
+        i for i, c, in enumerate(splittedRecords)
+        if c not in splittedRecords[i+1:]
+    ]
+    return [records[i].split(':')[0] for i in iUniqueRecords]
+
+
+def bench_grib2UniqueRecords(numLevels=40, numVars=60):
+    # duplicated-record check of a matched grib2 inventory: O(n^2) vs. set
+    from pytools.modeldata import grib2index as gi
+
+    lines = [
+        f'{iVar*numLevels + iLevel + 1}:{(iVar*numLevels + iLevel)*1000}:'
+        f'd=2024010100:VAR{iVar}:{iLevel} mb:6 hour fcst:'
+        for iVar in range(numVars) for iLevel in range(numLevels)
+    ]
+    lines.append(f'{len(lines)+1}:{len(lines)*1000}:d=2024010100:VAR0:0 mb:6 hour fcst:')
+    text = '\n'.join(lines)
+
+    print(f'[grib2index.uniqueRecords] {len(lines)} records')
+    elapsedList, __ = _timeit(_uniqueRecordsQuadratic, lines)
+    print(f'  quadratic : {elapsedList:7.3f} s')
+    inventory = gi.Grib2Inventory('', gi._parseInventory(text, len(lines)*1000))
+    elapsed, __ = _timeit(lambda: [r.recNum for r in gi.uniqueRecords(inventory.records)])
+    print(f'  set       : {elapsed:7.3f} s, speedup = {elapsedList/elapsed:7.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
 import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
 
 
 def conform_axis(data1, data2, dims1, dims2, axis):
@@ -267,40 +270,86 @@ def w2g(LON, lon_s, lon_e):
     if lon_e is None:
         lon_e = np.inf
 
-    if lon_s <= lon_e:
-        indices = np.where(np.logical_and(lon_s <= LON, LON <= lon_e))
+    LON = np.asarray(LON)
+    if isStrictlyMonotonic(LON):
+        xs, xe = _w2gMonotonic(LON, lon_s, lon_e)
     else:
-        indices = np.where(np.logical_or(lon_s <= LON, LON <= lon_e))
-
-    indices = indices[0]
+        xs, xe = _w2gMask(LON, lon_s, lon_e)
 
-    if len(indices) == 0:
+    if xs is None:
         print(
             f'[w2g] warning, no values are found, [xs, xe] = {lon_s, lon_e}, minMax(LON)=({np.min(LON)}, {np.max(LON)})')
-        xs, xe = None, None
-    elif len(indices) == 1:
-        [xs, xe] = indices[[0, 0]]
-    else:
-        [xs, xe] = indices[[0, -1]]
-
-    if xe is not None:
-        xe = xe + 1  # for python indexing
 
     lon = LON[xs:xe]
     nx = len(lon)
     return xs, xe, nx, lon
 
 
-def value2Slice(valueList, valueStart, valueEnd):
+def _w2gMask(LON, lon_s, lon_e):
+    # -> the first and the last+1 indices within [lon_s, lon_e] by masking
+    if lon_s <= lon_e:
+        indices = np.where(np.logical_and(lon_s <= LON, LON <= lon_e))
+    else:
+        indices = np.where(np.logical_or(lon_s <= LON, LON <= lon_e))
+
+    indices = indices[0]
+    if len(indices) == 0:
+        return None, None
+    return int(indices[0]), int(indices[-1]) + 1
+
+
+def _w2gMonotonic(LON, lon_s, lon_e):
+    # same as _w2gMask, but by binary search on a strictly monotonic LON
+    if len(LON) > 1 and LON[0] > LON[-1]:  # decreasing: search the reversed
+        xs, xe = _w2gMonotonic(LON[::-1], lon_s, lon_e)
+        if xs is None:
+            return None, None
+        return len(LON) - xe, len(LON) - xs
+
+    nx = len(LON)
+    if lon_s <= lon_e:
+        xs = int(LON.searchsorted(lon_s, side='left'))
+        xe = int(LON.searchsorted(lon_e, side='right'))
+        if xs >= xe:
+            return None, None
+        return xs, xe
+
+    # wrapping around, e.g., [330, 30]: LON <= lon_e or lon_s <= LON
+    numLower = int(LON.searchsorted(lon_e, side='right'))
+    iUpper = int(LON.searchsorted(lon_s, side='left'))
+    if numLower == 0 and iUpper == nx:
+        return None, None
+    xs = 0 if numLower > 0 else iUpper
+    xe = nx if iUpper < nx else numLower
+    return xs, xe
+
+
+def isStrictlyMonotonic(values):
+    # strictly increasing or strictly decreasing
+    values = np.asarray(values)
+    if values.ndim != 1:
+        return False
+    if values.size < 2:
+        return True
+    if values[0] > values[-1]:
+        return bool((values[1:] < values[:-1]).all())
+    return bool((values[1:] > values[:-1]).all())
+
+
+def value2Slice(valueList, valueStart, valueEnd, checkIncreasing=True):
     #
     # ---- checking inputs ---- #
     if not isinstance(valueList, (list, np.ndarray)):
         raise TypeError('"valueList" must be a list.')
 
-    valueList = list(valueList)
+    valueList = np.asarray(valueList)
 
-    for valueSmall, valueBig in zip(valueList, valueList[1:]):
-        if valueSmall >= valueBig:
+    # checkIncreasing=False if the values are known to be strictly increasing
+    if checkIncreasing:
+        notIncreasing = valueList[:-1] >= valueList[1:]
+        if np.any(notIncreasing):
+            i = int(np.argmax(notIncreasing))
+            valueSmall, valueBig = valueList[i], valueList[i+1]
             raise ValueError(
                 'values in "valueList" must be strictly increasing. '
                 f'({valueSmall=}, {valueBig=})'
@@ -330,105 +379,152 @@ def value2Slice(valueList, valueStart, valueEnd):
             f'The inquired "valueEnd" is smaller than the entire list: '
             f'{valueEnd=} < {valueList[0]=}'
         )
-    # TODO: is the element numeric?
-    # for e in valueList:
-    #     if not isinstance(e, (int, float)):
-    #         raise TypeError('values in "valueList" must be integers or float.')
 
     #
     # ---- get sliceStart and sliceEnd ----
-    for sliceStart, value in enumerate(valueList):
-        if value >= valueStart:
-            break
-    for reversedSliceEnd, value in enumerate(valueList[::-1]):
-        if value <= valueEnd:
-            break
+    sliceStart = int(np.searchsorted(valueList, valueStart, side='left'))
+    sliceEnd = int(np.searchsorted(valueList, valueEnd, side='right'))
 
-    return slice(sliceStart, len(valueList)-reversedSliceEnd)
+    return slice(sliceStart, sliceEnd)
 
 
-def interp_1d(x, y, x_new, axis=0, extrapolate=False):
+def interp_1d(x, y, x_new, axis=0, extrapolate=False, dtype=None):
     '''
     This function interpolates the nd-array y(x) to y(x_new)
-    along the left-most axis.
-    x is an 1-d array, with the same length as the first dimension 
-    of y.
+    along the axis.
+    x is an 1-d array, with the same length as y along the axis.
+    dtype of the output is float64 for non-float y, otherwise the 
+    dtype of y is kept unless assigned.
+    The weights are cached, see getInterpolator.
+    '''
+    return getInterpolator(x, x_new, extrapolate)(y, axis, dtype)
+
+
+def interp_2d(lon, lat, data, lon_new, lat_new, extrapolate=False, dtype=None):
     '''
-    def strictly_increasing(L): return all(e1 < e2 for e1, e2 in zip(L, L[1:]))
+    interpolates data(..., lat, lon) to data(..., lat_new, lon_new),
+    along lon (axis=-1) and then lat (axis=-2), with the cached weights.
+    '''
+    data = interp_1d(lon, data, lon_new, -1, extrapolate, dtype)
+    return interp_1d(lat, data, lat_new, -2, extrapolate, dtype)
+
 
+class Interpolator:
+    '''
+    linear interpolation from the grid x to x_new with the bracket indices
+    and the weights computed once, to be applied to many arrays:
+        interpolator = Interpolator(x, x_new)
+        y_new = interpolator(y, axis)
+    '''
+    def __init__(s, x, x_new, extrapolate=False):
+        def strictly_increasing(L): return L.size < 2 or bool(np.all(L[1:] > L[:-1]))
+
+        s.x = np.array(x, dtype=np.double)
+        s.x_new = np.array(x_new, dtype=np.double)
+        s.extrapolate = extrapolate
+        s.identical = np.array_equal(s.x, s.x_new)
+        if s.identical:  # no need to interpolate
+            return
+
+        x, x_new = s.x, s.x_new
+        if x.ndim > 1:
+            raise Exception(f'x.ndim must be 1 but input is {x.ndim}')
+        if x_new.ndim > 1:
+            raise Exception(f'x_new.ndim must be 1 but input is {x_new.ndim}')
+        if not strictly_increasing(x):
+            raise Exception('x must be strictly increasing.')
+        if not strictly_increasing(x_new):
+            raise Exception('x_new must be strictly increasing.')
+        if not extrapolate and np.min(x_new) < np.min(x):
+            raise Exception(
+                f'min(x_new) must >= min(x) but they are {np.min(x_new)}, {np.min(x)}')
+        if not extrapolate and np.max(x_new) > np.max(x):
+            raise Exception(
+                f'max(x_new) must <= max(x) but they are {np.max(x_new)}, {np.max(x)}')
+
+        # find the left index of x to interpolate, x[ixl] < x_new <= x[ixl+1]
+        # (the first and the last intervals are used for extrapolation)
+        s.ixl = np.searchsorted(x, x_new, side='left') - 1
+        s.ixl = np.clip(s.ixl, 0, len(x) - 2)
+        s.ixr = s.ixl + 1
+        s.weight = (x_new - x[s.ixl]) / (x[s.ixr] - x[s.ixl])
+
+    def __call__(s, y, axis=0, dtype=None):
+        y = np.asarray(y)
+        if dtype is None:
+            dtype = y.dtype if np.issubdtype(y.dtype, np.floating) else np.double
+
+        if s.identical:
+            return np.array(y, dtype=dtype)
+
+        y = np.asarray(y, dtype=dtype)
+        if y.ndim == 0:
+            raise Exception('y must have at least 1 dimension')
+        axis = axis % y.ndim
+        if len(s.x) != y.shape[axis]:
+            raise Exception(f'len(x) must be the same as y.shape[{axis}]')
+
+        # weights, shaped for broadcasting along the axis
+        weight = s.weight.astype(dtype, copy=False)
+        weight = np.reshape(weight, [-1 if i == axis else 1 for i in range(y.ndim)])
+
+        # interpolation to y_new = weight * (y[ixr] - y[ixl]) + y[ixl]
+        y_left = np.take(y, s.ixl, axis=axis)
+        y_new = np.take(y, s.ixr, axis=axis)
+        y_new -= y_left
+        y_new *= weight
+        y_new += y_left
+        return y_new
+
+
+# ---- LRU cache of the interpolators, keyed on a hash of the grids
+INTERP_CACHE_SIZE = 64
+_interpCache = OrderedDict()
+_interpCacheLock = threading.Lock()
+
+
+def getInterpolator(x, x_new, extrapolate=False):
     x = np.array(x, dtype=np.double)
-    y = np.array(y, dtype=np.double)
     x_new = np.array(x_new, dtype=np.double)
+    key = hashlib.sha1(b''.join([
+        str(x.shape).encode(), x.tobytes(),
+        str(x_new.shape).encode(), x_new.tobytes(),
+        bytes([bool(extrapolate)]),
+    ])).hexdigest()
 
-    if np.array_equal(x, x_new):  # no need to interpolate
-        return y
-
-    if axis != 0:
-        y = np.swapaxes(y, 0, axis)
-    if x.ndim > 1:
-        raise Exception(f'x.ndim must be 1 but input is {x.ndim}')
-    if x_new.ndim > 1:
-        raise Exception(f'x_new.ndim must be 1 but input is {x_new.ndim}')
-    if len(x) != y.shape[0]:
-        raise Exception(f'len(x) must be the same as y.shape[0]')
-    if not strictly_increasing(x):
-        raise Exception('x must be strictly increasing.')
-    if not strictly_increasing(x_new):
-        raise Exception('x_new must be strictly increasing.')
-    if not extrapolate and np.min(x_new) < np.min(x):
-        raise Exception(
-            f'min(x_new) must >= min(x) but they are {np.min(x_new)}, {np.min(x)}')
-    if not extrapolate and np.max(x_new) > np.max(x):
-        raise Exception(
-            f'max(x_new) must <= max(x) but they are {np.max(x_new)}, {np.max(x)}')
-
-    nx = len(x)
-    nx_new = len(x_new)
-
-    # find index of x to interpolate
-    ixl = np.zeros((nx_new,), dtype=np.int32)
-    ixr = np.zeros((nx_new,), dtype=np.int32)
-
-    for ix_new in range(nx_new):
-        dx = np.array(x_new[ix_new] - x)
-
-        if extrapolate:
-            if x_new[ix_new] < x[0]:
-                ixl[ix_new] = 0
-                continue
-            if x_new[ix_new] > x[-1]:
-                ixl[ix_new] = nx - 2
-                continue
-
-        # check the exact same grid
-        ix = np.where(dx == 0)[0]
-        if len(ix) and ix == 0:
-            ixl[ix_new] = ix
-            continue
-        if len(ix) and ix != 0:
-            ixl[ix_new] = ix-1
-            continue
-
-        # find the intersection
-        ix = np.where(dx < 0)[0][0]
-        ixl[ix_new] = ix-1
+    with _interpCacheLock:
+        if key in _interpCache:
+            _interpCache.move_to_end(key)
+            return _interpCache[key]
 
-    ixr = ixl + 1
+    interpolator = Interpolator(x, x_new, extrapolate)
+    with _interpCacheLock:
+        _interpCache[key] = interpolator
+        while len(_interpCache) > INTERP_CACHE_SIZE:
+            _interpCache.popitem(last=False)
+    return interpolator
 
-    # interpolation to y_new
-    y_new = x_new - x[ixl]
-    y_new /= x[ixr] - x[ixl]
 
-    y_new = np.tile(y_new, [1 for i in range(y.ndim)])  # for broadcasting
-    if y_new.ndim != 1:
-        y_new = np.swapaxes(y_new, 0, y_new.ndim-1)  # for broadcasting
+def clearInterpCache():
+    with _interpCacheLock:
+        _interpCache.clear()
 
-    y_new = y_new * (y[ixr, :] - y[ixl, :])
-    y_new += y[ixl]
 
-    if axis != 0:
-        y_new = np.swapaxes(y_new, 0, axis)
-    return y_new
+def subtractClim(total, clim, iClims, inplace=False):
+    '''
+    -> total - clim[iClims], iClims indexes the first axis of clim (e.g., from
+    timetools.dayOfClimIndexArray) and broadcasts against total
+    inplace reuses total if its dtype and shape can hold the result
+    '''
+    climSubset = clim[iClims]
+    if (
+        inplace and total.flags.writeable
+        and np.result_type(total, climSubset) == total.dtype
+        and np.broadcast_shapes(total.shape, climSubset.shape) == total.shape
+    ):
+        total -= climSubset
+        return total
+    return total - climSubset
 
 
 def scores_2d(forecast, observation, lat):
@@ -0,0 +1,170 @@
+'''
+process-level LRU cache of the decoded climatology
+
+Entries are keyed on (source, varName, selection), where the source is the
+climatology file or a tuple of files (invalidated when the mtime or size of
+any of them changes) or the name of the reader. The readers cache the whole annual cycle of a (spatial)
+selection once and serve the days of year from it without I/O.
+
+    from pytools import climcache
+    climcache.info()            # hits, misses, entries and bytes
+    climcache.invalidate(path)  # or invalidate() for everything
+    climcache.clear()           # same as invalidate(), also resets counters
+    climcache.setMaxBytes(2e9)  # default 1 GB, or PYTOOLS_CLIMCACHE_MB
+
+Cached arrays are read-only, callers get a copy if they need to modify it.
+'''
+from collections import OrderedDict
+import numpy as np
+import os
+import threading
+
+DEFAULT_MAX_MB = 1024
+
+
+def get(source, varName, selection, read, *args, **kwArgs):
+    '''
+    -> read(*args, **kwArgs), from the cache if the same
+    (source, varName, selection) was read before
+    selection must be hashable after converting lists into tuples
+    '''
+    return _cache.get(source, varName, selection, read, *args, **kwArgs)
+
+
+def invalidate(source=None):
+    # drop the entries of one source, or everything if source is None
+    _cache.invalidate(source)
+
+
+def clear():
+    _cache.invalidate()
+    _cache.hits, _cache.misses = 0, 0
+
+
+def info():
+    return _cache.info()
+
+
+def setMaxBytes(maxBytes):
+    _cache.setMaxBytes(maxBytes)
+
+
+class ClimCache:
+    def __init__(s, maxBytes):
+        s.maxBytes = int(maxBytes)
+        s.hits, s.misses = 0, 0
+        s._bytes = 0
+        s._lock = threading.Lock()
+        s._entries = OrderedDict()  # key -> (stamp, value, numBytes)
+
+    def get(s, source, varName, selection, read, *args, **kwArgs):
+        key = (_realpath(source), varName, _hashable(selection))
+        stamp = _stamp(key[0])
+
+        with s._lock:
+            entry = s._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                s._entries.move_to_end(key)
+                s.hits += 1
+                return entry[1]
+            s.misses += 1
+
+        value = read(*args, **kwArgs)
+        _setReadOnly(value)
+        numBytes = _nbytes(value)
+        with s._lock:
+            s._pop(key)
+            if numBytes <= s.maxBytes:
+                s._entries[key] = (stamp, value, numBytes)
+                s._bytes += numBytes
+                s._evict()
+        return value
+
+    def invalidate(s, source=None):
+        with s._lock:
+            if source is None:
+                s._entries.clear()
+                s._bytes = 0
+                return
+            source = _realpath(source)
+            for key in [key for key in s._entries if _isPartOf(source, key[0])]:
+                s._pop(key)
+
+    def info(s):
+        with s._lock:
+            return {
+                'hits': s.hits,
+                'misses': s.misses,
+                'entries': len(s._entries),
+                'bytes': s._bytes,
+                'maxBytes': s.maxBytes,
+            }
+
+    def setMaxBytes(s, maxBytes):
+        with s._lock:
+            s.maxBytes = int(maxBytes)
+            s._evict()
+
+    def _pop(s, key):
+        entry = s._entries.pop(key, None)
+        if entry is not None:
+            s._bytes -= entry[2]
+
+    def _evict(s):
+        while s._bytes > s.maxBytes and s._entries:
+            s._bytes -= s._entries.popitem(last=False)[1][2]
+
+
+def _realpath(source):
+    # files are keyed on the real path, other sources (e.g., names) as they are
+    if isinstance(source, tuple):
+        return tuple(_realpath(e) for e in source)
+    if isinstance(source, str) and os.path.exists(source):
+        return os.path.realpath(source)
+    return source
+
+
+def _stamp(source):
+    # -> (mtime, size) of a file source (of each file of a tuple), None otherwise
+    if isinstance(source, tuple):
+        return tuple(_stamp(e) for e in source)
+    try:
+        stat = os.stat(source)
+    except (OSError, TypeError, ValueError):
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+def _isPartOf(source, keySource):
+    return source == keySource or (isinstance(keySource, tuple) and source in keySource)
+
+
+def _hashable(selection):
+    if isinstance(selection, (list, tuple)):
+        return tuple(_hashable(e) for e in selection)
+    if isinstance(selection, np.ndarray):
+        return (selection.dtype.str, selection.shape, selection.tobytes())
+    if isinstance(selection, np.generic):
+        return selection.item()
+    return selection
+
+
+def _setReadOnly(value):
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for e in value:
+            _setReadOnly(e)
+
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(e) for e in value)
+    return 0
+
+
+_cache = ClimCache(
+    float(os.getenv('PYTOOLS_CLIMCACHE_MB') or DEFAULT_MAX_MB) * 1e6
+)
@@ -1,32 +1,144 @@
 from . import timetools as tt
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import os
 
 def read2d(path, nxny, precision='double'):
     if not os.path.exists(path):
         raise FileNotFoundError(path)
-    
-    if precision == 'double':
-        dataType = np.float64
-    elif precision in ['single', 'float']:
-        dataType = np.float32
-        
+
+    dataType = _precision2dtype(precision)
     data = np.fromfile(path, dtype=dataType, count=np.prod(nxny))
     data = np.reshape(data, nxny[::-1])
 
     return data
 
 
-def readNd(paths, shape, precision='double'):
+def readNd(paths, shape, precision='double', workers=1):
+    '''
+    one 2-D field [ny, nx] per path, shape = [..., ny, nx]
+    the fields are read straight into one preallocated array (readinto),
+    workers > 1 reads the files with threads
+    '''
+    if workers < 1:
+        raise ValueError(f'"workers" must be >= 1 but {workers=}')
+    _checkPaths(paths)
+    data = np.empty(shape, dtype=_precision2dtype(precision))
+    fields = data.reshape(-1, *shape[-2:])
+    if len(fields) != len(paths):
+        raise ValueError(f'{len(paths)} paths for {len(fields)} fields of {shape=}')
+
+    if workers == 1:
+        for path, field in zip(paths, fields):
+            _readInto(path, field)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_readInto, paths, fields))
+    return data
+
+
+def memmap2d(path, nxny, precision='double'):
+    # -> read-only memory-mapped [ny, nx], nothing is read until indexed
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return np.memmap(
+        path, dtype=_precision2dtype(precision), mode='r', shape=tuple(nxny[::-1])
+    )
+
+
+def memmapNd(paths, shape, precision='double'):
+    # -> DmsView of the files as one lazily-indexed array of shape [..., ny, nx]
+    _checkPaths(paths)
+    return DmsView(list(paths), tuple(shape), _precision2dtype(precision))
+
+
+class DmsView:
+    '''
+    view[..] maps only the files (and reads only the parts) it selects:
+    int, slice or int arrays for the file dimensions, int or slice for [ny, nx]
+    np.asarray(view) reads everything, same as readNd
+    '''
+    def __init__(s, paths, shape, dtype):
+        s.paths = paths
+        s.shape = shape
+        s.dtype = np.dtype(dtype)
+        s.ndim = len(shape)
+        s._fileIndices = np.arange(len(paths)).reshape(shape[:-2])
+
+    def __len__(s):
+        return s.shape[0]
+
+    def __repr__(s):
+        return f'DmsView(shape={s.shape}, dtype={s.dtype}, files={len(s.paths)})'
+
+    def __array__(s, dtype=None, copy=None):
+        data = readNd(s.paths, s.shape, s.dtype)
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+    def __getitem__(s, key):
+        fileKey, fieldKey = s._splitKey(key)
+        fileIndices = np.asarray(s._fileIndices[fileKey])
+        fieldShape = np.empty(s.shape[-2:], dtype=bool)[fieldKey].shape
+
+        data = np.empty(fileIndices.shape + fieldShape, dtype=s.dtype)
+        fields = data.reshape(-1, *fieldShape)
+        nxny = (s.shape[-1], s.shape[-2])
+        for field, iFile in zip(fields, fileIndices.ravel()):
+            field[...] = memmap2d(s.paths[iFile], nxny, s.dtype)[fieldKey]
+        return data
+
+    def _splitKey(s, key):
+        # -> the key of the file dimensions and of [ny, nx]
+        key = key if isinstance(key, tuple) else (key,)
+        if sum(k is Ellipsis for k in key) > 1:
+            raise IndexError('an index can only have a single ellipsis')
+        iEllipsis = next((i for i, k in enumerate(key) if k is Ellipsis), None)
+        if iEllipsis is not None:
+            numFills = s.ndim - (len(key) - 1)
+            key = (*key[:iEllipsis], *[slice(None)] * numFills, *key[iEllipsis + 1:])
+        if len(key) > s.ndim:
+            raise IndexError(f'too many indices for {s.ndim}-d DmsView')
+        key = (*key, *[slice(None)] * (s.ndim - len(key)))
+
+        fieldKey = key[-2:]
+        for k in fieldKey:
+            if not isinstance(k, (int, np.integer, slice)):
+                raise IndexError('only int or slice for the [ny, nx] dimensions')
+        return key[:-2], fieldKey
+
+
+def _precision2dtype(precision):
+    if isinstance(precision, (np.dtype, type)):
+        return np.dtype(precision)
+    if precision == 'double':
+        return np.dtype(np.float64)
+    elif precision in ['single', 'float']:
+        return np.dtype(np.float32)
+    raise ValueError(f'unknown {precision = }, should be "double" or "single"')
+
+
+def _checkPaths(paths):
     notFoundPaths = [
         path for path in paths
         if not os.path.exists(path)
     ]
     if notFoundPaths:
         raise FileNotFoundError([' '.join(notFoundPaths)])
-    data = np.array([read2d(path, shape[-2:], precision) for path in paths])
-    data = np.reshape(data, shape)
-    return data
+
+
+def _readInto(path, field):
+    # a raw read may return fewer bytes than asked (e.g., network file
+    # systems, or the 2 GB limit of a read on Linux), read until full or EOF
+    buffer = memoryview(field).cast('B')
+    numBytes = 0
+    with open(path, 'rb', buffering=0) as f:
+        while numBytes < field.nbytes:
+            numRead = f.readinto(buffer[numBytes:])
+            if not numRead:
+                break
+            numBytes += numRead
+    if numBytes != field.nbytes:
+        raise ValueError(f'{path} has {numBytes} bytes, less than {field.nbytes}')
 
 
 def multiLevelVarName2dmsPrefix(varName, levels=None):
@@ -11,11 +11,18 @@ DIRROOT/processed/
 from .. import timetools as tt
 from ..plottools import FlushPrinter as Fp
 from ..nctools import getVarDimLength as getNcVarDimLength
+from .grib2index import Grib2Index, appendRecords
+from .grib2index import uniqueRecords as getUniqueRecords
+from .pipelinestate import PipelineState, fileStamp
+from .plan import WorkUnit, savePlan, logPlan
 import os
 import subprocess
+import time
 import inspect
 import logging
 
+CDO_THREADS = 16  # cdo -P of mergeFilesToNC, also recorded to the state
+
 
 def run(
     MODELSETTINGS,
@@ -32,7 +39,13 @@ def run(
     SKIP_VARNAME=[],
     LOGFILE='',
     reverseInit=True,
+    GRIB2INDEX=None,
+    STATEDB=None,
+    PLANFILE='',
 ):
+    # DRYRUN: nothing is merged or converted, the outputs to process are
+    #         logged as a plan with the estimated costs (see plan.py) and
+    #         saved to PLANFILE as JSON if given
 
     def getOneModel(modelName):
         def getSrcFiles():
@@ -102,7 +115,7 @@ def run(
             return getDesDir() + 'wnp_0p25_' + varName + '.nc'
 
         def mergeFilesToNC(srcFiles):
-            cdo = '/nwpr/gfs/com120/.conda/envs/rd/bin/cdo -f nc4 -z zip9 -P 16 -L --reduce_dim'
+            cdo = f'/nwpr/gfs/com120/.conda/envs/rd/bin/cdo -f nc4 -z zip9 -P {CDO_THREADS} -L --reduce_dim'
             cat = '/usr/bin/cat'
             wgrib2 = '/usr/bin/wgrib2 -ncpu 1'
 
@@ -128,40 +141,34 @@ def run(
             logging.info(f' catting {numSrcFiles} into 1 file')
 
             fp = Fp()
+            mergeStart = time.time()
+            srcBytes = 0  # of the merged records
             for iFile, srcFile in enumerate(srcFiles):
                 fp.flushPrint(f'  {iFile + 1} / {numSrcFiles}..')
 
                 if modelSetting['dataStructure'] == 'fakeDmsKey':
                     cmd = f'{cat} {srcFile} >> {MIDFILE}'  # extract here
                     runCommand(cmd, print_command=DEBUG)
+                    srcBytes += os.path.getsize(srcFile)
 
                 if modelSetting['dataStructure'] == 'mergedGrib2':
                     lead = modelSetting['leadList'][varName][iFile]
 
                     # checking the number of records retreived by wgrib2 matching the number of levels
-                    cmd_getRecords = f'{wgrib2} {
-                        srcFile} -match "({modelSetting['grib2Keys'][varName](lead)})"'
-                    result = runCommand(
-                        cmd_getRecords, 
-                        print_command=False, 
-                        forced_run=True
-                    )
+                    # (matched against the cached inventory of wgrib2 -s)
+                    grib2Match = modelSetting['grib2Keys'][varName](lead)
+                    cmd_getRecords = f'{wgrib2} {srcFile} -match "({grib2Match})"'
+                    inventory = grib2Index.get(srcFile, wgrib2)
                     
                     # evaluating the number of records retrieved
-                    if result is None:  # no output by wgrib2
-                        numUniqueRecords = 0
+                    if inventory is None:  # no output by wgrib2
+                        uniqueRecords = []
                     else:
-                        lines = result.split('\n')
-                        records = [r for r in lines if r != ''] # somehow an empty string can be returned from wgrib2..
-
-                        # remove the wgrib2 line number
-                        # and check if there are duplicated records
+                        # check if there are duplicated records
                         # (because prec in TGFS 0-6h are duplicated, and 
                         #  messed up the counting...)
-                        splittedRecords = [r.split(':')[2:] for r in records]
-                        iUniqueRecords = [i for i, c, in enumerate(splittedRecords) if c not in splittedRecords[i+1:]]
-                        recordPositions = [records[i].split(':')[0] for i in iUniqueRecords]
-                        numUniqueRecords = len(recordPositions)
+                        uniqueRecords = getUniqueRecords(inventory.match(f'({grib2Match})'))
+                    numUniqueRecords = len(uniqueRecords)
 
 
                     # quit looping if the record number is wrong
@@ -171,22 +178,22 @@ def run(
                                         + 'records = None')
                         break
                     elif numUniqueRecords != numRecords:
-                        uniqueRecords = [records[i] for i in iUniqueRecords]
                         logging.error(f'\nFAIL: received {numUniqueRecords} records'
                                         + f'( expecting {numRecords})\n'
                                         + f'command = {cmd_getRecords}\n'
-                                        + f'records=\n    {'\n    '.join(uniqueRecords)}')
+                                        + f'records=\n    {'\n    '.join([r.line for r in uniqueRecords])}')
                         break
 
-                    # The record check is passed. Now extract the record and append to MIDFILE
-                                                        # -match "^(20|30):" ## for 20, 30 = record pos
-                    cmd_getRecords = f'{wgrib2} {srcFile} -match "^({'|'.join(recordPositions)}):"'
-                    cmd = f'{cmd_getRecords} -append -grib {MIDFILE}'
-                    runCommand(cmd, print_command=DEBUG)
+                    # The record check is passed. Now extract the records by
+                    # byte range and append to MIDFILE
+                    if DEBUG:
+                        logging.info(f'[extracting] {numUniqueRecords} records of {srcFile}')
+                    srcBytes += appendRecords(srcFile, uniqueRecords, MIDFILE)
 
                 if iFile+1 == numSrcFiles:
                     print('', end='\n', flush=True)
                     logging.info(' catting files done!')
+            mergeSeconds = time.time() - mergeStart
 
             if not os.path.isfile(MIDFILE):
                 logging.error(
@@ -232,8 +239,10 @@ def run(
             cmd += f' -remapbil,r360x180'
             cmd += f' {postSelectRegion}'
             cmd += f' {MIDFILE} {desFile_global}'
+            startTime = time.time()
             runCommand(cmd)
             logging.info(f'file done: {desFile_global}')
+            convertSeconds = {'global_1p0': time.time() - startTime}
 
             # WNP: cdo remap, daymean
             if doWNP:
@@ -243,14 +252,111 @@ def run(
                 cmd += f' -remapbil,r1440x720'
                 cmd += f' {postSelectRegion}'
                 cmd += f' {MIDFILE} {desFile_WNP}'
+                startTime = time.time()
                 runCommand(cmd)
                 logging.info(f'file done: {desFile_WNP}')
+                convertSeconds['wnp_0p25'] = time.time() - startTime
+
+            # the rates of the done outputs estimate the plans of DRYRUN
+            desFiles = {'global_1p0': desFile_global, 'wnp_0p25': desFile_WNP}
+            for outputType in convertSeconds:
+                recordDone(
+                    desFiles[outputType], outputType, srcFiles,
+                    srcBytes=srcBytes / len(convertSeconds),
+                    mergeSeconds=mergeSeconds / len(convertSeconds),
+                    convertSeconds=convertSeconds[outputType],
+                )
 
             if not DEBUG:
                 rmMidFile()
 
             return
 
+        def getNumTimes(desFile, outputType):
+            # number of days in desFile, from the state if the file is unchanged
+            key = (modelName, init, member, varName, outputType)
+            unit = None if state is None else state.lookup(key)
+            if unit is not None and unit.desStamp == fileStamp(desFile):
+                return unit.numTimes
+
+            numTimes = getNcVarDimLength(desFile, varName, 0)
+            if state is not None and os.path.isfile(desFile):
+                desMtime, desSize = fileStamp(desFile)
+                state.update(
+                    key, status='checked', stage='checkDesFileCompleteness',
+                    numTimes=numTimes, desPath=desFile, desMtime=desMtime, desSize=desSize,
+                )
+            return numTimes
+
+        def recordDone(desFile, outputType, srcFiles, **values):
+            # record the converted output as done, with the timings of its stages
+            if state is None or not os.path.isfile(desFile):
+                return
+            desMtime, desSize = fileStamp(desFile)
+            state.update(
+                (modelName, init, member, varName, outputType),
+                status='done', stage='mergeFilesToNC',
+                numTimes=getNcVarDimLength(desFile, varName, 0),
+                leadDays=getNumDays(srcFiles),
+                numSrcFiles=len(srcFiles), numMergedFiles=len(srcFiles),
+                desPath=desFile, desMtime=desMtime, desSize=desSize,
+                cdoThreads=CDO_THREADS,
+                message=None, **values,
+            )
+
+        def getNumDays(srcFiles):
+            # number of the valid days of the leads of srcFiles
+            hourShift = modelSetting['hourShift'][varName]
+            return len(set([
+                int(init + hourShift/24 + l/24) for l in modelSetting['leadList'][varName][:len(srcFiles)]
+            ]))
+
+        def getPlanUnits(srcFiles):
+            # -> [WorkUnit] of the outputs of srcFiles, without running wgrib2
+            if modelSetting['dataStructure'] == 'mergedGrib2':
+                srcBytes = 0
+                for srcFile, lead in zip(srcFiles, modelSetting['leadList'][varName]):
+                    inventory = grib2Index.get(srcFile, scan=False)
+                    if inventory is None:
+                        srcBytes = None
+                        break
+                    grib2Match = modelSetting['grib2Keys'][varName](lead)
+                    srcBytes += sum(
+                        r.length for r in getUniqueRecords(inventory.match(f'({grib2Match})'))
+                    )
+            else:  # the whole files are catted
+                srcBytes = sum(os.path.getsize(srcFile) for srcFile in srcFiles)
+
+            desFiles = {'global_1p0': getDesFile_global()}
+            if modelSetting['levels'][varName] is None:
+                desFiles['wnp_0p25'] = getDesFile_WNP()
+            numDays = getNumDays(srcFiles)
+
+            units = []
+            for outputType, desFile in desFiles.items():
+                if FORCEUPDATE:
+                    reason = 'forced'
+                elif not os.path.isfile(desFile):
+                    reason = 'missing'
+                else:
+                    reason = 'incomplete'
+                unit = WorkUnit(
+                    modelName, init, member, varName, outputType, reason,
+                    desPath=desFile, numSrcFiles=len(srcFiles),
+                )
+                # the merged file is shared by the outputs
+                if srcBytes is not None:
+                    unit.srcBytes = srcBytes / len(desFiles)
+                rates = {} if state is None else state.getRates(modelName, varName, outputType)
+                if rates.get('desBytesPerDay') is not None:
+                    unit.desBytes = rates['desBytesPerDay'] * numDays
+                if None not in [rates.get('mergeSecondsPerFile'), rates.get('convertCpuSecondsPerFile')]:
+                    unit.cpuSeconds = len(srcFiles) * (
+                        rates['mergeSecondsPerFile'] + rates['convertCpuSecondsPerFile']
+                    )
+                units.append(unit)
+            return units
+
         def checkDesFileCompleteness():
             # Let's check...
             # If the file is already processed, and the output
@@ -260,8 +366,8 @@ def run(
             # be returned for later use as well.
             desFile_global = getDesFile_global()
             desFile_WNP = getDesFile_WNP()
-            existingNT_global = getNcVarDimLength(getDesFile_global(), varName, 0)
-            existingNT_WNP = getNcVarDimLength(getDesFile_WNP(), varName, 0)
+            existingNT_global = getNumTimes(desFile_global, 'global_1p0')
+            existingNT_WNP = getNumTimes(desFile_WNP, 'wnp_0p25')
             doWNP = modelSetting['levels'][varName] is None
             hourShift = modelSetting['hourShift'][varName]
 
@@ -412,6 +518,9 @@ def run(
                     if len(srcFiles) == 0:
                         logging.error('    XX unable to find any source file')
                         continue
+                    if DRYRUN:
+                        planUnits.extend(getPlanUnits(srcFiles))
+                        continue
                     mergeFilesToNC(srcFiles)
         return
 
@@ -457,6 +566,8 @@ def run(
 # ====================================================================
     checkFile(MIDFILE)
     checkFile(LOGFILE)
+    grib2Index = Grib2Index(GRIB2INDEX)  # inventories of the source grib2 files
+    state = None if STATEDB is None else PipelineState(STATEDB)  # numbers of days of the outputs
     for modelName in MODELSETTINGS:
         if not (os.path.isfile(getGridDes(modelName)) or os.path.islink(getGridDes(modelName))):
             logging.error( ' unable to locate grid description file:'
@@ -492,6 +603,7 @@ def run(
     logging.info(f' DEBUG       = {DEBUG}')
     logging.info(f' FORCEUPDATE = {FORCEUPDATE}')
     logging.info(f' DRYRUN      = {DRYRUN}')
+    logging.info(f' PLANFILE    = {PLANFILE}')
     logging.info(f' ')
     logging.info(f' SKIP_MODEL   = {SKIP_MODEL}')
     logging.info(f' SKIP_INIT    = {SKIP_INIT}')
@@ -500,7 +612,12 @@ def run(
     logging.info(f' SKIP_VARNAME = {SKIP_VARNAME}')
     logging.info('')
 
+    planUnits = []  # of DRYRUN
     [getOneModel(m) for m in MODELSETTINGS if m not in SKIP_MODEL]
+    if DRYRUN:
+        logPlan(planUnits)
+        if PLANFILE:
+            savePlan(planUnits, PLANFILE)
 
     logging.info(' end getting model data')
 # ====================================================================
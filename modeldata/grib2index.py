@@ -0,0 +1,238 @@
+'''
+persistent inventory of the grib2 source files
+
+The inventory of a file is read once with "wgrib2 -s" and stored with the
+byte offset and length of each record, keyed on the real path and
+invalidated when the mtime or size changes. The records are matched in
+memory (as wgrib2 -match, against the full inventory line) and extracted
+by byte range without rescanning the file. The parsed inventories of the
+last maxInventories files are kept in memory (LRU), the others are parsed
+again from the index.
+
+    from pytools.modeldata import grib2index
+    index = grib2index.Grib2Index()     # ~/.cache/pytools/grib2index.sqlite
+    inventory = index.get(path, '/usr/bin/wgrib2')
+    records = uniqueRecords(inventory.match('(:UGRD:|:VGRD:)'))
+    appendRecords(path, records, tempFile)
+    routeRecords(path, [(records, tempFile), (otherRecords, otherFile)])
+
+or set the environment variable PYTOOLS_GRIB2INDEX to the index path.
+'''
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+SCHEMA = 1
+DEFAULT_DB_PATH = '~/.cache/pytools/grib2index.sqlite'
+DEFAULT_MAX_INVENTORIES = 256
+
+
+@dataclass
+class Grib2Record:
+    recNum: str   # e.g., '12' or '12.2' for a submessage
+    offset: int   # in bytes
+    length: int   # in bytes, of the whole message
+    line: str     # the inventory line from wgrib2 -s
+
+    @property
+    def isSubmessage(s):
+        return '.' in s.recNum
+
+    @property
+    def key(s):
+        # the inventory without the record number and the offset
+        return s.line.split(':', 2)[2]
+
+
+@dataclass
+class Grib2Inventory:
+    path: str
+    records: list
+
+    def match(s, pattern):
+        # -> records whose inventory line matches, as wgrib2 -match
+        regex = re.compile(pattern)
+        return [r for r in s.records if regex.search(r.line)]
+
+
+class Grib2Index:
+    def __init__(s, dbPath=None, maxInventories=DEFAULT_MAX_INVENTORIES):
+        if dbPath is None:
+            dbPath = os.getenv('PYTOOLS_GRIB2INDEX') or DEFAULT_DB_PATH
+        s.dbPath = os.path.expanduser(dbPath)
+        dbDir = os.path.dirname(s.dbPath)
+        if dbDir and not os.path.exists(dbDir):
+            os.makedirs(dbDir, exist_ok=True)
+
+        s.hits, s.scans = 0, 0
+        s.maxInventories = maxInventories
+        s._lock = threading.Lock()
+        s._memory = OrderedDict()  # path -> (mtime, size, inventory), LRU
+        s._pid, s._connection = None, None
+        with s._lock, s._connect() as con:
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS inventories ('
+                'path TEXT PRIMARY KEY, mtime REAL, size INTEGER, '
+                'schema INTEGER, inventory TEXT)'
+            )
+
+    def _connect(s):
+        # a connection cannot be shared with forked processes (e.g., workers)
+        if s._pid != os.getpid():
+            s._pid = os.getpid()
+            s._connection = sqlite3.connect(
+                s.dbPath, timeout=60, check_same_thread=False
+            )
+        return s._connection
+
+    def get(s, fileName, wgrib2='/usr/bin/wgrib2', scan=True):
+        # -> Grib2Inventory, or None if the file is missing or unreadable
+        #    (or not indexed yet without scan)
+        try:
+            path = os.path.realpath(fileName)
+            stat = os.stat(path)
+        except OSError:
+            return None
+        mtime, size = stat.st_mtime, stat.st_size
+
+        cached = s._memory.get(path)
+        if cached is not None and cached[:2] == (mtime, size):
+            s._memory.move_to_end(path)
+            s.hits += 1
+            return cached[2]
+
+        text = s._load(path, mtime, size)
+        if text is None:
+            if not scan:
+                return None
+            status, text = subprocess.getstatusoutput(f'{wgrib2} -s {path}')
+            if status != 0:
+                return None
+            s.scans += 1
+            s._store(path, mtime, size, text)
+        else:
+            s.hits += 1
+
+        inventory = Grib2Inventory(path, _parseInventory(text, size))
+        s._memory[path] = (mtime, size, inventory)
+        s._memory.move_to_end(path)
+        while len(s._memory) > s.maxInventories:
+            s._memory.popitem(last=False)
+        return inventory
+
+    def invalidate(s, fileName=None):
+        # drop one file, or everything if fileName is None
+        with s._lock, s._connect() as con:
+            if fileName is None:
+                s._memory.clear()
+                con.execute('DELETE FROM inventories')
+                return
+            path = os.path.realpath(fileName)
+            s._memory.pop(path, None)
+            con.execute('DELETE FROM inventories WHERE path = ?', (path,))
+
+    def _load(s, path, mtime, size):
+        with s._lock:
+            row = s._connect().execute(
+                'SELECT mtime, size, schema, inventory FROM inventories WHERE path = ?',
+                (path,)
+            ).fetchone()
+        if row is None or tuple(row[:3]) != (mtime, size, SCHEMA):
+            return None
+        return row[3]
+
+    def _store(s, path, mtime, size, text):
+        with s._lock, s._connect() as con:
+            con.execute(
+                'INSERT OR REPLACE INTO inventories VALUES (?, ?, ?, ?, ?)',
+                (path, mtime, size, SCHEMA, text)
+            )
+
+
+def uniqueRecords(records):
+    # drop the duplicated records (same inventory except the record number and
+    # offset, e.g., prec of TGFS at 0-6h), keeping the last one as before
+    seen, unique = set(), []
+    for record in reversed(records):
+        if record.key in seen:
+            continue
+        seen.add(record.key)
+        unique.append(record)
+    return unique[::-1]
+
+
+def appendRecords(srcPath, records, desPath):
+    # append the messages of the records to desPath by byte range
+    # -> number of bytes read
+    return routeRecords(srcPath, [(records, desPath)])
+
+
+def routeRecords(srcPath, routes):
+    # one pass over srcPath, appending the messages of each
+    # (records, desPath) in routes to its desPath in the file order
+    # -> number of bytes read
+    reads = sorted(
+        (offset, length, iRoute)
+        for iRoute, (records, __) in enumerate(routes)
+        for offset, length in _byteRanges(records)
+    )
+    desFiles = {}
+    numBytes, lastRange, chunk = 0, None, b''
+    try:
+        with open(srcPath, 'rb') as src:
+            for offset, length, iRoute in reads:
+                if (offset, length) != lastRange:  # read once for all the routes
+                    src.seek(offset)
+                    chunk = src.read(length)
+                    if len(chunk) != length:
+                        raise OSError(f'expecting {length} bytes at {offset} but read {len(chunk)} in {srcPath}')
+                    numBytes += length
+                    lastRange = (offset, length)
+
+                desPath = routes[iRoute][1]
+                if desPath not in desFiles:
+                    desFiles[desPath] = open(desPath, 'ab')
+                desFiles[desPath].write(chunk)
+    finally:
+        for desFile in desFiles.values():
+            desFile.close()
+    return numBytes
+
+
+def _byteRanges(records):
+    # -> [(offset, length)] of the messages in order, merging the
+    # consecutive ones and reading a message only once for its submessages
+    ranges = []
+    for record in records:
+        if ranges and record.offset == ranges[-1][2]:
+            continue  # another submessage of the last message
+        if ranges and record.offset == sum(ranges[-1][:2]):
+            ranges[-1][1] += record.length
+            ranges[-1][2] = record.offset
+            continue
+        ranges.append([record.offset, record.length, record.offset])
+    return [(offset, length) for offset, length, __ in ranges]
+
+
+def _parseInventory(text, fileSize):
+    lines = [
+        line for line in text.split('\n')
+        if line != '' and not line.startswith('Warning:')
+    ]
+    recNums, offsets = [], []
+    for line in lines:
+        recNum, offset = line.split(':', 2)[:2]
+        recNums.append(recNum)
+        offsets.append(int(offset))
+
+    # length of a message = offset of the next message - offset
+    nextOffsets = sorted(set(offsets)) + [fileSize]
+    nextOffset = {o: nextOffsets[i+1] for i, o in enumerate(nextOffsets[:-1])}
+    return [
+        Grib2Record(recNum, offset, nextOffset[offset] - offset, line)
+        for recNum, offset, line in zip(recNums, offsets, lines)
+    ]
@@ -0,0 +1,230 @@
+'''
+local state of the modeldata pipeline
+
+One row per work unit (modelName, initTime, member, varName, outputType)
+with its status, the last stage, the lead coverage of the output, a
+fingerprint of the source files and the (mtime, size) of the output when
+it was recorded. A restart tells a completed unit from its row instead of
+reopening the netCDF file, and planning is a query.
+
+    state = PipelineState('~/.cache/pytools/modeldata.sqlite')
+    state.lookup(key)                   # -> UnitState or None
+    state.update(key, status='done', numTimes=45)
+    state.query(modelName='CWA_TGFS', status='failed')
+    state.summary()                     # {status: count}
+
+status of Processor: 'running' (merging) -> 'converted' -> 'done', or 'failed'
+status of get.run:   'checked' (only the number of days is recorded) or 'done'
+'''
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, fields
+
+SCHEMA = 2
+DEFAULT_DB_PATH = '~/.cache/pytools/modeldata.sqlite'
+KEY_NAMES = ['modelName', 'initTime', 'member', 'varName', 'outputType']
+
+
+@dataclass
+class UnitState:
+    modelName: str
+    initTime: float
+    member: int
+    varName: str
+    outputType: str
+    status: str = None
+    stage: str = None
+    numTimes: int = None     # steps in the output
+    lastTime: float = None   # days since 2000-01-01
+    leadDays: int = None     # valid days of the output from initTime
+    srcFingerprint: str = None
+    numSrcFiles: int = None
+    numMergedFiles: int = None    # fewer than numSrcFiles if appended
+    srcBytes: int = None          # of the merged records
+    desPath: str = None
+    desMtime: float = None
+    desSize: int = None
+    mergeSeconds: float = None    # share of the grib2 merge
+    convertSeconds: float = None  # of the cdo conversion
+    cdoThreads: int = None        # cdo -P of the conversion
+    message: str = None
+    created: float = None
+    updated: float = None
+
+    @property
+    def key(s):
+        return tuple(getattr(s, name) for name in KEY_NAMES)
+
+    @property
+    def desStamp(s):
+        return (s.desMtime, s.desSize)
+
+    def isCurrent(s, desPath, srcFingerprint=None):
+        # -> done, the output is unchanged since recorded, and so are
+        #    the source files if srcFingerprint is given
+        if s.status != 'done' or s.desStamp != fileStamp(desPath):
+            return False
+        return srcFingerprint is None or s.srcFingerprint == srcFingerprint
+
+
+COLUMNS = [f.name for f in fields(UnitState)]
+
+
+class PipelineState:
+    def __init__(s, dbPath=None):
+        if dbPath is None:
+            dbPath = os.getenv('PYTOOLS_MODELDATA_STATE') or DEFAULT_DB_PATH
+        s.dbPath = os.path.expanduser(dbPath)
+        dbDir = os.path.dirname(s.dbPath)
+        if dbDir and not os.path.exists(dbDir):
+            os.makedirs(dbDir, exist_ok=True)
+
+        s._lock = threading.Lock()
+        s._pid, s._connection = None, None
+        types = {'initTime': 'REAL', 'member': 'INTEGER'}
+        with s._lock, s._connect() as con:
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS units (' +
+                ', '.join(f'{name} {types.get(name, "")}'.strip() for name in COLUMNS) +
+                f', PRIMARY KEY ({", ".join(KEY_NAMES)}))'
+            )
+            con.execute(
+                'CREATE INDEX IF NOT EXISTS unitsByStatus ON units (modelName, status)'
+            )
+            # columns added since the table was created
+            existing = [row[1] for row in con.execute('PRAGMA table_info(units)')]
+            for name in COLUMNS:
+                if name not in existing:
+                    con.execute(f'ALTER TABLE units ADD COLUMN {name}')
+            con.execute(f'PRAGMA user_version = {SCHEMA}')
+
+    def _connect(s):
+        # a connection cannot be shared with forked processes (e.g., workers)
+        if s._pid != os.getpid():
+            s._pid = os.getpid()
+            s._connection = sqlite3.connect(
+                s.dbPath, timeout=60, check_same_thread=False
+            )
+        return s._connection
+
+    def lookup(s, key):
+        # -> UnitState of key = (modelName, initTime, member, varName, outputType)
+        rows = s._select(' AND '.join(f'{name} = ?' for name in KEY_NAMES), _checkKey(key))
+        return rows[0] if rows else None
+
+    def update(s, key, **values):
+        # insert or update the given columns of the unit in one transaction
+        invalidNames = [name for name in values if name not in COLUMNS or name in KEY_NAMES]
+        if invalidNames:
+            raise ValueError(f'unknown columns {invalidNames}')
+        now = time.time()
+        names = [*KEY_NAMES, *values, 'created', 'updated']
+        params = [*_checkKey(key), *values.values(), now, now]
+        updates = [name for name in names if name not in KEY_NAMES and name != 'created']
+        with s._lock, s._connect() as con:
+            con.execute(
+                f'INSERT INTO units ({", ".join(names)}) ' +
+                f'VALUES ({", ".join("?" * len(names))}) ' +
+                f'ON CONFLICT ({", ".join(KEY_NAMES)}) DO UPDATE SET ' +
+                ', '.join(f'{name} = excluded.{name}' for name in updates),
+                params
+            )
+
+    def query(s, **conditions):
+        # -> [UnitState] matching the conditions, e.g., status='failed',
+        #    a list matches any of its values
+        invalidNames = [name for name in conditions if name not in COLUMNS]
+        if invalidNames:
+            raise ValueError(f'unknown columns {invalidNames}')
+        clauses, params = [], []
+        for name, value in conditions.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            clauses.append(f'{name} IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+        return s._select(' AND '.join(clauses) or '1', params)
+
+    def summary(s, modelName=None):
+        # -> {status: number of units}
+        where, params = ('WHERE modelName = ?', [modelName]) if modelName else ('', [])
+        with s._lock:
+            rows = s._connect().execute(
+                f'SELECT status, COUNT(*) FROM units {where} GROUP BY status', params
+            ).fetchall()
+        return dict(rows)
+
+    def invalidate(s, **conditions):
+        # drop the matching units, or everything without conditions
+        keys = [unit.key for unit in s.query(**conditions)]
+        with s._lock, s._connect() as con:
+            con.executemany(
+                f'DELETE FROM units WHERE {" AND ".join(f"{name} = ?" for name in KEY_NAMES)}',
+                keys
+            )
+
+    def _select(s, where, params):
+        with s._lock:
+            rows = s._connect().execute(
+                f'SELECT {", ".join(COLUMNS)} FROM units WHERE {where} ' +
+                'ORDER BY modelName, initTime, member, varName, outputType',
+                list(params)
+            ).fetchall()
+        return [UnitState(*row) for row in rows]
+
+    def getRates(s, modelName, varName=None, outputType=None):
+        # -> historical rates of the done units, per source file:
+        #    {numUnits, srcBytesPerFile, desBytesPerDay, mergeSecondsPerFile,
+        #     convertCpuSecondsPerFile}, None for the rates without history
+        conditions = {'modelName': modelName, 'status': 'done'}
+        if varName is not None:
+            conditions['varName'] = varName
+        if outputType is not None:
+            conditions['outputType'] = outputType
+        units = s.query(**conditions)
+
+        def rate(numerators, denominators):
+            pairs = [
+                (n, d) for n, d in zip(numerators, denominators)
+                if n is not None and d
+            ]
+            if not pairs:
+                return None
+            return sum(n for n, __ in pairs) / sum(d for __, d in pairs)
+
+        numFiles = [u.numMergedFiles for u in units]
+        return {
+            'numUnits': len(units),
+            'srcBytesPerFile': rate([u.srcBytes for u in units], numFiles),
+            'desBytesPerDay': rate([u.desSize for u in units], [u.leadDays for u in units]),
+            'mergeSecondsPerFile': rate([u.mergeSeconds for u in units], numFiles),
+            'convertCpuSecondsPerFile': rate([
+                None if u.convertSeconds is None else u.convertSeconds * (u.cdoThreads or 1)
+                for u in units
+            ], numFiles),
+        }
+
+
+def fileStamp(path):
+    # -> (mtime, size) of the file, (None, None) if not found
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (None, None)
+    return (stat.st_mtime, stat.st_size)
+
+
+def sourceFingerprint(paths):
+    # -> a digest of the paths, sizes and mtimes of the source files
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(f'{path}:{fileStamp(path)}\n'.encode())
+    return digest.hexdigest()
+
+
+def _checkKey(key):
+    if len(key) != len(KEY_NAMES):
+        raise ValueError(f'key should be ({", ".join(KEY_NAMES)}), (found={key})')
+    modelName, initTime, member, varName, outputType = key
+    return (modelName, float(initTime), int(member), varName, outputType)
@@ -0,0 +1,111 @@
+'''
+plan of the modeldata work units to process
+
+A plan lists the work units (modelName, initTime, member, varName,
+outputType) that need processing, with the reason and the estimated bytes
+in and out and CPU-seconds. The estimates come from the cached grib2
+inventories and the historical rates of the done units (see
+pipelinestate.PipelineState.getRates), None if unknown. Nothing is merged
+or converted while planning.
+
+    units = processor.plan('plan.json')    # logs and exports the plan
+    getTotals(units)                       # to size the batch job
+    processor.run(plan='plan.json')        # only the slices of the plan
+
+reason: 'forced', 'missing', 'noVariable', 'noTime' or 'incomplete'
+'''
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict, fields
+
+ESTIMATE_NAMES = ['srcBytes', 'desBytes', 'cpuSeconds']
+
+
+@dataclass
+class WorkUnit:
+    modelName: str
+    initTime: float
+    member: int
+    varName: str
+    outputType: str
+    reason: str
+    desPath: str = None
+    numSrcFiles: int = 0       # to merge, only the new ones if appended
+    srcBytes: float = None     # share of the merged source records
+    desBytes: float = None     # of the completed output
+    cpuSeconds: float = None   # merge and conversion
+
+    @property
+    def key(s):
+        return (s.modelName, s.initTime, s.member, s.varName, s.outputType)
+
+
+def getTotals(units):
+    # -> {numUnits, numSrcFiles, srcBytes, desBytes, cpuSeconds, numUnknown},
+    #    numUnknown: units without some of the estimates (not in the totals)
+    totals = {
+        'numUnits': len(units),
+        'numSrcFiles': sum(u.numSrcFiles for u in units),
+    }
+    for name in ESTIMATE_NAMES:
+        totals[name] = sum(getattr(u, name) or 0 for u in units)
+    totals['numUnknown'] = sum(
+        any(getattr(u, name) is None for name in ESTIMATE_NAMES) for u in units
+    )
+    return totals
+
+
+def savePlan(units, path):
+    # write the plan as JSON: {created, totals, units}
+    plan = {
+        'created': time.time(),
+        'totals': getTotals(units),
+        'units': [asdict(u) for u in units],
+    }
+    tempPath = f'{path}.tmp'
+    with open(tempPath, 'w') as f:
+        json.dump(plan, f, indent=1)
+    os.replace(tempPath, path)
+    logging.info(f'plan of {len(units)} units saved to {path}')
+
+
+def loadPlan(path):
+    # -> [WorkUnit] of the plan saved by savePlan
+    with open(path) as f:
+        plan = json.load(f)
+    names = [f.name for f in fields(WorkUnit)]
+    return [
+        WorkUnit(**{name: value for name, value in unit.items() if name in names})
+        for unit in plan['units']
+    ]
+
+
+def logPlan(units):
+    # log the number of units and the estimates by (modelName, varName, outputType)
+    groups = {}
+    for unit in units:
+        groups.setdefault((unit.modelName, unit.varName, unit.outputType), []).append(unit)
+
+    logging.info(f'plan: {len(units)} units to process')
+    for (modelName, varName, outputType), group in sorted(groups.items()):
+        logging.info(f'  {modelName} | {varName} | {outputType}: {_formatTotals(group)}')
+    if units:
+        logging.info(f'  total: {_formatTotals(units)}')
+
+
+def _formatTotals(units):
+    totals = getTotals(units)
+    reasons = {}
+    for unit in units:
+        reasons[unit.reason] = reasons.get(unit.reason, 0) + 1
+    string = (
+        f'{totals['numUnits']} units ({', '.join(f'{n} {r}' for r, n in reasons.items())}), ' +
+        f'{totals['numSrcFiles']} files, ' +
+        f'in {totals['srcBytes']/1e9:.2f} GB, out {totals['desBytes']/1e9:.2f} GB, ' +
+        f'{totals['cpuSeconds']/3600:.2f} CPU-hours'
+    )
+    if totals['numUnknown']:
+        string += f', {totals['numUnknown']} units without history'
+    return string
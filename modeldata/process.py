@@ -1,12 +1,21 @@
 from ..terminaltools import FlushPrinter as Fp
 from .. import timetools as tt
 from .. import nctools as nct
+from .grib2index import Grib2Index, uniqueRecords, appendRecords, routeRecords
+from .pipelinestate import PipelineState, fileStamp, sourceFingerprint
+from .plan import WorkUnit, savePlan, loadPlan, logPlan
+import netCDF4 as nc
+import numpy as np
 import time
 import os
+import shutil
 import logging
 import subprocess
+import multiprocessing
+import copy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from collections.abc import Iterable
-from math import ceil
+from math import ceil, floor
 
 # TODO: check if file need update
 
@@ -25,7 +34,25 @@ class Processor:
     # ------------------------------------------ #
     def __init__(p, modelName, rootDesDir, rootSrcDir,
                  workDir, gridFile, srcPathLambda, initTimes, members,
-                 variables, forceUpdate=False, printDesSummary=False, debug=False):
+                 variables, forceUpdate=False, printDesSummary=False, debug=False,
+                 workers=1, cpus=None, grib2IndexPath=None, fused=False, incremental=False,
+                 stateDbPath=None, compressWorkers=2, complevel=1, shuffle=True, chunkSizes=None):
+        # workers: number of slices (initTime, member, variable) run concurrently
+        # cpus: the CPU budget shared by the compression and the workers,
+        #       each cdo gets (cpus - compressWorkers)//workers. The default,
+        #       8 + compressWorkers, keeps cdo -P 8 for a single worker
+        # fused: a slice is (initTime, member) for all the variables, each source
+        #        file is read once and the cdo conversions run concurrently
+        # incremental: an incomplete output is completed by converting only the
+        #        leads from its last day on and appending them along the time dimension
+        # stateDbPath: record the state of each output (see pipelinestate), so that
+        #        the outputs recorded as completed are skipped without opening them
+        # grib2IndexPath: the inventory cache of the source files, see grib2index
+        # compressWorkers: processes of the main process compressing the outputs
+        #        (nctools.compress with complevel, shuffle and chunkSizes) of the
+        #        completed slices while the next slices are processed, 0 to leave
+        #        the outputs uncompressed. They are started by a forkserver, so the
+        #        calling script needs the if __name__ == '__main__': guard
         p.modelName = modelName
         p.rootDesDir = rootDesDir
         p.rootSrcDir = rootSrcDir
@@ -38,22 +65,44 @@ class Processor:
         p.forceUpdate = forceUpdate
         p.printDesSummary = printDesSummary
         p.debug = debug
+        p.workers = workers
+        p.cpus = cpus
+        p.grib2IndexPath = grib2IndexPath
+        p.fused = fused
+        p.incremental = incremental
+        p.stateDbPath = stateDbPath
+        p.compressWorkers = compressWorkers
+        p.complevel = complevel
+        p.shuffle = shuffle
+        p.chunkSizes = chunkSizes
         p._checkConstructor()
+        if p.cpus is None:
+            p.cpus = 8 + p.compressWorkers
 
 
         p.fp = Fp()
-        p.tempFile = p._getWorkFile('tmp')
+        p.tempBase = p._getWorkFile('tmp')  # + '.{slice}' for each slice
+        p.tempFile = p.tempBase
         p.logFile = p._getWorkFile('log')
         p.status = True
         p._initLogging()
         p.validOutputTypes = _getValidOutputTypes()
-
-        p.CDO = '/nwpr/gfs/com120/.conda/envs/rd/bin/cdo -P 8 --no_history --reduce_dim'
+        p.grib2Index = Grib2Index(p.grib2IndexPath)
+        p.state = None if p.stateDbPath is None else PipelineState(p.stateDbPath)
+        p._compressPid = None  # the pool of the main process, see _getCompressPool
+        p._planning = False  # nothing is recorded to the state while planning
+        p._compressFailures = set()
+
+        p.cdoThreads = max(1, (p.cpus - p.compressWorkers) // p.workers)
+        p.CDO = '/nwpr/gfs/com120/.conda/envs/rd/bin/cdo --no_history --reduce_dim'
         p.WGRIB2 = '/usr/bin/wgrib2 -ncpu 1'
-        p.NC_COMPRESS = '/nwpr/gfs/com120/0_tools/bashtools/nc_compress'
 
-        logging.info(f'tempFile = {p.tempFile}')
+        logging.info(f'tempFile = {p.tempBase}.*')
         logging.info(f'logFile  = {p.logFile}')
+        logging.info(
+            f'workers  = {p.workers}, cdo -P {p.cdoThreads}, compressWorkers = {p.compressWorkers}, ' +
+            f'{p.fused=}, {p.incremental=}'
+        )
 
     def _checkConstructor(p):
 
@@ -68,6 +117,22 @@ class Processor:
         _checkType(p.variables, list, 'variables')
         _checkType(p.forceUpdate, bool, 'forceUpdate')
         _checkType(p.printDesSummary, bool, 'printDesSummary')
+        _checkType(p.workers, int, 'workers')
+        _checkType(p.cpus, [int, None], 'cpus')
+        _checkType(p.grib2IndexPath, [str, None], 'grib2IndexPath')
+        _checkType(p.fused, bool, 'fused')
+        _checkType(p.incremental, bool, 'incremental')
+        _checkType(p.stateDbPath, [str, None], 'stateDbPath')
+        _checkType(p.compressWorkers, int, 'compressWorkers')
+        _checkType(p.complevel, int, 'complevel')
+        _checkType(p.shuffle, bool, 'shuffle')
+        _checkType(p.chunkSizes, [dict, None], 'chunkSizes')
+        if p.workers < 1 or (p.cpus is not None and p.cpus < 1):
+            raise ValueError(f'workers and cpus must be >= 1, ({p.workers=}, {p.cpus=})')
+        if p.compressWorkers < 0:
+            raise ValueError(f'compressWorkers must be >= 0, ({p.compressWorkers=})')
+        if not 0 <= p.complevel <= 9:
+            raise ValueError(f'complevel must be in 0-9, ({p.complevel=})')
         for v in p.variables:
             _checkType(v, Variable, 'variable')
 
@@ -100,15 +165,192 @@ class Processor:
             ]
         )
 
-    def run(p):  # run all
-        for p.initTime in p.initTimes:
-            for p.member in p.members:
-                p.fp.print('---- ---- ----')
-                for p.variable in p.variables:
-                    logging.info(f'[[ {p.modelName} | E{p.member:03d} | {
-                        tt.float2format(p.initTime, '%Y-%m-%d %Hz')
-                    } | {p.variable.varName} ]]')
-                    p._runSlice()
+    def run(p, plan=None):  # run all, or the slices of plan (see plan)
+        variableGroups = [p.variables] if p.fused else [[v] for v in p.variables]
+        p._slices = [
+            (initTime, member, variables)
+            for initTime in p.initTimes
+            for member in p.members
+            for variables in variableGroups
+        ]
+        if plan is not None:
+            p._slices = p._getPlannedSlices(plan)
+        startTime = time.time()
+        if p.workers == 1:
+            results = []
+            lastInitMember = None
+            for initTime, member, variables in p._slices:
+                if (initTime, member) != lastInitMember:
+                    p.fp.print('---- ---- ----')
+                    lastInitMember = (initTime, member)
+                results.append(p._runSliceTask(initTime, member, variables))
+                p._submitCompressions(results[-1].pop('toCompress'))
+        else:
+            results = p._runParallel()
+        failedSlices = p._finishCompressions()
+        for result in results:
+            result['ok'] &= result['name'] not in failedSlices
+        p._printRunSummary(results, time.time() - startTime)
+        return results
+
+    def _getPlannedSlices(p, plan):
+        # -> p._slices with only the variables of the work units in plan,
+        #    a list of WorkUnit or the path of a saved plan
+        if isinstance(plan, str):
+            plan = loadPlan(plan)
+        planned = {
+            (unit.initTime, unit.member, unit.varName)
+            for unit in plan if unit.modelName == p.modelName
+        }
+        slices = []
+        for initTime, member, variables in p._slices:
+            variables = [
+                v for v in variables if (initTime, member, v.varName) in planned
+            ]
+            if variables:
+                slices.append((initTime, member, variables))
+        logging.info(f'running {len(slices)} slices of the plan')
+        return slices
+
+    def plan(p, path=None):
+        # -> [WorkUnit] of the outputs that need processing, with the
+        #    estimated costs (see plan.py), logged and saved to path as JSON
+        #    nothing is merged, converted or recorded to the state
+        p.stageSeconds, p.numFailedCommands = {}, 0
+        rates = {}  # (varName, outputType) -> historical rates
+        units = []
+        p._planning = True
+        try:
+            for p.initTime in p.initTimes:
+                for p.member in p.members:
+                    for p.variable in p.variables:
+                        for p.outputTypes, p.leads in p._getPhases():
+                            p.status = True
+                            p._getSrcPaths()
+                            p._getDesPaths()
+                            p._run_checkFileNeedUpdate()
+                            units.extend(p._getPlanUnits(rates))
+        finally:
+            p._planning = False
+
+        logPlan(units)
+        if path is not None:
+            savePlan(units, path)
+        return units
+
+    def _getPlanUnits(p, rates):
+        # -> [WorkUnit] of the outputs to update in the phase
+        outputTypes = p._getOutputTypesToUpdate()
+        if not outputTypes:
+            return []
+        mergeFrom = p._getMergeFrom()
+        srcPaths = p.srcPaths if mergeFrom is None else p._getSrcPathsFrom(mergeFrom)[0]
+        if not srcPaths:
+            logging.warning(f'  no source files to process {outputTypes}')
+            return []
+
+        # bytes to merge from the cached inventories, without scanning
+        srcBytes = 0
+        for srcPath in srcPaths:
+            inventory = p.grib2Index.get(srcPath, p.WGRIB2, scan=False)
+            if inventory is None:
+                srcBytes = None
+                break
+            srcBytes += sum(
+                r.length for r in uniqueRecords(inventory.match(p._getGrib2Match()))
+            )
+
+        units = []
+        for outputType in outputTypes:
+            key = (p.variable.varName, outputType)
+            if key not in rates:
+                rates[key] = {} if p.state is None else \
+                    p.state.getRates(p.modelName, *key)
+            rate = rates[key]
+
+            unit = WorkUnit(
+                *p._getUnitKey(outputType), p._updateReasons[outputType],
+                desPath=p.desPaths[outputType], numSrcFiles=len(srcPaths),
+            )
+            # the merge of the phase is shared by its outputs
+            if srcBytes is not None:
+                unit.srcBytes = srcBytes / len(outputTypes)
+            elif rate.get('srcBytesPerFile') is not None:
+                unit.srcBytes = rate['srcBytesPerFile'] * len(srcPaths) / len(outputTypes)
+            if rate.get('desBytesPerDay') is not None:
+                unit.desBytes = rate['desBytesPerDay'] * p._getExpectedLeadDays(outputType)
+            if None not in [rate.get('mergeSecondsPerFile'), rate.get('convertCpuSecondsPerFile')]:
+                unit.cpuSeconds = len(srcPaths) * (
+                    rate['mergeSecondsPerFile'] + rate['convertCpuSecondsPerFile']
+                )
+            units.append(unit)
+        return units
+
+    def _runParallel(p):
+        # the slices run in forked processes, each with its own temp and log files
+        global _processor
+        _processor = p
+        logging.info(f'running {len(p._slices)} slices with {p.workers} workers')
+
+        results = []
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=p.workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(_runSliceInWorker, iSlice): iSlice
+                for iSlice in range(len(p._slices))
+            }
+            for future in as_completed(futures):
+                name = p._getSliceName(*p._slices[futures[future]])
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f'slice {name} failed: {e!r}')
+                    result = _emptySliceResult(name)
+                # compressed by the pool of this process, while the workers go on
+                p._submitCompressions(result.pop('toCompress'))
+                results.append(result)
+                logging.info(
+                    f'[{len(results)}/{len(p._slices)}] {name}: ' +
+                    f'{'ok' if result['ok'] else 'FAILED'} in {result['seconds']:.1f} s' +
+                    f' (log: {p._getSliceLogFile(name)})'
+                )
+        return results
+
+    def _runSliceTask(p, initTime, member, variables):
+        # run one slice -> result = {name, ok, seconds, srcBytes, stages}
+        p.initTime, p.member, p.variable = initTime, member, variables[0]
+        name = p._getSliceName(initTime, member, variables)
+        p.sliceName = name
+        p.tempFile = f'{p.tempBase}.{name}'
+        p.writtenPaths = set()  # outputs to compress, shared with the fused jobs
+        p.toCompress = []  # (desPath, sliceName, unitKey, desStamp) of _run_compressNC
+        p.stageSeconds = {}
+        p.srcBytes = 0
+        p.numFailedCommands = 0
+        p.sliceFailed = False
+
+        startTime = time.time()
+        try:
+            if p.fused:
+                p._runFusedSlice(variables)
+            else:
+                p._logSliceHeader()
+                p._runSlice()
+        except Exception as e:
+            p.sliceFailed = True
+            logging.exception(f'slice {name} failed: {e!r}')
+        finally:
+            if os.path.exists(p.tempFile) and not p.debug:
+                os.remove(p.tempFile)  # cleanup
+
+        return {
+            'name': name,
+            'ok': not p.sliceFailed and p.numFailedCommands == 0,
+            'seconds': time.time() - startTime,
+            'srcBytes': p.srcBytes,
+            'stages': p.stageSeconds,
+            'toCompress': p.toCompress,
+        }
 
     def _runSlice(p):
         # 1. setup
@@ -116,40 +358,131 @@ class Processor:
         # 3. merge grib2 files
         # 4. convert to netCDF4
 
-        # for analysis output
-        if 'analysis' in p.variable.outputTypes:
-            p.outputTypes = ['analysis']
-            p.leads = [0]
+        # for analysis output, then for others
+        for p.outputTypes, p.leads in p._getPhases():
             p.status = True  # False if error has occured
-            p._getSrcPaths()
-            p._getDesPaths()
-            p._run_createDesDir()
-            p._run_checkFileNeedUpdate()
-            p._run_mergeGrib2()
-            p._run_grib2toNC()
-
-        # for others
-        p.outputTypes = [o for o in p.variable.outputTypes if o != 'analysis']
-        if p.outputTypes:
-            p.leads = p.variable.leads  # all leads
-            p.status = True
-            p._getSrcPaths()
-            p._getDesPaths()
-            p._run_createDesDir()
-            p._run_checkFileNeedUpdate()
-            p._run_mergeGrib2()
-            p._run_grib2toNC()
+            p._runStage('setup', p._getSrcPaths, p._getDesPaths, p._run_createDesDir)
+            p._runStage('checkUpdate', p._run_checkFileNeedUpdate)
+            p._runStage('mergeGrib2', p._run_mergeGrib2)
+            p._runStage('grib2toNC', p._run_grib2toNC)
+            p._runStage('recordState', p._run_recordState)
+            p.sliceFailed |= not p.status
 
         p.outputTypes = p.variable.outputTypes
         p._getDesPaths()
-        p._run_compressNC()
-        p._printDesFileSummary()
-
-        if os.path.exists(p.tempFile) and not p.debug:
-            os.remove(p.tempFile)  # cleanup
+        p._runStage('compressNC', p._run_compressNC)
+        p._runStage('summary', p._printDesFileSummary)
+
+    def _runFusedSlice(p, variables):
+        # all the variables of (initTime, member) in one pass:
+        # 1. setup and check need update for each (variable, phase) -> job
+        # 2. route the records of all the jobs from each source file at once
+        # 3. convert the jobs to netCDF4 concurrently
+        jobs = []
+        try:
+            for p.variable in variables:
+                p._logSliceHeader()
+                for outputTypes, leads in p._getPhases():
+                    job = copy.copy(p)
+                    job.outputTypes, job.leads = outputTypes, leads
+                    job.status = True
+                    job.numFailedCommands = 0
+                    job.tempFile = f'{p.tempFile}.{p.variable.varName}.{len(jobs)}'
+                    job._runStage('setup', job._getSrcPaths, job._getDesPaths, job._run_createDesDir)
+                    job._runStage('checkUpdate', job._run_checkFileNeedUpdate)
+                    jobs.append(job)
+
+            p._runStage('mergeGrib2', lambda: p._run_fusedMergeGrib2(jobs))
+
+            numThreads = max(1, min(len(jobs), p.cdoThreads))
+            for job in jobs:
+                job.cdoThreads = max(1, p.cdoThreads // numThreads)
+                if numThreads > 1:
+                    job.fp = _LogPrinter()
+            with ThreadPoolExecutor(max_workers=numThreads) as executor:
+                p._runStage('grib2toNC', lambda: list(
+                    executor.map(lambda job: job._run_grib2toNC(deferAppends=True), jobs)
+                ))
+            for job in jobs:
+                job.fp = p.fp
+                job._runStage('grib2toNC', job._run_appendParts)
+                job._runStage('recordState', job._run_recordState)
+
+            for p.variable in variables:
+                variableJobs = [job for job in jobs if job.variable is p.variable]
+                p.status = all(job.status for job in variableJobs)
+                p.outputTypes = p.variable.outputTypes
+                p._getDesPaths()
+                p._runStage('compressNC', p._run_compressNC)
+                p._runStage('summary', p._printDesFileSummary)
+        finally:
+            for job in jobs:
+                p.numFailedCommands += job.numFailedCommands
+                p.sliceFailed |= not job.status
+                if os.path.exists(job.tempFile) and not p.debug:
+                    os.remove(job.tempFile)  # cleanup
+
+    def _getPhases(p):
+        # -> [(outputTypes, leads)], analysis and the others are merged separately
+        phases = []
+        if 'analysis' in p.variable.outputTypes:
+            phases.append((['analysis'], [0]))
+        outputTypes = [o for o in p.variable.outputTypes if o != 'analysis']
+        if outputTypes:
+            phases.append((outputTypes, p.variable.leads))  # all leads
+        return phases
+
+    def _logSliceHeader(p):
+        logging.info(f'[[ {p.modelName} | E{p.member:03d} | {
+            tt.float2format(p.initTime, '%Y-%m-%d %Hz')
+        } | {p.variable.varName} ]]')
+
+    def _runStage(p, stage, *funcs):
+        startTime = time.time()
+        for func in funcs:
+            func()
+        p.stageSeconds[stage] = p.stageSeconds.get(stage, 0) + time.time() - startTime
+
+    def _getSliceName(p, initTime, member, variables):
+        name = f'{tt.float2format(initTime, '%Y%m%d%H')}.E{member:03d}'
+        if p.fused:
+            return name
+        return f'{name}.{variables[0].varName}'
+
+    def _getSliceLogFile(p, name):
+        return f'{p.logFile}.{name}'
+
+    def _printRunSummary(p, results, wallSeconds):
+        numFailed = sum(not r['ok'] for r in results)
+        sliceSeconds = sum(r['seconds'] for r in results)
+        srcMegaBytes = sum(r['srcBytes'] for r in results) / 1e6
+        stages = {}
+        for r in results:
+            for stage, seconds in r['stages'].items():
+                stages[stage] = stages.get(stage, 0) + seconds
+
+        wallSeconds = max(wallSeconds, 1e-9)
+        logging.info(
+            f'[[ summary ]] {len(results)} slices ({numFailed} failed) in {wallSeconds:.1f} s' +
+            f' with {p.workers} workers x cdo -P {p.cdoThreads} and {p.compressWorkers} compressing'
+        )
+        logging.info(
+            f'  throughput = {len(results) / wallSeconds * 60:.2f} slices/min, ' +
+            f'{srcMegaBytes / wallSeconds:.1f} MB/s of grib2 merged, ' +
+            f'concurrency = {sliceSeconds / wallSeconds:.2f}'
+        )
+        for stage, seconds in stages.items():
+            logging.info(
+                f'  {stage:<12s} total = {seconds:9.1f} s, ' +
+                f'mean = {seconds / max(len(results), 1):7.2f} s/slice, ' +
+                f'{seconds / max(sliceSeconds, 1e-9) * 100:5.1f} %'
+            )
+        for r in results:
+            if not r['ok']:
+                logging.info(f'  failed: {r['name']}')
 
     def _runCommand(p, command, printCommand=False, flushCommand=True, printResult=False,
-                    sendToBackground=False, formatCommand='{}', formatResult='{}'
+                    formatCommand='{}', formatResult='{}'
                     ):
         if not p.status:  # don't do anything if error has occured
             return 1, None
@@ -159,19 +492,13 @@ class Processor:
         elif flushCommand:
             p.fp.flushPrint(formatCommand.format(command))
 
-        if sendToBackground:
-            subprocess.Popen(
-                command.split(), 
-                stdout=subprocess.DEVNULL,
-            )
-            return 0, None
-
         status, result = subprocess.getstatusoutput(command)
 
         if printResult:
             p.fp.print(formatResult.format(result))
 
         if status != 0:
+            p.numFailedCommands += 1
             p.fp.print('')
             logging.info(command)
             logging.error(result)
@@ -186,11 +513,20 @@ class Processor:
 
     def _run_checkFileNeedUpdate(p):
         # 1. is any file missing?
-        # 2. TODO: is any file incomplete?
+        # 2. is it recorded as completed with the same source files?
+        # 3. is any file incomplete?
+        p._converted = {}
+        p._partPaths = {}  # outputType -> part file to append
+        p._convertSeconds = {}
         if not p.status:
             return
 
         p._filesNeedUpdate = {key: True for key in p.outputTypes}
+        p._appendFrom = {key: None for key in p.outputTypes}  # None: rebuild
+        p._updateReasons = {key: 'forced' for key in p.outputTypes}
+        if p.state is not None:
+            p.srcFingerprint = sourceFingerprint(p.srcPaths)
+            p.numSrcFiles = len(p.srcPaths)
 
         if p.forceUpdate:
             logging.info('[[    Force updating all files.    ]]')
@@ -201,6 +537,16 @@ class Processor:
 
             if not os.path.exists(desPath):
                 p._filesNeedUpdate[p.outputType] = True
+                p._updateReasons[p.outputType] = 'missing'
+                continue
+
+            unit = None if p.state is None else p.state.lookup(p._getUnitKey(p.outputType))
+            if unit is not None and unit.isCurrent(desPath, p.srcFingerprint):
+                logging.info(
+                    f'  skipping {p.outputType} because it is recorded as completed: ' +
+                    f'valid = {unit.leadDays}.'
+                )
+                p._filesNeedUpdate[p.outputType] = False
                 continue
 
             summary = p._getDesFileSummary()
@@ -208,42 +554,34 @@ class Processor:
                 logging.info(
                     f'updating {p.outputType} because the VARNAME is not found.')
                 p._filesNeedUpdate[p.outputType] = True
+                p._updateReasons[p.outputType] = 'noVariable'
                 continue
 
             if len(summary['time']) == 0:
                 logging.info(
                     f'updating {p.outputType} because "time" is not found.')
                 p._filesNeedUpdate[p.outputType] = True
+                p._updateReasons[p.outputType] = 'noTime'
                 continue
 
             time = summary['time']
-            if p.leads:
-                maxPossibleValidDays = (p.leads[-1]+p.variable.shiftHour) / 24
-            else:
-                maxPossibleValidDays = p.variable.shiftHour/24
-
-            existingLeadDays = time[-1] - p.initTime
-
-            p.variable._getCdoOperators()
-            expectedLeadDays = p.variable.cdoOperators[p.outputType]['maxValidDays']
-            if expectedLeadDays == -1:
-                # take the maximum possible from the src files
-                expectedLeadDays = maxPossibleValidDays
-            else:
-                expectedLeadDays += p.variable.shiftHour/24
-
-            if expectedLeadDays > maxPossibleValidDays:  
-                expectedLeadDays = maxPossibleValidDays
-
-            existingLeadDays = ceil(existingLeadDays)
-            expectedLeadDays = ceil(expectedLeadDays)
+            existingLeadDays = ceil(time[-1] - p.initTime)
+            expectedLeadDays = p._getExpectedLeadDays(p.outputType)
 
             if existingLeadDays < expectedLeadDays:
                 p._filesNeedUpdate[p.outputType] = True
+                p._updateReasons[p.outputType] = 'incomplete'
                 logging.info(
                     f'  updating {p.outputType} because the file is incomplete: ' +
                     f'(expected, existing) = ({expectedLeadDays}, {existingLeadDays}).'
                 )
+                if p.incremental and p.outputType != 'analysis':
+                    # the last day may be partial, so it is converted again
+                    p._appendFrom[p.outputType] = floor(time[-1] + 1e-6)
+                    logging.info(
+                        f'  appending to {p.outputType} from ' +
+                        f'{tt.float2format(p._appendFrom[p.outputType], '%Y-%m-%d')}'
+                    )
                 continue
 
             logging.info(
@@ -251,59 +589,88 @@ class Processor:
                 f'valid = {existingLeadDays}.'
             )
             p._filesNeedUpdate[p.outputType] = False
+            p._recordDone(p.outputType, time, 'checkUpdate')
+
+    def _getExpectedLeadDays(p, outputType):
+        # -> valid days of a completed output from the existing source files
+        if p.leads:
+            maxPossibleValidDays = (p.leads[-1]+p.variable.shiftHour) / 24
+        else:
+            maxPossibleValidDays = p.variable.shiftHour/24
+
+        p.variable._getCdoOperators()
+        expectedLeadDays = p.variable.cdoOperators[outputType]['maxValidDays']
+        if expectedLeadDays == -1:
+            # take the maximum possible from the src files
+            expectedLeadDays = maxPossibleValidDays
+        else:
+            expectedLeadDays += p.variable.shiftHour/24
+
+        if expectedLeadDays > maxPossibleValidDays:  
+            expectedLeadDays = maxPossibleValidDays
+        return ceil(expectedLeadDays)
 
     def _run_mergeGrib2(p):
         # 1. remove tempFile
         # 2. locate the records to extract from the grib2 file
-        # 3. append to the tempFile (merge)
-        def getCommandGrib2Match(srcPath):
-            command = f'{
-                p.WGRIB2} -match "({'|'.join(p.variable.grib2Matches)})"'
-            command += f' {srcPath}'
-            return command
-
-        def getRecordNumbers(srcPath):
-            # use wgrib2 to locate the grib2 keys
-            status, output = p._runCommand(getCommandGrib2Match(srcPath))
-
-            if status != 0 or output is None:
+        # 3. append to the tempFile (merge) by byte range
+        startTime = time.time()
+        p._run_locateGrib2Records()
+        for srcPath, records in zip(p.srcPaths, p.recordLists):
+            p.srcBytes += appendRecords(srcPath, records, p.tempFile)
+        p._recordMergeSeconds(time.time() - startTime)
+
+    def _run_fusedMergeGrib2(p, jobs):
+        # one pass over each source file, routing the records to the tempFile
+        # of each job, in the order of (lead, fileNameKey)
+        startTime = time.time()
+        routes = {}  # srcPath -> [sortKey, [(records, tempFile)]]
+        for job in jobs:
+            job._run_locateGrib2Records()
+            for srcPath, sortKey, records in zip(job.srcPaths, job.srcSortKeys, job.recordLists):
+                route = routes.setdefault(srcPath, [sortKey, []])
+                route[1].append((records, job.tempFile))
+
+        for srcPath, (__, route) in sorted(routes.items(), key=lambda item: item[1][0]):
+            p.srcBytes += routeRecords(srcPath, route)
+
+        # the merge is shared by the outputs of all the jobs
+        seconds = time.time() - startTime
+        numOutputs = sum(len(job._getOutputTypesToUpdate()) for job in jobs if job.status)
+        for job in jobs:
+            job._recordMergeSeconds(seconds, numOutputs)
+
+    def _getGrib2Match(p):
+        return f'({'|'.join(p.variable.grib2Matches)})'
+
+    def _run_locateGrib2Records(p):
+        # -> p.recordLists, the records to extract of each source file
+        def getRecords(srcPath):
+            # match the grib2 keys against the (cached) inventory of wgrib2 -s
+            if not p.status:
+                return []
+            inventory = p.grib2Index.get(srcPath, p.WGRIB2)
+            if inventory is None:
+                p.numFailedCommands += 1
+                logging.error(f'unable to read the grib2 inventory of {srcPath}')
                 return []  # error output
 
-            lines = output.split('\n')
-            records = [r for r in lines if r != '' and r[:8] != 'Warning:']
-            # somehow an empty string can be returned from wgrib2..
-            # remove the warning as well
-
             # check if there are duplicate records
-            # by removing the wgrib2 record number and byte size -> [2:]
             # (because prec in TGFS 0-6h are duplicated,
             #  and messed up the counting...)
-            splittedRecords = [r.split(':')[2:] for r in records]
-
-            iUniqueRecords = [
-                i for i, c, in enumerate(splittedRecords)
-                if c not in splittedRecords[i+1:]
-            ]   # finding the unique record and get the index
-            return [
-                records[i].split(':')[0] for i in iUniqueRecords
-            ]   # get the record number from wgrib2 -> [0]
-
-        def appendRecords(srcPath, recNums):
-            command = f'{
-                p.WGRIB2} -match "^({'|'.join([f'{n}:' for n in recNums])})"'
-            command += f' {srcPath} -append -grib {p.tempFile}'
-            p._runCommand(command)
+            return uniqueRecords(inventory.match(p._getGrib2Match()))
 
         def reportWrongNumRecords():
             expected = p.variable.numRecordsPerFile
-            encountered = len(recNums)
-            p.fp.print(getCommandGrib2Match(srcPath))
+            encountered = len(records)
+            p.fp.print(f'{p.WGRIB2} -match "{p._getGrib2Match()}" {srcPath}')
             logging.warning(
                 f'Expecting {expected} records ' +
                 f'but found {encountered} in {srcPath}'
             )
 
         # =================================== #
+        p.recordLists = []
         if not p.status:
             return
 
@@ -315,29 +682,39 @@ class Processor:
         if os.path.isfile(p.tempFile):
             os.remove(p.tempFile)
 
+        # incremental: only the leads valid from the earliest day to append
+        mergeFrom = p._getMergeFrom()
+        if mergeFrom is not None:
+            p.srcPaths, p.srcSortKeys = p._getSrcPathsFrom(mergeFrom)
+            logging.info(f'  merging {len(p.srcPaths)} new source files')
+
         # 2. locate the records to extract from the grib2 file
-        recordNumbers = []
         for srcPath in p.srcPaths:
-            recNums = getRecordNumbers(srcPath)
-            if p.variable.numRecordsPerFile != len(recNums):
+            records = getRecords(srcPath)
+            if p.variable.numRecordsPerFile != len(records):
                 reportWrongNumRecords()
                 break
-            recordNumbers.append(recNums)
+            p.recordLists.append(records)
 
-        if len(recordNumbers) == 0:
+        if len(p.recordLists) == 0:
             p.status = False
             logging.error('no records are retreived.')
 
-        # 3. append to the tempFile (merge)
-        for srcPath, recNums in zip(p.srcPaths, recordNumbers):
-            appendRecords(srcPath, recNums)
+        for outputType in p._getOutputTypesToUpdate():
+            p._recordState(
+                outputType, 'running' if p.status else 'failed', stage='mergeGrib2',
+                srcBytes=sum(r.length for records in p.recordLists for r in records),
+                numMergedFiles=len(p.recordLists),
+                message=None if p.status else 'no records are retreived',
+            )
 
-    def _run_grib2toNC(p):
-        def getCdoCommand(outputType):
-            desPath = p.desPaths[outputType]
+    def _run_grib2toNC(p, deferAppends=False):
+        # deferAppends: the part files of the incremental outputs are left
+        # for _run_appendParts, so that only cdo runs in the fused threads
+        def getCdoCommand(outputType, desPath):
             operator = operator2string(p.variable.cdoOperators[outputType])
 
-            command = f'{p.CDO} -f nc4 {operator} -setgrid,{p.gridFile}'
+            command = f'{p.CDO} -P {p.cdoThreads} -f nc4 {operator} -setgrid,{p.gridFile}'
 
             # cdo cannot combine analysis and forecast
             command += f' {p.tempFile} {desPath}'
@@ -362,20 +739,179 @@ class Processor:
                 continue
 
             p.variable._getCdoOperators()
-            command = getCdoCommand(outputType)
+            appendFrom = p._appendFrom[outputType]
+            if appendFrom is None:
+                desPath = p.desPaths[outputType]
+            else:  # convert the new leads, then append to the existing output
+                desPath = f'{p.tempFile}.{outputType}.nc'
+            command = getCdoCommand(outputType, desPath)
+            startTime = time.time()
             status, __ = p._runCommand(command)
-            if status == 0:
-                p.fp.flushPrint('')
-                logging.info(f'  ok: {outputType}')
+            p._convertSeconds[outputType] = time.time() - startTime
+            if status == 0 and appendFrom is not None:
+                p._partPaths[outputType] = desPath
+            else:
+                p._finishConversion(outputType, status, desPath)
+                if appendFrom is not None and os.path.exists(desPath) and not p.debug:
+                    os.remove(desPath)  # a partial part file of the failed cdo
+
+        if not deferAppends:
+            p._run_appendParts()
+
+    def _run_appendParts(p):
+        # append the part files to the outputs one at a time,
+        # netCDF-C/HDF5 are not thread-safe
+        for outputType, partPath in p._partPaths.items():
+            startTime = time.time()
+            status = p._appendToDesFile(outputType, partPath, p._appendFrom[outputType])
+            p._convertSeconds[outputType] += time.time() - startTime
+            p._finishConversion(outputType, status, p.desPaths[outputType])
+        p._partPaths = {}
+
+    def _finishConversion(p, outputType, status, desPath):
+        p._converted[outputType] = status == 0
+        if status == 0:
+            p.writtenPaths.add(p.desPaths[outputType])
+        p._recordState(
+            outputType, 'converted' if status == 0 else 'failed', stage='grib2toNC',
+            convertSeconds=p._convertSeconds[outputType], cdoThreads=p.cdoThreads,
+            message=None if status == 0 else f'failed to convert to {desPath}',
+        )
+        if status == 0:
+            p.fp.flushPrint('')
+            logging.info(f'  ok: {outputType}')
+
+    def _run_recordState(p):
+        # record the converted outputs as done, with their lead coverage
+        if p.state is None:
+            return
+        for p.outputType, converted in p._converted.items():
+            if converted:
+                p._recordDone(p.outputType, p._getDesFileSummary()['time'], 'recordState')
+
+    def _getUnitKey(p, outputType):
+        return (p.modelName, p.initTime, p.member, p.variable.varName, outputType)
+
+    def _getOutputTypesToUpdate(p):
+        return [key for key in p.desPaths if p._filesNeedUpdate[key]]
+
+    def _recordState(p, outputType, status=None, **values):
+        # one transaction on the state of the output, if recorded
+        if p.state is None or p._planning:
+            return
+        if status is not None:
+            values['status'] = status
+        p.state.update(p._getUnitKey(outputType), desPath=p.desPaths[outputType], **values)
+
+    def _recordMergeSeconds(p, seconds, numOutputs=None):
+        # the merge of a phase is shared by its outputs to update
+        if not p.status or p.state is None:
+            return
+        outputTypes = p._getOutputTypesToUpdate()
+        for outputType in outputTypes:
+            p._recordState(outputType, mergeSeconds=seconds / (numOutputs or len(outputTypes)))
+
+    def _recordDone(p, outputType, times, stage):
+        if p.state is None or len(times) == 0:
+            return
+        desMtime, desSize = fileStamp(p.desPaths[outputType])
+        p._recordState(
+            outputType, 'done', stage=stage,
+            numTimes=len(times),
+            lastTime=float(times[-1]),
+            leadDays=ceil(times[-1] - p.initTime),
+            srcFingerprint=p.srcFingerprint,
+            numSrcFiles=p.numSrcFiles,
+            desMtime=desMtime,
+            desSize=desSize,
+            message=None,
+        )
+
+    def _getSrcPathsFrom(p, day):
+        # -> srcPaths, srcSortKeys of the leads valid from day on
+        isNew = [
+            p.initTime + (lead + p.variable.shiftHour)/24 >= day - 1e-6
+            for lead, __ in p.srcSortKeys
+        ]
+        return (
+            [path for path, new in zip(p.srcPaths, isNew) if new],
+            [key for key, new in zip(p.srcSortKeys, isNew) if new],
+        )
+
+    def _getMergeFrom(p):
+        # -> the earliest day to append among the outputs to update,
+        #    None if any of them is rebuilt from all the leads
+        appendFroms = [p._appendFrom[key] for key in p._getOutputTypesToUpdate()]
+        if not appendFroms or None in appendFroms:
+            return None
+        return min(appendFroms)
+
+    def _appendToDesFile(p, outputType, partPath, appendFrom):
+        # -> 0 if the steps of partPath are appended to the output, 1 otherwise
+        desPath = p.desPaths[outputType]
+        try:
+            numSteps = _appendTimeSteps(desPath, partPath, appendFrom)
+        except Exception as e:
+            p.numFailedCommands += 1
+            logging.error(f'  failed to append to {desPath}: {e}')
+            return 1
+        finally:
+            if os.path.exists(partPath) and not p.debug:
+                os.remove(partPath)
+        logging.info(f'  appended {numSteps} steps to {outputType}')
+        return 0
 
     def _run_compressNC(p):
-        def getCommand(desPath):
-            return f'{p.NC_COMPRESS} {desPath} -1'
-        if not p.status:
+        # queue the outputs written in the slice, they are compressed by the
+        # pool of the main process once the slice is completed (see run)
+        if not p.status or p.compressWorkers == 0:
             return
-        for __, desPath in p.desPaths.items():
-            if os.path.exists(desPath):
-                p._runCommand(getCommand(desPath), sendToBackground=True, flushCommand=False)
+        for outputType, desPath in p.desPaths.items():
+            if desPath in p.writtenPaths and os.path.exists(desPath):
+                p.toCompress.append(
+                    (desPath, p.sliceName, p._getUnitKey(outputType), fileStamp(desPath))
+                )
+
+    def _submitCompressions(p, toCompress):
+        for desPath, sliceName, key, desStamp in toCompress:
+            future = p._getCompressPool().submit(
+                nct.compress, desPath, p.complevel, p.shuffle, p.chunkSizes
+            )
+            p._compressions[desPath] = (future, sliceName, key, desStamp)
+
+    def _getCompressPool(p):
+        # the pool of the main process, not of the forked workers inheriting p.
+        # Not forked: the main process already runs the threads of the slice pool
+        if p._compressPid != os.getpid():
+            p._compressPid = os.getpid()
+            p._compressions = {}  # desPath -> (future, sliceName, unitKey, desStamp)
+            p._compressPool = ProcessPoolExecutor(
+                max_workers=p.compressWorkers,
+                mp_context=multiprocessing.get_context('forkserver'),
+            )
+        return p._compressPool
+
+    def _finishCompressions(p):
+        # wait for all the compressions and stop the pool, the new (mtime, size)
+        # of the outputs recorded as done are recorded
+        # -> names of the slices with failed compressions
+        if p._compressPid == os.getpid():
+            for desPath, (future, sliceName, key, desStamp) in p._compressions.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    p._compressFailures.add(sliceName)
+                    logging.error(f'  failed to compress {desPath}: {e!r}')
+                    continue
+
+                unit = None if p.state is None else p.state.lookup(key)
+                if unit is not None and unit.status == 'done' and unit.desStamp == desStamp:
+                    desMtime, desSize = fileStamp(desPath)
+                    p.state.update(key, desMtime=desMtime, desSize=desSize)
+            p._compressPool.shutdown()
+            p._compressPid = None
+        failedSlices, p._compressFailures = p._compressFailures, set()
+        return failedSlices
 
     def _getDesFileSummary(p):
         desPath = p.desPaths[p.outputType]
@@ -428,20 +964,12 @@ class Processor:
 
             return summary
         
-        # because an HDF error can occur if the file may is
-        # being processed by nc_compress simultaneously
-        iTry, maxNTry = 0, 50
-        while iTry < maxNTry:
-            try:
-                return getSummary(emptySummary)
-            except:
-                time.sleep(0.1)
-                iTry+=1
-
-        # failed
-        p.status = False
-        logging.error(f'  failed to get file summary for {desPath}')
-        return emptySummary
+        try:
+            return getSummary(emptySummary)
+        except Exception as e:
+            p.status = False
+            logging.error(f'  failed to get file summary for {desPath}: {e!r}')
+            return emptySummary
 
     def _printDesFileSummary(p):
         if not p.printDesSummary or not p.status:
@@ -501,10 +1029,10 @@ class Processor:
             return p.rootSrcDir + '/' + p.modelName + '/' + \
                 p.filePath(p.initTime, p.member, lead, fileNameKey)
         
-        srcPaths, leads = [], []
+        srcPaths, srcSortKeys, leads = [], [], []
         stopLoop = False
         for lead in p.leads:
-            for fileNameKey in p.variable.fileNameKeys:
+            for iKey, fileNameKey in enumerate(p.variable.fileNameKeys):
                 srcPath = getSrcPath(lead, fileNameKey)
                 if not os.path.exists(srcPath):
                     logging.warning(f'src file path not found: {lead=} {fileNameKey=}')
@@ -512,6 +1040,7 @@ class Processor:
                     stopLoop=True
                     break
                 srcPaths.append(srcPath)
+                srcSortKeys.append((lead, iKey))
                 # couting the existing leads by srcfiles 
                 # to determine if updating the output makes sense
                 if lead not in leads:
@@ -522,6 +1051,7 @@ class Processor:
         
         p.leads = leads
         p.srcPaths = srcPaths
+        p.srcSortKeys = srcSortKeys
 
     def _getDesPaths(p):
         p.desPaths = {
@@ -535,6 +1065,106 @@ class Processor:
 
 
 
+# ---- incremental append
+_DAYS_PER_TIME_UNIT = {
+    'second': 1/86400, 'seconds': 1/86400,
+    'minute': 1/1440, 'minutes': 1/1440,
+    'hour': 1/24, 'hours': 1/24,
+    'day': 1, 'days': 1,
+}
+
+
+def _appendTimeSteps(desPath, partPath, cutTime, timeName='time'):
+    # replace the steps of desPath valid from cutTime (days) on by those of
+    # partPath along the unlimited time dimension, on a copy that is renamed
+    # over desPath once completed -> number of steps written
+    tempPath = f'{desPath}.append.{os.getpid()}'
+    shutil.copyfile(desPath, tempPath)
+    try:
+        with nc.Dataset(tempPath, 'a') as des, nc.Dataset(partPath, 'r') as part:
+            if timeName not in des.dimensions or not des.dimensions[timeName].isunlimited():
+                raise ValueError(f'"{timeName}" is not an unlimited dimension of {desPath}')
+
+            desTimes = nct.ncreadtime(desPath, timeName, hFile=des)
+            partTimes = nct.ncreadtime(partPath, timeName, hFile=part)
+            numKeep = int(np.sum(desTimes < cutTime - 1e-6))
+            iStart = int(np.sum(partTimes < cutTime - 1e-6))
+            numNew = len(partTimes) - iStart
+            if numKeep + numNew < len(desTimes):
+                raise ValueError(
+                    f'{numNew} new steps cannot replace the last ' +
+                    f'{len(desTimes) - numKeep} steps of {desPath}'
+                )
+
+            # time and its bounds are written in the units of the output
+            timeVarNames = [timeName, getattr(des[timeName], 'bounds', None)]
+            desUnits = des[timeName].units
+            partUnits = part[timeName].units
+            for varName, var in part.variables.items():
+                if not var.dimensions or var.dimensions[0] != timeName:
+                    continue
+                if varName not in des.variables:
+                    raise ValueError(f'{varName} is not found in {desPath}')
+                values = var[iStart:]
+                if varName in timeVarNames and partUnits != desUnits:
+                    values = _recodeTime(values, partUnits, desUnits)
+                des[varName][numKeep:numKeep + numNew] = values
+        os.replace(tempPath, desPath)
+    finally:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+    return numNew
+
+
+def _recodeTime(values, fromUnits, toUnits):
+    fromDelta, fromOrigin = nct._parseTimeUnits(fromUnits)
+    toDelta, toOrigin = nct._parseTimeUnits(toUnits)
+    if fromDelta not in _DAYS_PER_TIME_UNIT or toDelta not in _DAYS_PER_TIME_UNIT:
+        raise ValueError(f'unable to convert time from "{fromUnits}" to "{toUnits}"')
+    days = fromOrigin + np.asarray(values, dtype=np.float64) * _DAYS_PER_TIME_UNIT[fromDelta]
+    return (days - toOrigin) / _DAYS_PER_TIME_UNIT[toDelta]
+
+
+# ---- parallel slices
+_processor = None  # the Processor inherited by the forked workers
+
+
+def _runSliceInWorker(iSlice):
+    p = _processor
+    initTime, member, variable = p._slices[iSlice]
+    name = p._getSliceName(initTime, member, variable)
+
+    # per-slice log file, and no progress printing from the workers
+    rootLogger = logging.getLogger()
+    formatter = rootLogger.handlers[0].formatter if rootLogger.handlers else None
+    for handler in rootLogger.handlers[:]:
+        rootLogger.removeHandler(handler)
+        handler.close()
+    handler = logging.FileHandler(p._getSliceLogFile(name))
+    handler.setFormatter(formatter)
+    rootLogger.addHandler(handler)
+    p.fp = _LogPrinter()
+
+    return p._runSliceTask(initTime, member, variable)
+
+
+def _emptySliceResult(name):
+    return {'name': name, 'ok': False, 'seconds': 0, 'srcBytes': 0, 'stages': {}, 'toCompress': []}
+
+
+class _LogPrinter:
+    # FlushPrinter for the workers: prints go to the log, flushes are dropped
+    def print(s, string='', **kwArgs):
+        if string:
+            logging.info(string)
+
+    def flushPrint(s, string=''):
+        pass
+
+    def flush(s, string=''):
+        pass
+
+
 class Variable:
     def __init__(v, varName, leads, outputTypes, grib2Matches, numRecordsPerFile=1,
                  cdoVarName='', shiftHour=0, multiplyConstant=1, addConstant=0, fileNameKeys=['']):
@@ -2,7 +2,7 @@
 2024/12
 This is a module for reading the processed model data
 '''
-from ..caltools import interp_1d
+from ..caltools import interp_2d, subtractClim
 from ..plottools import FlushPrinter as Fp
 from .. import timetools as tt
 from ..readtools.readtools import readw2g
@@ -65,7 +65,7 @@ def example():
                 climYears, climType,
             )
 
-def readTotal(modelName, varName, minMaxs, initList, memberList):
+def readTotal(modelName, varName, minMaxs, initList, memberList, dtype=None):
     '''
     minMaxs = [
         minMaxLead,
@@ -75,6 +75,7 @@ def readTotal(modelName, varName, minMaxs, initList, memberList):
     ]
     -> var = var[member, init, lead, (z,), y, x]
     -> dims = [member, init, lead, (z,), y, x]
+    dtype of var defaults to the dtype on disk (as a floating type)
     '''
     def getFileName():
         year, month = tt.year(initDate), tt.month(initDate)
@@ -129,7 +130,8 @@ def readTotal(modelName, varName, minMaxs, initList, memberList):
 
             if not isInitilized:
                 var, dims = _initilizeOutput(
-                    dimSlice, numMembers, numInits, numDims, leadList
+                    dimSlice, numMembers, numInits, numDims, leadList,
+                    varSlice.dtype if dtype is None else dtype
                 )
                 isInitilized = True
 
@@ -139,7 +141,7 @@ def readTotal(modelName, varName, minMaxs, initList, memberList):
 
 
 def readModelClim(modelName, varName, minMaxs, initList, memberList,
-                  climYears=[2006, 2020], climType='5dma'):
+                  climYears=[2006, 2020], climType='5dma', dtype=None):
     '''
     minMaxs = [
         minMaxLead,
@@ -157,6 +159,7 @@ def readModelClim(modelName, varName, minMaxs, initList, memberList,
 
     -> var = var[member, init, lead, (z,), y, x]
     -> dims = [member, init, lead, (z,), y, x]
+    dtype of var defaults to the dtype on disk (as a floating type)
     '''
     def getFileName():
         strClimYears = '_'.join([str(y) for y in climYears])
@@ -223,7 +226,8 @@ def readModelClim(modelName, varName, minMaxs, initList, memberList,
 
             if not isInitilized:
                 var, dims = _initilizeOutput(
-                    dimSlice, numMembers, numInits, numDims, leadList
+                    dimSlice, numMembers, numInits, numDims, leadList,
+                    varSlice.dtype if dtype is None else dtype
                 )
                 isInitilized = True
 
@@ -271,24 +275,15 @@ def readModelAnomaly(
     # ---- interpolation ---- #
     lonClim, latClim = dimClim[-1], dimClim[-2]
     lonTotal, latTotal = dimTotal[-1], dimTotal[-2]
-    varClim = interp_1d(lonClim, varClim, lonTotal,
-                        axis=-1, extrapolate=True)
-    varClim = interp_1d(latClim, varClim, latTotal,
-                        axis=-2, extrapolate=True)
+    varClim = interp_2d(lonClim, latClim, varClim, lonTotal, latTotal,
+                        extrapolate=True)
     
     # ---- interpolate and subtract the climatology ---- #
     if climData == 'obs': 
         # subtraction
-        leads = dimTotal[0]
-        timeClim = dimClim[0]
-        timeClim = [tt.dayOfClim(t) for t in timeClim]
-        varAnomaly = varTotal
-        varClim = np.tile(varClim, (1 for __ in range(varTotal.ndim)))
-        for iInit, init in enumerate(initList):
-            for iLead, lead in enumerate(leads):
-                valid = tt.dayOfClim(float(np.floor(init + lead)))
-                iClim = timeClim.index(valid)
-                varAnomaly[:, iInit, iLead, :] -= np.squeeze(varClim[:, :, iClim, :])
+        valids = np.floor(np.add.outer(initList, dimTotal[0]))  # [init, lead]
+        iClims = tt.dayOfClimIndexArray(valids, dimClim[0])
+        varAnomaly = subtractClim(varTotal, varClim, iClims, inplace=True)
 
     elif climData == 'model':
         varAnomaly = varTotal - varClim
@@ -311,21 +306,13 @@ def readTotalBiasCorrected(
     # interpolation
     lonClim, latClim = dimClim[-1], dimClim[-2]
     lonAnomaly, latAnomaly = dimAnomaly[-1], dimAnomaly[-2]
-    varClim = interp_1d(lonClim, varClim, lonAnomaly,
-                        axis=-1, extrapolate=True)
-    varClim = interp_1d(latClim, varClim, latAnomaly,
-                        axis=-2, extrapolate=True)
+    varClim = interp_2d(lonClim, latClim, varClim, lonAnomaly, latAnomaly,
+                        extrapolate=True)
     # subtraction
-    leads = dimAnomaly[0]
-    timeClim = dimClim[0]
-    timeClim = [tt.dayOfClim(t) for t in timeClim]
+    valids = np.floor(np.add.outer(initList, dimAnomaly[0]))  # [init, lead]
+    iClims = tt.dayOfClimIndexArray(valids, dimClim[0])
     varTotal = varAnomaly
-    varClim = np.tile(varClim, (1 for __ in range(varTotal.ndim)))
-    for iInit, init in enumerate(initList):
-        for iLead, lead in enumerate(leads):
-            valid = tt.dayOfClim(float(np.floor(init + lead)))
-            iClim = timeClim.index(valid)
-            varTotal[:, iInit, iLead, :] += np.squeeze(varClim[:, :, iClim, :])
+    varTotal += varClim[iClims]
 
     return varTotal, dimAnomaly, varAnomaly
     
@@ -370,7 +357,7 @@ def _printWarningNumLead(fp, numLeads, numLeadSlice, strThisFile):
           )
 
 
-def _initilizeOutput(dimSlice, numMembers, numInits, numDims, lead):
+def _initilizeOutput(dimSlice, numMembers, numInits, numDims, lead, dtype):
 
     lon, lat = dimSlice[-1], dimSlice[-2]
     nx, ny, numLeads = len(lon), len(lat), len(lead)
@@ -385,7 +372,8 @@ def _initilizeOutput(dimSlice, numMembers, numInits, numDims, lead):
         varShape = (numMembers, numInits, numLeads, nz, ny, nx)
         dims = [lead, lev, lat, lon]
 
-    var = np.nan * np.ones(varShape)
+    # NaN for the missing files and leads, which are known only while reading
+    var = np.full(varShape, np.nan, dtype=np.result_type(dtype, np.float32))
     return var, dims
 
 
@@ -1,3 +1,5 @@
 from . import readAnomaly
 from . import readTotal
 from . import readModelClim
+from . import ensembleCube
+from . import readStats
@@ -1,7 +1,11 @@
-from ..nctools import getVarNames, getVarShape, ncreadByDimRange, getDimNames
+from ..nctools import ncreadByDimRange
+from .. import climcache
+from .. import ncindex
 from .. import timetools as tt
 from dataclasses import dataclass, field
+import numpy as np
 import os
+import warnings
 
 
 def checkNDim(dataType, varName, inquiredNDim):
@@ -15,6 +19,43 @@ def checkNDim(dataType, varName, inquiredNDim):
     return False
 
 
+def getDtype(modelFiles):
+    # -> dtype on disk of the first readable file, as a floating type for NaN
+    for file in modelFiles:
+        if not file.skip:
+            return np.result_type(file.meta.getVarDtype(file.ncVarName), np.float32)
+    return np.float64
+
+
+def normalizeUnits(varName, data):
+    # harmonize the units of the data read from one file, in place if floating
+    normalize = UNIT_NORMALIZERS.get(varName)
+    if normalize is None or data is None:
+        return data
+    if not np.issubdtype(data.dtype, np.floating):
+        data = data.astype(np.result_type(data.dtype, np.float32))
+    normalize(data)
+    return data
+
+
+def _normalizeMslp(data):
+    # -> hPa for each field [..., y, x], some models are in Pa :((
+    fieldMean = data.mean(axis=(-1, -2), keepdims=True)[..., 0, 0]
+    hasNan = np.isnan(fieldMean)
+    if hasNan.any():
+        with warnings.catch_warnings():  # all-NaN fields are left as they are
+            warnings.simplefilter('ignore', RuntimeWarning)
+            fieldMean[hasNan] = np.nanmean(data[hasNan], axis=(-1, -2))
+    data[fieldMean > 1000 * 50] /= 100
+    data[fieldMean < 1000 / 50] *= 100  # GEPSv3 :((
+
+
+# varName -> func(data) normalizing the units in place, applied to each file
+UNIT_NORMALIZERS = {
+    'mslp': _normalizeMslp,
+}
+
+
 def _getValidNDims(dataType, varName):
     varNames4d = ['u', 'v', 'w', 't', 'q', 'r', 'z', 'vp', 'sf', 'uqx', 'vqy', 'wqp']
     varNames3d = ['u10', 'v10', 't2m', 'pw', 'mslp', 'olr', 'prec']
@@ -58,6 +99,7 @@ class ModelFileParent:
     varShape: any = field(init=False)
     path: str = field(init=False)
     skip: bool = field(init=False)
+    meta: any = field(init=False, default=None, repr=False)  # ncindex.NcFileMeta
 
     def __post_init__(s):
         s.postInit()
@@ -72,6 +114,7 @@ class ModelFileParent:
         s.getPath()
         s.skip = False
         s.skip = s._checkFileExists()
+        s._loadMeta()
         s.skip = s._checkVarName()
         s.varShape = s._getVarShape()
     
@@ -88,9 +131,9 @@ class ModelFileParent:
 
         data, dims = ncreadByDimRange(
             s.path, s.ncVarName, s._minMaxsLead2Valid(minMaxs),
-            decodeTime=(s.dataType != 'analysis')
+            decodeTime=(s.dataType != 'analysis'), meta=s.meta
         )
-        return data, dims
+        return normalizeUnits(s.varName, data), dims
 
 
     def getDimValues(s, minMaxs):
@@ -98,7 +141,7 @@ class ModelFileParent:
             return None
 
         dimValues = []
-        for (minMax, dimName) in zip(minMaxs, getDimNames(s.path, s.ncVarName)):
+        for (minMax, dimName) in zip(minMaxs, s.meta.getDimNames(s.ncVarName)):
             dimValues.append(s._readDimValue(dimName, minMax))
 
         return dimValues
@@ -114,7 +157,7 @@ class ModelFileParent:
             dimRange = minMax
         
         __, dimValue = ncreadByDimRange(
-            s.path, dimName, [dimRange], decodeTime=decodeTime
+            s.path, dimName, [dimRange], decodeTime=decodeTime, meta=s.meta
         )
         dimValue = dimValue[0]
 
@@ -133,11 +176,20 @@ class ModelFileParent:
             print(f'[warning] file not found: {s.path}', flush=True)
         return True
 
+    def _loadMeta(s):
+        # all the metadata with one open (or none if indexed), see ncindex
+        if s.skip:
+            return
+        try:
+            s.meta = ncindex.load(s.path)
+        except Exception as e:
+            print(e)
+
     def _checkVarName(s):
         if s.skip:
             return True
 
-        if s.ncVarName in getVarNames(s.path):
+        if s.meta is not None and s.ncVarName in s.meta.varNames:
             return False
 
         if s.warning:
@@ -147,7 +199,7 @@ class ModelFileParent:
     def _getVarShape(s):
         if s.skip:
             return None
-        return getVarShape(s.path, s.ncVarName)
+        return s.meta.getVarShape(s.ncVarName)
 
     def _minMaxsLead2Valid(s, minMaxsLead):
         minMaxsValid = minMaxsLead.copy()
@@ -196,10 +248,96 @@ class ModelClimFile(ModelFileParent):
         )
 
     def read(s, minMaxs):
+        # -> read-only data and dims, shared with the other calls (see climcache)
         if s.skip:
             return None, None
+        return climcache.get(s.path, s.ncVarName, minMaxs, s._read, minMaxs)
 
+    def _read(s, minMaxs):
         data, dims = ncreadByDimRange(
-            s.path, s.ncVarName, minMaxs, decodeTime=False
+            s.path, s.ncVarName, minMaxs, decodeTime=False, meta=s.meta
+        )
+        return normalizeUnits(s.varName, data), dims
+
+
+class RunningStats:
+    '''
+    running count, mean, variance, min and max per grid point (NaN skipped),
+    Welford updates for single samples and pairwise merges (Chan et al.) of
+    partial results, so the samples never need to sit in memory together
+    '''
+    def __init__(s, shape):
+        s.count = np.zeros(shape, dtype=np.int32)
+        s.mean = np.zeros(shape)
+        s.M2 = np.zeros(shape)
+        s.min = np.full(shape, np.inf)
+        s.max = np.full(shape, -np.inf)
+
+    def add(s, data, axes=()):
+        # data as one sample per grid point, or samples along axes
+        if axes:
+            s._mergeMoments((), *_moments(data, axes))
+            return
+        isValid = ~np.isnan(data)
+        s.count += isValid
+        delta = np.where(isValid, data - s.mean, 0.)
+        s.mean += delta / np.maximum(s.count, 1)
+        s.M2 += np.where(isValid, delta * (data - s.mean), 0.)
+        np.fmin(s.min, data, out=s.min)
+        np.fmax(s.max, data, out=s.max)
+
+    def merge(s, other, index=()):
+        # the partial result other into s[index]
+        s._mergeMoments(index, other.count, other.mean, other.M2, other.min, other.max)
+
+    def _mergeMoments(s, index, count, mean, M2, minimum, maximum):
+        countOld = s.count[index]
+        countNew = countOld + count
+        ratio = np.where(countNew > 0, count / np.maximum(countNew, 1), 0.)
+        delta = mean - s.mean[index]
+        s.mean[index] += delta * ratio
+        s.M2[index] += M2 + delta * delta * countOld * ratio
+        s.count[index] = countNew
+        s.min[index] = np.fmin(s.min[index], minimum)
+        s.max[index] = np.fmax(s.max[index], maximum)
+
+    def getMean(s):
+        return np.where(s.count > 0, s.mean, np.nan)
+
+    def getVar(s, ddof=0):
+        return np.where(
+            s.count > ddof, s.M2 / np.maximum(s.count - ddof, 1), np.nan
         )
-        return data, dims
+
+    def getStd(s, ddof=0):
+        return np.sqrt(s.getVar(ddof))
+
+    def getMin(s):
+        return np.where(s.count > 0, s.min, np.nan)
+
+    def getMax(s):
+        return np.where(s.count > 0, s.max, np.nan)
+
+    def result(s, ddof=0, dtype=np.float64):
+        results = {'count': s.count.copy()}
+        for key, getStat in [
+            ('mean', s.getMean), ('std', lambda: s.getStd(ddof)),
+            ('var', lambda: s.getVar(ddof)), ('min', s.getMin), ('max', s.getMax),
+        ]:  # one float64 temporary at a time
+            results[key] = getStat().astype(dtype, copy=False)
+        return results
+
+
+def _moments(data, axes):
+    # -> count, mean, M2, min and max over the axes (NaN skipped)
+    isValid = ~np.isnan(data)
+    values = np.where(isValid, data, 0.)
+    count = isValid.sum(axis=axes, keepdims=True)
+    mean = values.sum(axis=axes, keepdims=True) / np.maximum(count, 1)
+    deviation = np.where(isValid, values - mean, 0.)
+    M2 = (deviation * deviation).sum(axis=axes)
+    minimum = np.where(isValid, data, np.inf).min(axis=axes)
+    maximum = np.where(isValid, data, -np.inf).max(axis=axes)
+    return (
+        count.squeeze(axis=axes), mean.squeeze(axis=axes), M2, minimum, maximum
+    )
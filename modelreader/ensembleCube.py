@@ -0,0 +1,412 @@
+'''
+lazy [init, member, (lead,) (z,), y, x] cube of the processed model data
+
+    cube = EnsembleCube(modelName, dataType, varName, minMaxs, initTimes, members)
+    cube = cube.sel(lead=[0, 10], lat=[-10, 10]).isel(init=slice(0, 30))
+    data, dims = cube.areaMean().std('member').compute(workers=4)
+    stats, dims = cube.stats(['init', 'member']).compute()  # mean, std, min..
+
+Nothing is read until compute(). Each file is read for the selected
+hyperslab only and reduced before the next one is read, so the full cube
+never sits in memory (unless no reduction is asked for).
+
+axes: 'init', 'member', and 'lead', 'lev', 'lat', 'lon' as in the files
+("analysis" doesn't have lead). Selections never drop an axis.
+'''
+from ._shared import ModelFile, RunningStats, checkNDim, getDtype, _getValidNDims
+from ..checktools import checkType
+from ..terminaltools import FlushPrinter
+from concurrent.futures import (
+    ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+)
+from itertools import islice
+import copy
+import numpy as np
+import os
+import time
+
+ENSEMBLE_AXES = ['init', 'member']
+
+
+class EnsembleCube:
+    def __init__(
+        s, modelName, dataType, varName, minMaxs, initTimes, members,
+        warning=True, rootDir='/nwpr/gfs/com120/9_data/models/processed',
+    ):
+        '''
+        minMaxs = [
+            (minMaxLead,)
+            (minMaxZ,)
+            minMaxY,
+            minMaxX,
+        ]
+        only the metadata of the files are read here
+        '''
+        checkType(modelName, str, 'modelName')
+        checkType(dataType, str, 'dataType')
+        checkType(varName, str, 'varName')
+        checkType(minMaxs, list, 'minMaxs')
+        checkType(initTimes, list, 'initTimes')
+        checkType(members, list, 'members')
+        checkType(rootDir, str, 'rootDir')
+
+        if not os.path.exists(rootDir):
+            raise FileNotFoundError(f'{rootDir=}')
+        for e in initTimes:
+            checkType(e, [float, int], 'element in initTimes')
+        for e in members:
+            checkType(e, int, 'element in members')
+        _checkMinMaxs(minMaxs)
+        if not checkNDim(dataType, varName, inquiredNDim=len(minMaxs)):
+            raise ValueError(f'wrong number of minMaxs for "{varName}"')
+
+        s.varName = varName
+        s.isAnalysis = dataType == 'analysis'
+        s.fileAxisNames = _getValidNDims(dataType, varName)[1].split(', ')
+        s.minMaxs = [list(minMax) for minMax in minMaxs]
+        s.initTimes = list(initTimes)
+        s.members = list(members)
+        s.files = [  # files[iInitTime][iMember]
+            [
+                ModelFile(
+                    modelName, dataType, varName, initTime, member, warning, rootDir
+                )
+                for member in members
+            ]
+            for initTime in initTimes
+        ]
+        s.isAreaMean = False
+        s.stat = None  # (statName, axisNames, ddof)
+        s._fileDims = None
+
+    def __repr__(s):
+        reductions = []
+        if s.isAreaMean:
+            reductions.append('areaMean()')
+        if s.stat is not None:
+            reductions.append(f'{s.stat[0]}({list(s.stat[1])})')
+        return (
+            f'EnsembleCube({s.varName}, {dict(zip(s.axisNames, s.shape))}'
+            f'{', ' if reductions else ''}{'.'.join(reductions)})'
+        )
+
+    # ---- axes
+    @property
+    def axisNames(s):
+        # -> names of the axes before the reduction of s.stat
+        fileAxisNames = s.fileAxisNames
+        if s.isAreaMean:
+            fileAxisNames = fileAxisNames[:-2]
+        return [*ENSEMBLE_AXES, *fileAxisNames]
+
+    @property
+    def dims(s):
+        # -> values of the axes before the reduction of s.stat
+        fileDims = s._getFileDims()
+        if s.isAreaMean:
+            fileDims = fileDims[:-2]
+        return [s.initTimes.copy(), s.members.copy(), *fileDims]
+
+    @property
+    def shape(s):
+        return tuple(len(dim) for dim in s.dims)
+
+    def _getFileDims(s):
+        # -> dimension values of the files (the longest lead among them)
+        if s._fileDims is not None:
+            return s._fileDims
+
+        files = [file for sublist in s.files for file in sublist if not file.skip]
+        if not files:
+            raise ValueError('no valid files for the cube')
+
+        spatialShapes = [
+            file.varShape if s.isAnalysis else file.varShape[1:] for file in files
+        ]
+        for file, shape in zip(files, spatialShapes):
+            if shape != spatialShapes[0]:
+                raise ValueError(
+                    'dimension shapes of input files are inconsistent: '
+                    f'{files[0].path} {spatialShapes[0]}, {file.path} {shape}'
+                )
+
+        fileDims = files[0].getDimValues(s.minMaxs)
+        if not s.isAnalysis:
+            leads = [
+                file._readDimValue(
+                    file.meta.getDimNames(file.ncVarName)[0], s.minMaxs[0]
+                )
+                for file in files
+            ]
+            fileDims[0] = max(leads, key=len)
+        s._fileDims = fileDims
+        return fileDims
+
+    # ---- selections
+    def sel(s, **minMaxs):
+        '''
+        select by values, e.g., sel(init=[t0, t1], lead=[0, 10], lat=[-10, 10])
+        a file axis is set to the new [min, max] (None for unbounded)
+        '''
+        _checkMinMaxs(list(minMaxs.values()))
+        cube = s._copy()
+        for axisName, (minValue, maxValue) in minMaxs.items():
+            if axisName in ENSEMBLE_AXES:
+                attrName = f'{axisName}s' if axisName == 'member' else 'initTimes'
+                keeps = [
+                    i for i, value in enumerate(getattr(cube, attrName))
+                    if (minValue is None or value >= minValue)
+                    and (maxValue is None or value <= maxValue)
+                ]
+                cube._take(axisName, keeps)
+            else:
+                cube.minMaxs[cube._fileAxis(axisName)] = [minValue, maxValue]
+                cube._fileDims = None
+        return cube
+
+    def isel(s, **indices):
+        '''
+        select by indices, e.g., isel(init=[0, 2], member=0, lead=slice(0, 10))
+        init and member take int, slice or list of int,
+        the file axes take int or slice (with step 1)
+        '''
+        cube = s._copy()
+        for axisName, index in indices.items():
+            if axisName in ENSEMBLE_AXES:
+                checkType(index, [int, slice, list], f'index of {axisName}')
+                length = len(cube.initTimes if axisName == 'init' else cube.members)
+                keeps = np.arange(length)[index]
+                cube._take(axisName, np.atleast_1d(keeps).tolist())
+                continue
+
+            checkType(index, [int, slice], f'index of {axisName}')
+            iAxis = cube._fileAxis(axisName)
+            values = np.asarray(cube._getFileDims()[iAxis])[index]
+            values = np.atleast_1d(values)
+            if isinstance(index, slice) and index.step not in [None, 1]:
+                raise ValueError(f'only step 1 is supported for {axisName}')
+            if values.size == 0:
+                raise ValueError(f'empty selection of {axisName}: {index}')
+            minMax = [values[0].item(), values[-1].item()]
+            if axisName == 'lead':  # leads are valid - initTime, not exact
+                minMax = [minMax[0] - 1e-6, minMax[1] + 1e-6]
+            cube.minMaxs[iAxis] = minMax
+            cube._fileDims = None
+        return cube
+
+    def _copy(s):
+        cube = copy.copy(s)
+        cube.minMaxs = [minMax.copy() for minMax in s.minMaxs]
+        return cube
+
+    def _take(s, axisName, keeps):
+        if axisName == 'init':
+            s.initTimes = [s.initTimes[i] for i in keeps]
+            s.files = [s.files[i] for i in keeps]
+        else:
+            s.members = [s.members[i] for i in keeps]
+            s.files = [[sublist[i] for i in keeps] for sublist in s.files]
+        s._fileDims = None
+
+    def _fileAxis(s, axisName):
+        if axisName not in s.fileAxisNames:
+            raise ValueError(
+                f'unknown axis "{axisName}", should be one of '
+                f'{ENSEMBLE_AXES + s.fileAxisNames}'
+            )
+        if s.isAreaMean and axisName in s.fileAxisNames[-2:]:
+            raise ValueError(f'"{axisName}" is already averaged')
+        return s.fileAxisNames.index(axisName)
+
+    # ---- reductions
+    def areaMean(s):
+        # cos(lat) weighted mean over lat and lon, before mean() and std()
+        if s.isAreaMean:
+            raise ValueError('areaMean() is already applied')
+        if s.stat is not None:
+            raise ValueError('areaMean() must be applied before the statistics')
+        cube = s._copy()
+        cube.isAreaMean = True
+        return cube
+
+    def mean(s, axisNames='member'):
+        return s._reduce('mean', axisNames, ddof=0)
+
+    def std(s, axisNames='member', ddof=0):
+        return s._reduce('std', axisNames, ddof)
+
+    def stats(s, axisNames='member', ddof=0):
+        # compute() -> {'count', 'mean', 'std', 'var', 'min', 'max'}, dims
+        return s._reduce('stats', axisNames, ddof)
+
+    def _reduce(s, statName, axisNames, ddof):
+        if isinstance(axisNames, str):
+            axisNames = [axisNames]
+        checkType(axisNames, [list, tuple], 'axisNames')
+        checkType(ddof, int, 'ddof')
+        if s.stat is not None:
+            raise ValueError(
+                f'{s.stat[0]}() is already applied, '
+                'only one of mean(), std() and stats()'
+            )
+        for axisName in axisNames:
+            if axisName not in s.axisNames:
+                raise ValueError(
+                    f'unknown axis "{axisName}", should be one of {s.axisNames}'
+                )
+        cube = s._copy()
+        cube.stat = (statName, tuple(axisNames), ddof)
+        return cube
+
+    # ---- reading
+    def compute(s, workers=1, workerType='process', dtype=None, verbose=False):
+        '''
+        -> data, dims, the axes reduced by mean(), std() or stats() are removed
+        dtype of data defaults to the dtype on disk (as a floating type)
+        workers > 1 reads the files concurrently ("process" or "thread",
+        use "thread" only if netCDF-C/HDF5 are built thread-safe), each
+        worker reduces its own group of files before the final merge
+        verbose prints the read throughput (files/s)
+        '''
+        checkType(workers, int, 'workers')
+        checkType(workerType, str, 'workerType')
+        checkType(verbose, bool, 'verbose')
+        if workers < 1:
+            raise ValueError(f'"workers" must be >= 1 but {workers=}')
+        if workerType not in ['process', 'thread']:
+            raise ValueError(f'"workerType" can only be "process" or "thread"')
+
+        fp = FlushPrinter()
+        dims, axisNames = s.dims, s.axisNames
+        if dtype is None:
+            dtype = getDtype([file for sublist in s.files for file in sublist])
+
+        statName, statAxes, ddof = s.stat or (None, (), 0)
+        keeps = [i for i, axisName in enumerate(axisNames) if axisName not in statAxes]
+        blockStatAxes = tuple(
+            i - len(ENSEMBLE_AXES) for i, axisName in enumerate(axisNames)
+            if axisName in statAxes and axisName not in ENSEMBLE_AXES
+        )
+        latWeights = None
+        if s.isAreaMean:
+            latWeights = np.cos(np.deg2rad(np.asarray(s._getFileDims()[-2])))
+        numLeads = None if s.isAnalysis else len(dims[len(ENSEMBLE_AXES)])
+        readArgs = (s.minMaxs, numLeads, latWeights)
+
+        # tasks: (index of the output, files), files reduced together if stat
+        groups = {}
+        for iInitTime, sublist in enumerate(s.files):
+            for iMember, file in enumerate(sublist):
+                if file.skip:
+                    continue
+                index = tuple(
+                    i for i, axisName in zip([iInitTime, iMember], ENSEMBLE_AXES)
+                    if statName is None or axisName not in statAxes
+                )
+                groups.setdefault(index, []).append(file)
+        if statName is None:
+            func = _readBlock
+            tasks = [(index, files[0]) for index, files in groups.items()]
+            data = np.full(s.shape, np.nan, dtype=dtype)
+        else:
+            func = _reduceFiles
+            readArgs = (*readArgs, blockStatAxes)
+            tasks = [
+                (index, files[i:i + size])
+                for index, files in groups.items()
+                for size in [-(-len(files) // workers)]
+                for i in range(0, len(files), size)
+            ]
+            stats = RunningStats([len(dims[i]) for i in keeps])
+
+        numFiles = sum(len(files) for files in groups.values())
+        timeStart = time.perf_counter()
+        for iDone, (index, result) in enumerate(
+            _iterResults(func, tasks, readArgs, workers, workerType)
+        ):
+            fp.flush(f'reading {s.varName} {iDone}/{len(tasks)}')
+            if statName is None:
+                data[index] = result
+            else:
+                stats.merge(result, index)
+
+        elapsed = max(time.perf_counter() - timeStart, 1e-9)
+        if verbose:
+            fp.print(
+                f'read {numFiles} files of {s.varName} in {elapsed:.1f} s, '
+                f'{numFiles/elapsed:.1f} files/s'
+            )
+
+        dims = [dims[i] for i in keeps]
+        if statName is None:
+            return data, dims
+        if statName == 'mean':
+            return stats.getMean().astype(dtype, copy=False), dims
+        if statName == 'std':
+            return stats.getStd(ddof).astype(dtype, copy=False), dims
+        return stats.result(ddof, dtype), dims
+
+
+def _checkMinMaxs(minMaxs):
+    for sublist in minMaxs:
+        checkType(sublist, list, 'sublists in minMaxs')
+        if len(sublist) != 2:
+            raise ValueError('each minMax pair must be 2 elements')
+        for e in sublist:
+            checkType(e, [float, int, None], 'elements in minMaxs')
+
+
+def _iterResults(func, tasks, args, workers, workerType):
+    # -> (key, func(task, *args)) as they finish, at most 2*workers pending
+    if workers == 1:
+        for key, task in tasks:
+            yield key, func(task, *args)
+        return
+
+    Executor = ThreadPoolExecutor if workerType == 'thread' else ProcessPoolExecutor
+    with Executor(max_workers=workers) as executor:
+        todo = iter(tasks)
+        pending = {}
+        while True:
+            for key, task in islice(todo, 2 * workers - len(pending)):
+                pending[executor.submit(func, task, *args)] = key
+            if not pending:
+                return
+            done, __ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+
+def _reduceFiles(files, minMaxs, numLeads, latWeights, statAxes):
+    # -> RunningStats of the files, one at a time (runs in the workers)
+    stats = None
+    for file in files:
+        data = _readBlock(file, minMaxs, numLeads, latWeights)
+        if stats is None:
+            stats = RunningStats(
+                [n for i, n in enumerate(data.shape) if i not in statAxes]
+            )
+        stats.add(data, statAxes)
+    return stats
+
+
+def _readBlock(file, minMaxs, numLeads, latWeights):
+    # -> the data of one file (runs in the workers)
+    data, __ = file.read(minMaxs)
+
+    if numLeads is not None and data.shape[0] < numLeads:
+        padded = np.full(
+            (numLeads, *data.shape[1:]), np.nan,
+            dtype=np.result_type(data.dtype, np.float32)
+        )
+        padded[:data.shape[0]] = data
+        data = padded
+
+    if latWeights is not None:
+        weights = latWeights[:, None] * ~np.isnan(data)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            data = (
+                np.nansum(data * weights, axis=(-2, -1))
+                / weights.sum(axis=(-2, -1))
+            )
+    return data
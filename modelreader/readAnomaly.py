@@ -4,7 +4,7 @@ from .readModelClim import readModelClim
 from .readTotal import readTotal
 from .. import timetools as tt
 from ..terminaltools import FlushPrinter
-from ..caltools import interp_1d, conform_axis
+from ..caltools import interp_2d, conform_axis
 import numpy as np
 import os
 
@@ -109,10 +109,10 @@ def readAnomaly(
     # ---- interpolate if needed
     lonClim, latClim = dimsClim[-1], dimsClim[-2]
     lonTotal, latTotal = dimsTotal[-1], dimsTotal[-2]
-    if not np.array_equal(lonClim, lonTotal):
-        interp_1d(lonClim, dataClim, lonTotal, axis=-1, extrapolate=True)
-    if not np.array_equal(latClim, latTotal):
-        interp_1d(latClim, dataClim, latTotal, axis=-2, extrapolate=True)
+    if not np.array_equal(lonClim, lonTotal) or not np.array_equal(latClim, latTotal):
+        dataClim = interp_2d(
+            lonClim, latClim, dataClim, lonTotal, latTotal, extrapolate=True
+        )
 
     #
     # ---- subtract the climatology from total
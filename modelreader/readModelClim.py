@@ -1,5 +1,5 @@
 from ..checktools import checkType
-from ._shared import ModelClimFile, checkNDim
+from ._shared import ModelClimFile, checkNDim, getDtype
 from .. import timetools as tt
 from ..terminaltools import FlushPrinter
 import numpy as np
@@ -9,7 +9,7 @@ import os
 def readModelClim(
     modelName, dataType, varName, minMaxs, initTimes, members,
     climYears=[2001, 2020], climType='5dma', skipLeadCheck=True, warning=True,
-    rootDir=''
+    rootDir='', dtype=None,
 ):
     '''
     minMaxs = [
@@ -28,6 +28,7 @@ def readModelClim(
 
     -> var = var[member, init, lead, (z,), y, x]
     -> dims = [member, init, lead, (z,), y, x]
+    dtype of var defaults to the dtype on disk (as a floating type)
     '''
     def validateInputArgs():
         checkType(modelName, str, 'modelName')
@@ -193,7 +194,9 @@ def readModelClim(
     numMembers = len(members)
     dataShape = [numInitTimes, numMembers, *[len(dim) for dim in dims]]
     fp.flush(f'creating data with shape = {dataShape}..')
-    data = np.nan * np.ones(dataShape)
+    if dtype is None:
+        dtype = getDtype([file for files in modelFiles for file in files])
+    data = np.empty(dataShape, dtype=dtype)
 
     #
     # ---- Let's go!!
@@ -204,11 +207,11 @@ def readModelClim(
                 f'reading {varName} clim {iMember}/{numMembers}, {iInitTime}/{numInitTimes}')
 
             file = modelFiles[iMember][iInitTime]
-            if file.skip:
-                continue
-
-            dataPart, __ = file.read(minMaxs)
+            dataPart = None
+            if not file.skip:
+                dataPart, __ = file.read(minMaxs)
             if dataPart is None:
+                data[iInitTime, iMember] = np.nan
                 continue
 
             if isAnalysis:
@@ -217,16 +220,6 @@ def readModelClim(
 
             numLeads = dataPart.shape[0]
             data[iInitTime, iMember, :numLeads, :] = dataPart
-
-    # ---- fix mslp units :((
-    if varName == 'mslp': # fix the mslp value/units :((
-        fieldMean = np.nanmean(data, axis=(-1, -2))
-        for i in range(numInitTimes):
-            for j in range(numMembers):
-                for k in range(numLeads):
-                    if fieldMean[i, j, k] > 1000 * 50:
-                        data[i, j, k, :, :] /= 100 # -> hPa
-                    elif fieldMean[i, j, k] < 1000 / 50: # GEPSv3 correction :((
-                        data[i, j, k, :, :] *= 100 # -> hPa
+            data[iInitTime, iMember, numLeads:, :] = np.nan
 
     return data, dims
@@ -0,0 +1,41 @@
+'''
+streaming statistics of the processed model data, see also ensembleCube
+'''
+from .ensembleCube import EnsembleCube
+
+
+def readStats(
+        modelName,
+        dataType,
+        varName,
+        minMaxs,
+        initTimes,
+        members,
+        statDims=['member'],
+        ddof=0,
+        warning=True,
+        rootDir='/nwpr/gfs/com120/9_data/models/processed',
+        dtype=None,
+        workers=1,
+        workerType='process',
+        verbose=False,
+    ):
+    '''
+    minMaxs = [
+        (minMaxLead,)
+        (minMaxZ,)
+        minMaxY,
+        minMaxX,
+    ]
+    statDims = ['member'], ['init'] or ['init', 'member']
+    -> stats = {'count', 'mean', 'std', 'var', 'min', 'max'}
+        each as stat[(init,) (member,) (lead,) (z,), y, x] without statDims
+    -> dims of the axes above
+    the files are read one at a time (per worker) and accumulated with
+    Welford updates, so only the statistics are held in memory
+    verbose prints the read throughput (files/s)
+    '''
+    cube = EnsembleCube(
+        modelName, dataType, varName, minMaxs, initTimes, members, warning, rootDir
+    )
+    return cube.stats(statDims, ddof).compute(workers, workerType, dtype, verbose)
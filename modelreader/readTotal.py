@@ -2,11 +2,13 @@
 2025/01/15
 This is a module for reading the processed model data
 '''
-from ._shared import ModelFile, checkNDim
+from ._shared import ModelFile, checkNDim, getDtype
 from ..checktools import checkType
 from ..terminaltools import FlushPrinter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import numpy as np
 import os
+import time
 
 def getMaxNumLeads(
         modelName, 
@@ -60,6 +62,10 @@ def readTotal(
         skipLeadCheck=True,
         warning=True,
         rootDir='/nwpr/gfs/com120/9_data/models/processed',
+        dtype=None,
+        workers=1,
+        workerType='process',
+        verbose=False,
     ):
     '''
     minMaxs = [
@@ -71,6 +77,11 @@ def readTotal(
     -> var = var[member, init, (lead,) (z,), y, x] 
     -> dims = [member, init, (lead,) (z,), y, x]
     "analysis" doesn't have lead
+    dtype of var defaults to the dtype on disk (as a floating type)
+    units are harmonized as each file is read (see _shared.UNIT_NORMALIZERS)
+    workers > 1 reads the files concurrently ("process" or "thread",
+    use "thread" only if netCDF-C/HDF5 are built thread-safe)
+    verbose prints the read throughput (files/s, MB/s)
     '''
     def validateInputArgs():
         checkType(modelName, str, 'modelName')
@@ -81,7 +92,14 @@ def readTotal(
         checkType(members, list, 'memebers')
         checkType(skipLeadCheck, bool, 'skipLeadCheck')
         checkType(rootDir, str, 'rootDir')
-
+        checkType(workers, int, 'workers')
+        checkType(workerType, str, 'workerType')
+        checkType(verbose, bool, 'verbose')
+
+        if workers < 1:
+            raise ValueError(f'"workers" must be >= 1 but {workers=}')
+        if workerType not in ['process', 'thread']:
+            raise ValueError(f'"workerType" can only be "process" or "thread"')
         for e in initTimes:
             checkType(e, [float, int], 'element in initTimes')
         for e in members:
@@ -226,40 +244,71 @@ def readTotal(
     numMembers = len(members)
     dataShape = [numInitTimes, numMembers, *[len(dim) for dim in dims]]
     fp.flush(f'creating data with shape = {dataShape}..')
-    data = np.nan * np.ones(dataShape)
+    if dtype is None:
+        dtype = getDtype([file for files in modelFiles for file in files])
+    data = np.empty(dataShape, dtype=dtype)
+
+    def putDataPart(iInitTime, iMember, dataPart):
+        if dataPart is None:
+            data[iInitTime, iMember] = np.nan
+            return 0
+        if isAnalysis:
+            data[iInitTime, iMember, :] = dataPart
+            return dataPart.nbytes
+
+        numLeads = dataPart.shape[0]
+        data[iInitTime, iMember, :numLeads, :] = dataPart
+        data[iInitTime, iMember, numLeads:, :] = np.nan
+        return dataPart.nbytes
 
     #
     # ---- Let's GO!!
     #
-    for iInitTime in range(numInitTimes):
-        for iMember in range(numMembers):
+    timeStart = time.perf_counter()
+    numFiles, numBytes = 0, 0
+    indices = [
+        (iInitTime, iMember)
+        for iInitTime in range(numInitTimes) for iMember in range(numMembers)
+    ]
+    if workers == 1:
+        for iInitTime, iMember in indices:
             fp.flush(
                 f'reading {varName} total {iMember}/{numMembers}, {iInitTime}/{numInitTimes}')
+            dataPart = _readModelFile(modelFiles[iMember][iInitTime], minMaxs)
+            numFiles += dataPart is not None
+            numBytes += putDataPart(iInitTime, iMember, dataPart)
+
+    else:
+        Executor = ThreadPoolExecutor if workerType == 'thread' else ProcessPoolExecutor
+        with Executor(max_workers=workers) as executor:
+            futures = {}
+            for iInitTime, iMember in indices:
+                file = modelFiles[iMember][iInitTime]
+                if file.skip:
+                    putDataPart(iInitTime, iMember, None)
+                    continue
+                future = executor.submit(_readModelFile, file, minMaxs)
+                futures[future] = (iInitTime, iMember)
+
+            for iDone, future in enumerate(as_completed(futures)):
+                fp.flush(f'reading {varName} total {iDone}/{len(futures)}')
+                dataPart = future.result()
+                numFiles += dataPart is not None
+                numBytes += putDataPart(*futures[future], dataPart)
+
+    elapsed = max(time.perf_counter() - timeStart, 1e-9)
+    if verbose:
+        fp.print(
+            f'read {numFiles} files of {varName} in {elapsed:.1f} s, '
+            f'{numFiles/elapsed:.1f} files/s, {numBytes/elapsed/1e6:.1f} MB/s'
+        )
 
-            file = modelFiles[iMember][iInitTime]
-            if file.skip:
-                continue
-
-            dataPart, __ = file.read(minMaxs)
-            if dataPart is None:
-                continue
-
-            if isAnalysis:
-                data[iInitTime, iMember, :] = dataPart
-                continue
-
-            numLeads = dataPart.shape[0]
-            data[iInitTime, iMember, :numLeads, :] = dataPart
+    return data, dims
 
-    # ---- fix mslp units :((
-    if varName == 'mslp': # fix the mslp value/units :((
-        fieldMean = np.nanmean(data, axis=(-1, -2))
-        for i in range(numInitTimes):
-            for j in range(numMembers):
-                for k in range(numLeads):
-                    if fieldMean[i, j, k] > 1000 * 50:
-                        data[i, j, k, :, :] /= 100 # -> hPa
-                    elif fieldMean[i, j, k] < 1000 / 50: # GEPSv3 correction :((
-                        data[i, j, k, :, :] *= 100 # -> hPa
 
-    return data, dims
+def _readModelFile(file, minMaxs):
+    # -> data of the ModelFile, None if skipped (runs in the workers)
+    if file.skip:
+        return None
+    dataPart, __ = file.read(minMaxs)
+    return dataPart
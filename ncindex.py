@@ -0,0 +1,260 @@
+'''
+persistent index of the netCDF metadata (variable names, dimension names,
+shapes, coordinate values and decoded time axes).
+
+Entries are keyed on the real path and invalidated when the mtime or size
+of the file changes. Once enabled, nctools answers getVarNames,
+getDimNames, getVarShape, read (for coordinates) and ncreadtime from the
+index, and ncreadByDimRange only opens the file for the data. The
+metadata of the last maxFiles files are kept in memory (LRU), the others
+are loaded again from the index.
+
+    from pytools import ncindex
+    ncindex.enable()            # ~/.cache/pytools/ncindex.sqlite
+    ncindex.enable(dbPath)      # or a shared index file
+
+ncindex.load(fileName) reads the metadata with one open even if disabled.
+
+or set the environment variable PYTOOLS_NCINDEX to the index path.
+'''
+import netCDF4 as nc
+import numpy as np
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+SCHEMA = 3
+DEFAULT_DB_PATH = '~/.cache/pytools/ncindex.sqlite'
+DEFAULT_MAX_FILES = 4096
+
+_index = None
+
+
+def enable(dbPath=None, maxFiles=DEFAULT_MAX_FILES):
+    global _index
+    _index = NcIndex(dbPath, maxFiles)
+    return _index
+
+
+def disable():
+    global _index
+    _index = None
+
+
+def isEnabled():
+    return _index is not None
+
+
+def lookup(fileName):
+    # -> NcFileMeta, or None if the index is disabled or the file is unreadable
+    if _index is None:
+        return None
+    return _index.get(fileName)
+
+
+def load(fileName):
+    # -> NcFileMeta from the index if enabled, otherwise read with one open
+    meta = lookup(fileName)
+    if meta is None:
+        meta = _scan(os.path.realpath(fileName))
+    return meta
+
+
+@dataclass
+class NcFileMeta:
+    path: str
+    varNames: list
+    dimNames: dict
+    shapes: dict
+    dtypes: dict  # as read (unpacked)
+    coords: dict = field(default_factory=dict)  # raw coordinate values
+    times: dict = field(default_factory=dict)   # decoded time coordinates
+    monotonic: dict = field(default_factory=dict)       # coords: strictly monotonic
+    monotonicTimes: dict = field(default_factory=dict)  # times: strictly monotonic
+
+    def getDimNames(s, varName):
+        return list(s.dimNames[varName])
+
+    def getVarShape(s, varName):
+        return tuple(s.shapes[varName])
+
+    def getVarDtype(s, varName):
+        dtype = s.dtypes.get(varName)
+        return None if dtype is None else np.dtype(dtype)
+
+    def getCoord(s, name, decodeTime=False):
+        # -> a copy of the coordinate values, or None if not indexed
+        coords = s.times if decodeTime else s.coords
+        if name not in coords:
+            return None
+        return coords[name].copy()
+
+    def isMonotonic(s, name, decodeTime=False):
+        # -> whether the (indexed) coordinate is strictly monotonic
+        monotonic = s.monotonicTimes if decodeTime else s.monotonic
+        return monotonic.get(name, False)
+
+
+class NcIndex:
+    def __init__(s, dbPath=None, maxFiles=DEFAULT_MAX_FILES):
+        if dbPath is None:
+            dbPath = os.getenv('PYTOOLS_NCINDEX') or DEFAULT_DB_PATH
+        s.dbPath = os.path.expanduser(dbPath)
+        dbDir = os.path.dirname(s.dbPath)
+        if dbDir and not os.path.exists(dbDir):
+            os.makedirs(dbDir, exist_ok=True)
+
+        s.maxFiles = maxFiles
+        s._lock = threading.Lock()
+        s._memory = OrderedDict()  # path -> (mtime, size, meta), LRU
+        s._pid, s._connection = None, None
+        with s._lock, s._connect() as con:
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS files ('
+                'path TEXT PRIMARY KEY, mtime REAL, size INTEGER, '
+                'schema INTEGER, meta TEXT)'
+            )
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS coords ('
+                'path TEXT, name TEXT, decoded INTEGER, dtype TEXT, data BLOB, '
+                'PRIMARY KEY (path, name, decoded))'
+            )
+
+    def _connect(s):
+        # a connection cannot be shared with forked processes (e.g., workers)
+        if s._pid != os.getpid():
+            s._pid = os.getpid()
+            s._connection = sqlite3.connect(
+                s.dbPath, timeout=60, check_same_thread=False
+            )
+        return s._connection
+
+    def get(s, fileName):
+        try:
+            path = os.path.realpath(fileName)
+            stat = os.stat(path)
+        except OSError:
+            return None
+        mtime, size = stat.st_mtime, stat.st_size
+
+        cached = s._memory.get(path)
+        if cached is not None and cached[:2] == (mtime, size):
+            s._memory.move_to_end(path)
+            return cached[2]
+
+        meta = s._load(path, mtime, size)
+        if meta is None:
+            try:
+                meta = _scan(path)
+            except Exception as e:
+                print(f'[ncindex] unable to index {fileName}: {e}')
+                return None
+            s._store(meta, mtime, size)
+
+        s._memory[path] = (mtime, size, meta)
+        s._memory.move_to_end(path)
+        while len(s._memory) > s.maxFiles:
+            s._memory.popitem(last=False)
+        return meta
+
+    def invalidate(s, fileName=None):
+        # drop one file, or everything if fileName is None
+        with s._lock, s._connect() as con:
+            if fileName is None:
+                s._memory.clear()
+                con.execute('DELETE FROM files')
+                con.execute('DELETE FROM coords')
+                return
+            path = os.path.realpath(fileName)
+            s._memory.pop(path, None)
+            con.execute('DELETE FROM files WHERE path = ?', (path,))
+            con.execute('DELETE FROM coords WHERE path = ?', (path,))
+
+    def _load(s, path, mtime, size):
+        with s._lock:
+            row = s._connect().execute(
+                'SELECT mtime, size, schema, meta FROM files WHERE path = ?',
+                (path,)
+            ).fetchone()
+            if row is None or tuple(row[:3]) != (mtime, size, SCHEMA):
+                return None
+            coordRows = s._connect().execute(
+                'SELECT name, decoded, dtype, data FROM coords WHERE path = ?',
+                (path,)
+            ).fetchall()
+
+        meta = NcFileMeta(path=path, **json.loads(row[3]))
+        for name, decoded, dtype, data in coordRows:
+            values = np.frombuffer(data, dtype=dtype).copy()
+            if decoded:
+                meta.times[name] = values
+            else:
+                meta.coords[name] = values
+        return meta
+
+    def _store(s, meta, mtime, size):
+        metaJson = json.dumps({
+            'varNames': meta.varNames,
+            'dimNames': meta.dimNames,
+            'shapes': meta.shapes,
+            'dtypes': meta.dtypes,
+            'monotonic': meta.monotonic,
+            'monotonicTimes': meta.monotonicTimes,
+        })
+        coordRows = [
+            (meta.path, name, decoded, values.dtype.str, values.tobytes())
+            for decoded, coords in [(0, meta.coords), (1, meta.times)]
+            for name, values in coords.items()
+        ]
+        with s._lock, s._connect() as con:
+            con.execute('DELETE FROM coords WHERE path = ?', (meta.path,))
+            con.execute(
+                'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                (meta.path, mtime, size, SCHEMA, metaJson)
+            )
+            con.executemany(
+                'INSERT INTO coords VALUES (?, ?, ?, ?, ?)', coordRows
+            )
+
+
+def _scan(path):
+    # read all the metadata with one open
+    from .nctools import _ncreadtime, _unpackedDtype
+    from .caltools import isStrictlyMonotonic
+
+    with nc.Dataset(path, 'r') as h:
+        varNames = list(h.variables.keys())
+        meta = NcFileMeta(
+            path=path,
+            varNames=varNames,
+            dimNames={vn: list(h[vn].dimensions) for vn in varNames},
+            shapes={vn: list(h[vn].shape) for vn in varNames},
+            dtypes={vn: _unpackedDtype(h[vn]).str for vn in varNames
+                    if _unpackedDtype(h[vn]) is not None},
+        )
+
+        for varName in varNames:
+            if h[varName].dimensions != (varName,):
+                continue  # not a coordinate variable
+            meta.coords[varName] = np.array(h[varName][:])
+            meta.monotonic[varName] = isStrictlyMonotonic(meta.coords[varName])
+
+            units = getattr(h[varName], 'units', '')
+            if not isinstance(units, str) or 'since' not in units.lower():
+                continue
+            try:
+                meta.times[varName] = np.array(
+                    _ncreadtime(h, varName, fileName=path), dtype=np.float64
+                )
+                meta.monotonicTimes[varName] = isStrictlyMonotonic(meta.times[varName])
+            except Exception:
+                pass  # left for ncreadtime to report
+
+    return meta
+
+
+if os.getenv('PYTOOLS_NCINDEX'):
+    enable()
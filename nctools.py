@@ -8,13 +8,20 @@
     }
 '''
 from . import checktools as chkt
+from . import ncindex
 import netCDF4 as nc
 import numpy as np
 import os
 import traceback
+from functools import lru_cache
+
+COMPRESS_SLAB_BYTES = 256 * 2**20  # copied at once by compress
 
 
 def getVarNames(fileName: str) -> list:
+    meta = ncindex.lookup(fileName)
+    if meta is not None:
+        return list(meta.varNames)
     try:
         with nc.Dataset(fileName, 'r') as h:
             varNames = list(h.variables.keys())
@@ -25,6 +32,9 @@ def getVarNames(fileName: str) -> list:
 
 
 def getDimNames(fileName: str, varName: str) -> list:
+    meta = ncindex.lookup(fileName)
+    if meta is not None and varName in meta.varNames:
+        return meta.getDimNames(varName)
     with nc.Dataset(fileName, 'r') as h:
         dimNames = list(h[varName].dimensions)
     return dimNames
@@ -292,6 +302,76 @@ def save(
         return
 
 
+def compress(fileName, complevel=1, shuffle=True, chunkSizes=None):
+    '''
+    rewrite the file with zlib compression of its (numeric) variables
+    written to a temporary file in the same directory and renamed over
+    fileName once completed, so that readers never see a partial file
+    chunkSizes: {dimName: size}, e.g., {'time': 1}, the other dimensions
+                keep the chunks of the file (or the default of netCDF4)
+    a NETCDF3 file is rewritten as NETCDF4 (zlib needs HDF5)
+    -> the size of the compressed file in bytes
+    '''
+    chkt.checkType(fileName, str, 'fileName')
+    chkt.checkType(complevel, int, 'complevel')
+    chkt.checkType(shuffle, bool, 'shuffle')
+    chkt.checkType(chunkSizes, [dict, None], 'chunkSizes')
+    if not 0 <= complevel <= 9:
+        raise ValueError(f'complevel must be in 0-9, ({complevel=})')
+    chunkSizes = chunkSizes or {}
+
+    tempName = f'{fileName}.compress.{os.getpid()}'
+    try:
+        with nc.Dataset(fileName, 'r') as src, \
+             nc.Dataset(tempName, 'w', format=_getCompressFormat(src.data_model)) as des:
+            src.set_auto_maskandscale(False)
+            des.setncatts({a: src.getncattr(a) for a in src.ncattrs()})
+            for dimName, dim in src.dimensions.items():
+                des.createDimension(dimName, None if dim.isunlimited() else len(dim))
+
+            for varName, srcVar in src.variables.items():
+                attrs = {a: srcVar.getncattr(a) for a in srcVar.ncattrs()}
+                options = {'fill_value': attrs.pop('_FillValue', None)}
+                if srcVar.ndim > 0 and np.dtype(srcVar.dtype).kind in 'iufb':
+                    chunking = srcVar.chunking()  # None for NETCDF3
+                    if chunking is None:
+                        chunking = 'contiguous'
+                    chunks = [
+                        chunkSizes.get(dimName, None if chunking == 'contiguous' else chunking[iDim])
+                        for iDim, dimName in enumerate(srcVar.dimensions)
+                    ]
+                    if None not in chunks:
+                        options['chunksizes'] = [
+                            max(1, min(chunk, len(src.dimensions[dimName]) or chunk))
+                            for chunk, dimName in zip(chunks, srcVar.dimensions)
+                        ]
+                    options.update(compression='zlib', complevel=complevel, shuffle=shuffle)
+                desVar = des.createVariable(varName, srcVar.dtype, srcVar.dimensions, **options)
+                desVar.set_auto_maskandscale(False)
+                desVar.setncatts(attrs)
+                if srcVar.ndim == 0:
+                    desVar.assignValue(srcVar.getValue())
+                elif srcVar.size > 0:
+                    # by slabs along the first dimension, not the whole variable in memory
+                    rowBytes = srcVar.size // srcVar.shape[0] * np.dtype(srcVar.dtype).itemsize
+                    numSlab = max(1, COMPRESS_SLAB_BYTES // max(1, rowBytes))
+                    for start in range(0, srcVar.shape[0], numSlab):
+                        end = min(start + numSlab, srcVar.shape[0])
+                        desVar[start:end] = srcVar[start:end]
+        os.replace(tempName, fileName)
+    finally:
+        if os.path.exists(tempName):
+            os.remove(tempName)
+    return os.path.getsize(fileName)
+
+
+def _getCompressFormat(dataModel):
+    # zlib compression needs HDF5, NETCDF4_CLASSIC keeps the classic model
+    if dataModel.startswith('NETCDF3'):
+        return 'NETCDF4'
+    return dataModel
+
+
 def errorIfInvalidVarStruct(varStruct):
     '''
     varStruct = {
@@ -377,6 +457,9 @@ def write(fileName: str, varName: str, data, slices=None) -> str:
 def read(fileName, varName):
     _errorIfFileNotExists(fileName)
     _errorIfVariableNotExists(fileName, varName)
+    meta = ncindex.lookup(fileName)
+    if meta is not None and varName in meta.coords:
+        return meta.getCoord(varName)
     try:
         with nc.Dataset(fileName, 'r') as h:
             data = h[varName][:]
@@ -395,11 +478,42 @@ def getVarShape(fileName, varName):
         return None
     if varName not in getVarNames(fileName):
         return None
+    meta = ncindex.lookup(fileName)
+    if meta is not None:
+        return meta.getVarShape(varName)
     with nc.Dataset(fileName, 'r') as h:
         shape = h[varName].shape
     return shape
 
 
+def getVarDtype(fileName, varName):
+    # -> dtype of the values as read, i.e., unpacked by scale_factor/add_offset
+    if not (os.path.isfile(fileName) or os.path.islink(fileName)):
+        return None
+    if varName not in getVarNames(fileName):
+        return None
+    meta = ncindex.lookup(fileName)
+    if meta is not None:
+        return meta.getVarDtype(varName)
+    with nc.Dataset(fileName, 'r') as h:
+        dtype = _unpackedDtype(h[varName])
+    return dtype
+
+
+def _unpackedDtype(hVar):
+    dtype = hVar.dtype
+    if not isinstance(dtype, np.dtype):  # e.g., str
+        return None
+    packing = [
+        np.asarray(hVar.getncattr(attName)).dtype
+        for attName in ['scale_factor', 'add_offset']
+        if attName in hVar.ncattrs()
+    ]
+    if packing:
+        dtype = np.result_type(*packing)
+    return dtype
+
+
 def getVarDimLength(fileName, varName, iDim):
     shape = getVarShape(fileName, varName)
     if shape is None:
@@ -420,23 +534,69 @@ def ncreadattt(fileName: str, varName: str, attName: str) -> str:
 
 
 def ncreadtime(
-    fileName: str, varName: str = 'time', attName: str = 'units'
+    fileName: str, varName: str = 'time', attName: str = 'units', hFile=None
 ) -> np.array:
+    # hFile: an opened nc.Dataset to read from instead of opening fileName
+    if hFile is not None:
+        if varName not in hFile.variables:
+            raise ValueError(f'{varName=} not found in {fileName=}')
+        return _ncreadtime(hFile, varName, attName, fileName or hFile.filepath())
+
+    _errorIfFileNotExists(fileName)
+    meta = ncindex.lookup(fileName)
+    if meta is not None and attName == 'units' and varName in meta.times:
+        return meta.getCoord(varName, decodeTime=True)
 
+    with nc.Dataset(fileName, 'r') as hFile:
+        if varName not in hFile.variables:
+            raise ValueError(f'{varName=} not found in {fileName=}')
+        return _ncreadtime(hFile, varName, attName, fileName)
+
+
+def _ncreadtime(hFile, varName, attName='units', fileName=None) -> np.array:
+    # decode the time from an opened file handle
     from . import timetools as tt
 
-    timeValue = read(fileName, varName)
-    timeUnits = ncreadattt(fileName, varName, attName).lower()
+    timeValue = np.array(hFile[varName][:])
+    timeUnits = hFile[varName].getncattr(attName)
+    try:
+        strTimeDelta, timeOrigin = _parseTimeUnits(timeUnits)
+    except ValueError as e:
+        raise ValueError(f'{e} ({fileName=}, {varName=}, {attName=})')
+
+    if strTimeDelta in ['month', 'months', 'year', 'years']:
+        numMonths = timeValue * (12 if strTimeDelta.startswith('year') else 1)
+        if not np.all(numMonths == np.round(numMonths)):
+            raise ValueError(f'non-integer {strTimeDelta} in {fileName=}, {varName=}')
+        return tt.addMonthArray(timeOrigin, numMonths)
+
+    TIMEDELTA = {
+        'second': 1/86400,
+        'seconds': 1/86400,
+        'minute': 1/1440,
+        'minutes': 1/1440,
+        'hour': 1/24,
+        'hours': 1/24,
+        'day': 1,
+        'days': 1,
+    }
+    return timeOrigin + timeValue * TIMEDELTA[strTimeDelta]
+
 
+@lru_cache(maxsize=256)
+def _parseTimeUnits(timeUnits):
     # timeUnits = "{timeDelta}{delimitter}since{delimitter}{timeOrigin}"
-    # parse time units -> timeDelta & timeOrigin
+    # parse time units -> timeDelta & timeOrigin (days since 2000-01-01)
+    from . import timetools as tt
+
+    timeUnits = timeUnits.lower()
     if 'since' not in timeUnits:
-        raise ValueError(f'cannot find "since" in {timeUnits=} to parse. ({fileName=}, {varName=}, attName=)')
+        raise ValueError(f'cannot find "since" in {timeUnits=} to parse.')
 
     found = False
     validDelimitters = [' ', '_']
     for delimitter in validDelimitters:
-        if timeUnits.split(delimitter)[1] == 'since':
+        if timeUnits.split(delimitter)[1:2] == ['since']:
             timeUnits = timeUnits.split(delimitter)
             found = True
             break
@@ -446,32 +606,14 @@ def ncreadtime(
     strTimeDelta = timeUnits[0]
     strTimeOrigin = delimitter.join(timeUnits[2:])
 
-    timeOrigin = tt.string2float(strTimeOrigin)
-    TIMEDELTA = {
-        'second': 1/86400,
-        'seconds': 1/86400,
-        'minute': 1/1440,
-        'minutes': 1/1440,
-        'hour': 1/24,
-        'hours': 1/24,
-        'day': 1,
-        'days': 1,
-    }
-
-    STRMONTH = ['month', 'months']
-    STRYEAR = ['year', 'years']
-
-    if strTimeDelta not in [*TIMEDELTA.keys(), *STRMONTH, *STRYEAR]:
+    validTimeDeltas = [
+        'second', 'seconds', 'minute', 'minutes', 'hour', 'hours', 'day', 'days',
+        'month', 'months', 'year', 'years',
+    ]
+    if strTimeDelta not in validTimeDeltas:
         raise ValueError(f'unalbe to recognize {strTimeDelta=}')
 
-    if strTimeDelta in STRMONTH:
-        time = [tt.addMonth(timeOrigin, v) for v in timeValue]
-    elif strTimeDelta in STRYEAR:
-        time = [tt.addMonth(timeOrigin, v*12) for v in timeValue]
-    else:
-        time = [timeOrigin + v*TIMEDELTA[strTimeDelta] for v in timeValue]
-
-    return np.array(time)
+    return strTimeDelta, tt.string2float(strTimeOrigin)
 
 
 def ncread(fileName: str, varName: str, slices: list[slice] = None) -> np.array:
@@ -508,10 +650,118 @@ def ncread(fileName: str, varName: str, slices: list[slice] = None) -> np.array:
 
 def ncreadByDimRange(
     fileName: str, varName: str, minMaxs: list[list],
-    iDimT: int = None, decodeTime=True
+    iDimT: int = None, decodeTime=True, singleOpen=True, meta=None
 ):
-    from .caltools import value2Slice
+    '''
+    singleOpen = True:  validation, dimension decoding, slicing and
+                        reading are done with one opened file handle
+    singleOpen = False: the file is opened for each of the steps
+    meta: metadata of the file (ncindex.NcFileMeta) already loaded,
+          the file is then opened only for reading non-coordinate data
+    '''
+    if not singleOpen:
+        return _ncreadByDimRangeMultiOpen(
+            fileName, varName, minMaxs, iDimT, decodeTime
+        )
+
+    _errorIfFileNotExists(fileName)
+    if meta is None:
+        meta = ncindex.lookup(fileName)
+    if meta is not None:
+        return _ncreadByDimRangeIndexed(
+            meta, fileName, varName, minMaxs, iDimT, decodeTime
+        )
+    return _ncreadByDimRangeSingleOpen(
+        fileName, varName, minMaxs, iDimT, decodeTime
+    )
+
 
+def _ncreadByDimRangeSingleOpen(fileName, varName, minMaxs, iDimT, decodeTime):
+    #
+    # ---- check file can be opened
+    try:
+        h = nc.Dataset(fileName, 'r')
+    except Exception as e:
+        print(e)
+        raise ValueError(f'{varName=} not found in {fileName=}')
+
+    with h:
+        if varName not in h.variables:
+            raise ValueError(f'{varName=} not found in {fileName=}')
+        NDIM = h[varName].ndim
+        dimNames = list(h[varName].dimensions)
+
+        iDimT = _checkByDimRangeArgs(minMaxs, iDimT, decodeTime, NDIM, dimNames)
+
+        #
+        # ---- get slices for dimensions ---- #
+        dimensions = [  # read dimensions
+            np.array(h[dimName][:]) # general dimensions
+            if (iDim != iDimT) or (not decodeTime)
+            else _ncreadtime(h, dimName, fileName=fileName) # time dimension
+            for iDim, dimName in enumerate(dimNames)
+        ]
+        slices, dimsAreReversed, dimensionsFlipped = _dimRanges2Slices(
+            dimensions, minMaxs, fileName, varName
+        )
+
+        # read variable
+        try:
+            data = h[varName][slices]
+        except Exception:
+            traceback.print_exc()
+            raise RuntimeError(f'{fileName = }, {varName = }, {slices = }')
+
+    data = np.array(data)
+    data = np.flip(data, axis=[iax for iax, rev in enumerate(dimsAreReversed) if rev])
+
+    return data, dimensionsFlipped
+
+
+def _ncreadByDimRangeIndexed(meta, fileName, varName, minMaxs, iDimT, decodeTime):
+    # metadata and dimensions from the index, the file is opened for the data only
+    if varName not in meta.varNames:
+        raise ValueError(f'{varName=} not found in {fileName=}')
+    dimNames = meta.getDimNames(varName)
+
+    iDimT = _checkByDimRangeArgs(minMaxs, iDimT, decodeTime, len(dimNames), dimNames)
+
+    dimensions = [
+        meta.getCoord(dimName, decodeTime=(iDim == iDimT and decodeTime))
+        for iDim, dimName in enumerate(dimNames)
+    ]
+    if any(dimension is None for dimension in dimensions):
+        # not indexed (e.g., undecodable time), leave it to the file
+        return _ncreadByDimRangeSingleOpen(
+            fileName, varName, minMaxs, iDimT, decodeTime
+        )
+
+    areMonotonic = [
+        meta.isMonotonic(dimName, decodeTime=(iDim == iDimT and decodeTime))
+        for iDim, dimName in enumerate(dimNames)
+    ]
+    slices, dimsAreReversed, dimensionsFlipped = _dimRanges2Slices(
+        dimensions, minMaxs, fileName, varName, areMonotonic
+    )
+
+    # read variable
+    if varName in meta.coords:  # reading a coordinate
+        data = meta.getCoord(varName)[slices[0]]
+    else:
+        try:
+            with nc.Dataset(fileName, 'r') as h:
+                data = h[varName][slices]
+        except Exception:
+            traceback.print_exc()
+            raise RuntimeError(f'{fileName = }, {varName = }, {slices = }')
+
+    data = np.array(data)
+    data = np.flip(data, axis=[iax for iax, rev in enumerate(dimsAreReversed) if rev])
+
+    return data, dimensionsFlipped
+
+
+def _ncreadByDimRangeMultiOpen(fileName, varName, minMaxs, iDimT, decodeTime):
     #
     # ---- check file can be opened
     _errorIfVariableNotExists(fileName, varName)
@@ -519,6 +769,37 @@ def ncreadByDimRange(
         NDIM = h[varName].ndim
     dimNames = getDimNames(fileName, varName)
 
+    iDimT = _checkByDimRangeArgs(minMaxs, iDimT, decodeTime, NDIM, dimNames)
+
+    #
+    # ---- get slices for dimensions ---- #
+    dimensions = [  # read dimensions
+        read(fileName, dimName) # general dimensions
+        if (iDim != iDimT) or (not decodeTime)
+        else ncreadtime(fileName, dimName) # time dimension
+        for iDim, dimName in enumerate(dimNames)
+    ]
+    slices, dimsAreReversed, dimensionsFlipped = _dimRanges2Slices(
+        dimensions, minMaxs, fileName, varName
+    )
+
+    # read variable
+    try:
+        with nc.Dataset(fileName, 'r') as h:
+            data = h[varName][slices]
+
+    except Exception:
+        traceback.print_exc()
+        raise RuntimeError(f'{fileName = }, {varName = }, {slices = }')
+    
+    data = np.array(data)
+    data = np.flip(data, axis=[iax for iax, rev in enumerate(dimsAreReversed) if rev])
+
+    return data, dimensionsFlipped
+
+
+def _checkByDimRangeArgs(minMaxs, iDimT, decodeTime, NDIM, dimNames):
+    # validate the inputs of ncreadByDimRange and return iDimT
     #
     # ---- checking input types 
     if not isinstance(minMaxs, list):
@@ -554,9 +835,6 @@ def ncreadByDimRange(
     if len(minMaxs) != numDims:
         raise ValueError(f'incorrect number ({len(minMaxs)}) of minMaxs, {dimNames=}')
 
-    #
-    # ---- begins ---- #
-    #
     #
     # ---- assign iDimT ---- #
     if iDimT is None and decodeTime:
@@ -577,15 +855,16 @@ def ncreadByDimRange(
                 f'unable to determine which one is time dimensions from {dimNames=}. '
                 f'Assign "iDimT" manually or set "decodeTime" to false.'
             )
-        
-    #
-    # ---- get slices for dimensions ---- #
-    dimensions = [  # read dimensions
-        read(fileName, dimName) # general dimensions
-        if (iDim != iDimT) or (not decodeTime)
-        else ncreadtime(fileName, dimName) # time dimension
-        for iDim, dimName in enumerate(dimNames)
-    ]
+    return iDimT
+
+
+def _dimRanges2Slices(dimensions, minMaxs, fileName, varName, areMonotonic=None):
+    # -> slices to read, whether the dimensions are reversed,
+    #    and the (increasing) dimension values within the slices
+    # areMonotonic: dimensions known to be strictly monotonic (e.g., by ncindex)
+    from .caltools import value2Slice
+    if areMonotonic is None:
+        areMonotonic = [False for __ in dimensions]
 
     dimensionsFlipped, dimsAreReversed = zip(*[ 
         (dimension[::-1], True)  # reverse the dimension if decreasing
@@ -596,8 +875,9 @@ def ncreadByDimRange(
 
     try:
         slicesFlipped = [ # determine the slice by minMaxs
-            value2Slice(dimension, *minMax)
-            for dimension, minMax in zip(dimensionsFlipped, minMaxs)
+            value2Slice(dimension, *minMax, checkIncreasing=not isMonotonic)
+            for dimension, minMax, isMonotonic
+            in zip(dimensionsFlipped, minMaxs, areMonotonic)
         ]
     except Exception:
         traceback.print_exc()
@@ -613,20 +893,4 @@ def ncreadByDimRange(
         if rev else sli
         for sli, rev, dim in zip(slicesFlipped, dimsAreReversed, dimensions)
     ]
-
-    # extract the dimension for output
-    dimensions = [np.array(dim[sli]) for sli, dim in zip(slices, dimensions)]
-
-    # read variable
-    try:
-        with nc.Dataset(fileName, 'r') as h:
-            data = h[varName][slices]
-
-    except Exception:
-        traceback.print_exc()
-        raise RuntimeError(f'{fileName = }, {varName = }, {slices = }')
-    
-    data = np.array(data)
-    data = np.flip(data, axis=[iax for iax, rev in enumerate(dimsAreReversed) if rev])
-
-    return data, dimensionsFlipped
+    return slices, dimsAreReversed, dimensionsFlipped
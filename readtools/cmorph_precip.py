@@ -2,6 +2,10 @@ from .. import timetools as tt
 from . import readtools as rt
 import numpy as np
 
+def getClimPath(climYears, climType):
+    return f'/nwpr/gfs/com120/9_data/CMORPH/clim/CMORPH_clim_{climYears[0]}_{climYears[1]}_0p5_{climType}.nc'
+
+
 def cmorph_prec_total_day_0p5(minMaxX, minMaxY, minMaxT):
     nyears = tt.year(minMaxT[1]) - tt.year(minMaxT[0]) + 1
     for iyear in range(nyears):
@@ -29,7 +33,7 @@ def cmorph_prec_total_day_0p5(minMaxX, minMaxY, minMaxT):
 def cmorph_prec_clim_day_0p5(minMaxX, minMaxY, minMaxT=[-np.inf, np.inf], climYears=[2006, 2020], climType='3harm'):
     minMaxT2000 = [tt.ymd2float(2000, tt.month(t), tt.day(t)) for t in minMaxT]
     var, time, lat, lon = rt.readw2g(**{
-        'filename': f'/nwpr/gfs/com120/9_data/CMORPH/clim/CMORPH_clim_{climYears[0]}_{climYears[1]}_0p5_{climType}.nc',
+        'filename': getClimPath(climYears, climType),
         'varName': 'cmorph',
         'minMaxs': [minMaxT2000, minMaxY, minMaxX],
         'iDimT': 0,
@@ -48,7 +52,8 @@ def cmorph_prec_anom_day_0p5(minMaxX, minMaxY, minMaxT, climYears=[2006, 2020],
         minMaxY,
         minMaxT,
         climYears,
-        climType
+        climType,
+        climPath=getClimPath(climYears, climType),
     )
     return var, dims
 
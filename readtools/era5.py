@@ -4,6 +4,10 @@ from . import readtools as rt
 import numpy as np
 
 
+def getClimPath(fileVarName, climYears, climType):
+    return f'/nwpr/gfs/com120/9_data/ERA5/clim_{climType}/ERA5_{fileVarName}_clim_{climYears[0]}_{climYears[1]}_r720x360_{climType}.nc'
+
+
 def era5_fileVarName_to_ncVarName(varName):
     if varName in ['u200', 'u850']:
         return 'u'
@@ -23,7 +27,7 @@ def era5_3dVar_clim_day_0p5(varName, minMaxX, minMaxY, minMaxT=[0, 365], climYea
     minMaxT2000 = [tt.ymd2float(2000, tt.month(t), tt.day(t)) for t in minMaxT]
     ncVarName = era5_fileVarName_to_ncVarName(varName)
     var, time, lat, lon = rt.readw2g(**{
-        'filename': f'/nwpr/gfs/com120/9_data/ERA5/clim_{climType}/ERA5_{varName}_clim_{climYears[0]}_{climYears[1]}_r720x360_{climType}.nc',
+        'filename': getClimPath(varName, climYears, climType),
         'varName': ncVarName,
         'minMaxs': [minMaxT2000, minMaxY, minMaxX],
         'iDimT': 0,
@@ -68,7 +72,7 @@ def era5_3dVar_total_day_0p5(varName, minMaxX, minMaxY, minMaxT):
 
 def era5_u200_clim_day_0p5(minMaxX, minMaxY, minMaxT=[-np.inf, np.inf], climYears=[2006, 2020], climType='3harm'):
     var, time, lat, lon = rt.readw2g(**{
-        'filename': f'/nwpr/gfs/com120/9_data/ERA5/clim_{climType}/ERA5_u200_clim_{climYears[0]}_{climYears[1]}_r720x360_{climType}.nc',
+        'filename': getClimPath('u200', climYears, climType),
         'varName': 'u',
         'minMaxs': [minMaxT, minMaxY, minMaxX],
         'iDimT': 0,
@@ -80,7 +84,7 @@ def era5_u200_clim_day_0p5(minMaxX, minMaxY, minMaxT=[-np.inf, np.inf], climYear
 
 def era5_u850_clim_day_0p5(minMaxX, minMaxY, minMaxT=[-np.inf, np.inf], climYears=[2006, 2020], climType='3harm'):
     var, time, lat, lon = rt.readw2g(**{
-        'filename': f'/nwpr/gfs/com120/9_data/ERA5/clim_{climType}/ERA5_u850_clim_{climYears[0]}_{climYears[1]}_r720x360_{climType}.nc',
+        'filename': getClimPath('u850', climYears, climType),
         'varName': 'u',
         'minMaxs': [minMaxT, minMaxY, minMaxX],
         'iDimT': 0,
@@ -145,7 +149,8 @@ def era5_u200_anom_day_0p5(minMaxX, minMaxY, minMaxT, climYears=[2006, 2020], cl
         minMaxY,
         minMaxT,
         climYears,
-        climType
+        climType,
+        climPath=getClimPath('u200', climYears, climType),
     )
     return var, dims
 
@@ -158,7 +163,8 @@ def era5_u850_anom_day_0p5(minMaxX, minMaxY, minMaxT, climYears=[2006, 2020], cl
         minMaxY,
         minMaxT,
         climYears,
-        climType
+        climType,
+        climPath=getClimPath('u850', climYears, climType),
     )
     return var, dims
 
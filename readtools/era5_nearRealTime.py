@@ -1,6 +1,6 @@
 from .. import timetools as tt
 from ..nctools import ncreadByDimRange
-from ..caltools import interp_1d
+from ..caltools import interp_2d
 from ..terminaltools import FlushPrinter as Fp
 import numpy as np
 import os
@@ -93,7 +93,7 @@ def getAvailDateRange(varNames, dateRange):
     return [dateMin, dateMax]
 
 
-def readTotal(varName, minMaxs):
+def readTotal(varName, minMaxs, dtype=None):
     '''
     minMaxs = [
         timeRange#days_since_2000-01-01, 
@@ -101,6 +101,7 @@ def readTotal(varName, minMaxs):
         latRange#degrees_north(-90-90), 
         lonRange#degrees_east(0-360)
     ]
+    dtype of data defaults to the dtype on disk (as a floating type)
     '''
 
     minMaxT = minMaxs[0]
@@ -131,7 +132,10 @@ def readTotal(varName, minMaxs):
 
         # initialize
         if iDate == 0:
-            data = np.nan * np.ones((NT, *subData.shape[1:]))
+            # all the dates are checked available, so no NaN to fill
+            if dtype is None:
+                dtype = np.result_type(subData.dtype, np.float32)
+            data = np.empty((NT, *subData.shape[1:]), dtype=dtype)
             if len(minMaxs) == 4:  # hPa -> Pa
                 subDims[1] = [l*100 for l in subDims[1]]
             dims = [DATES, *subDims[1:]]
@@ -179,9 +183,7 @@ def readClim(varName, minMaxs, climYears, climType):
     )
 
     requestedDates = np.r_[minMaxs[0][0]:(minMaxs[0][1]+1)]
-    requestedDOYs = [tt.dayOfYear229(d) for d in requestedDates]
-    readDOYs = [tt.dayOfYear229(float(d)) for d in dims[0]]
-    indices = [readDOYs.index(rdoy) for rdoy in requestedDOYs]
+    indices = tt.dayOfClimIndexArray(requestedDates, dims[0])
 
     data = data[indices, :]
     dims = [dims[0][indices], *dims[1:]]
@@ -195,11 +197,8 @@ def readAnomaly(varName, minMaxs, climYears, climType):
     lonTotal, latTotal = dimsTotal[-1], dimsTotal[-2]
     lonClim, latClim = dimsClim[-1], dimsClim[-2]
 
-    if not np.array_equal(lonTotal, lonClim):
-        varClim = interp_1d(lonClim, varClim, lonTotal, -1, True)
-
-    if not np.array_equal(latTotal, latClim):
-        varClim = interp_1d(latClim, varClim, latTotal, -2, True)
+    if not np.array_equal(lonTotal, lonClim) or not np.array_equal(latTotal, latClim):
+        varClim = interp_2d(lonClim, latClim, varClim, lonTotal, latTotal, True)
 
     varAnom = varTotal - varClim
     return varAnom, dimsTotal
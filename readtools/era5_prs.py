@@ -1,3 +1,4 @@
+from .. import climcache
 from .. import timetools as tt
 from ..plottools import FlushPrinter as Fp
 from . import readtools as rt
@@ -19,7 +20,7 @@ def getNcVarName(varName):
 # constant settings end
 
 
-def readTotal(varName, minMaxX, minMaxY, minMaxZ, minMaxT):
+def readTotal(varName, minMaxX, minMaxY, minMaxZ, minMaxT, dtype=None):
 
     numMonths = (tt.year(minMaxT[1]) - tt.year(minMaxT[0])) * 12
     numMonths += tt.month(minMaxT[1]) - tt.month(minMaxT[0]) + 1
@@ -46,7 +47,9 @@ def readTotal(varName, minMaxX, minMaxY, minMaxZ, minMaxT):
         nt = len(timeSlice)
         if imonth == 0: # initilize it
             nx, ny, nz = len(lon), len(lat), len(lev)
-            data = np.nan * np.ones((NT, nz, ny, nx))
+            if dtype is None:
+                dtype = np.result_type(dataSlice.dtype, np.float32)
+            data = np.full((NT, nz, ny, nx), np.nan, dtype=dtype)
         
         tStart = np.where(TIME == timeSlice[0])[0][0]
         data[tStart:(tStart+nt), :] = dataSlice
@@ -59,13 +62,16 @@ def readTotal(varName, minMaxX, minMaxY, minMaxZ, minMaxT):
     return data, [TIME, lev, lat, lon]
 
 
-def readClim(varName, minMaxX, minMaxY, minMaxZ, minMaxT=[0, 365], climYears=[2006, 2020], climType='3harm'):
+def getClimPath(varName, climYears, climType):
     strClimYears = '_'.join(str(y) for y in climYears)
-    
+    return f'{getRootDir()}/clim_{climType}/ERA5_{varName}_clim_{strClimYears}_r720x360_{climType}.nc'
+
+
+def readClim(varName, minMaxX, minMaxY, minMaxZ, minMaxT=[0, 365], climYears=[2006, 2020], climType='3harm'):
     it = [int(tt.dayOfYear(int(t))) - 1 for t in np.r_[minMaxT[0]:minMaxT[1]+1]]
     minMaxT = [min(it), max(it)]
     var, time, lev, lat, lon = rt.readw2g(**{
-        'filename': f'{getRootDir()}/clim_{climType}/ERA5_{varName}_clim_{strClimYears}_r720x360_{climType}.nc',
+        'filename': getClimPath(varName, climYears, climType),
         'varName': getNcVarName(varName),
         'minMaxs': [minMaxT, minMaxZ, minMaxY, minMaxX],
         'iDimT': 0,
@@ -80,7 +86,10 @@ def readClim(varName, minMaxX, minMaxY, minMaxZ, minMaxT=[0, 365], climYears=[20
 
 
 def readAnomaly(varName, minMaxX, minMaxY, minMaxZ, minMaxT, climYears=[2006, 2020], climType='3harm'):
-    var_clim, dims_clim = readClim(
+    var_clim, dims_clim = climcache.get(  # the whole annual cycle, cached
+        getClimPath(getNcVarName(varName), climYears, climType), varName,
+        [minMaxX, minMaxY, minMaxZ],
+        readClim,
         varName=getNcVarName(varName),
         minMaxX=minMaxX,
         minMaxY=minMaxY,
@@ -107,6 +116,6 @@ def readAnomaly(varName, minMaxX, minMaxY, minMaxZ, minMaxT, climYears=[2006, 20
         raise Exception(' lat are mismatched')
 
     # calculate anomalies
-    var_anom = rt.cal_anomalies_366days(var_total, time_total, var_clim)
+    var_anom = rt.cal_anomalies_366days(var_total, time_total, var_clim, inplace=True)
     return var_anom, [time_total, lev_total, lat_total, lon_total]
 
@@ -5,7 +5,7 @@ from . import readtools as rt
 import numpy as np
 
 
-def readTotal(varName, minMaxX, minMaxY, minMaxT):
+def readTotal(varName, minMaxX, minMaxY, minMaxT, dtype=None):
 
     numYears = tt.year(minMaxT[1]) - tt.year(minMaxT[0]) + 1
 
@@ -33,7 +33,9 @@ def readTotal(varName, minMaxX, minMaxY, minMaxT):
         nt = len(timeSlice)
         if iYear == 0: # initilize it
             nx, ny = len(lon), len(lat)
-            data = np.nan * np.ones((NT, ny, nx))
+            if dtype is None:
+                dtype = np.result_type(dataSlice.dtype, np.float32)
+            data = np.full((NT, ny, nx), np.nan, dtype=dtype)
         
         tStart = np.where(TIME == timeSlice[0])[0][0]
         data[tStart:(tStart+nt), :] = dataSlice
@@ -2,8 +2,19 @@
 read multiple netcdf files and concatenate the data
 read(
     paths: str, varName: str, minMaxs: list[list],
-    stackedAlong: int | "new" , iDimT: int = None, decodeTime=True
+    stackedAlong: int | "new" , iDimT: int = None, decodeTime=True,
+    workers: int = 1, workerType: "process" | "thread" = "process",
+    dtype = None,
 ):
+workers > 1 reads the files concurrently into the output data.
+Use workerType="thread" only if netCDF-C/HDF5 are built thread-safe.
+dtype of the output defaults to the dtype on disk (as a floating type).
+
+iterRead(..., chunk: int = 1, readAhead: bool = False)
+yields (data, dims) blocks of "chunk" files along the stacked dimension,
+in the order of paths, without allocating the entire data.
+readAhead=True reads the next block in the workers while the current one
+is being processed.
 '''
 from .. import nctools as nct
 from .. import checktools as chkt
@@ -11,6 +22,7 @@ from .. import terminaltools as tmt
 import numpy as np
 import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 
 
@@ -18,6 +30,8 @@ from dataclasses import dataclass
 class _File:
     path: str
     stat: bool = True
+    recordLen: int = 1    # length along the stacked dimension
+    sliceStart: int = 0   # position in the output data
 
     def checkPathExists(self):
         if not os.path.exists(self.path):
@@ -35,8 +49,130 @@ def read(
     paths, varName, minMaxs, iDimT=None, decodeTime=True,
     stackedAlong='new', ignoreDimNames=False, iDimValIgnored=[],
     allowMissingFile=False, allowVaryingDimLength=False,
+    workers=1, workerType='process', dtype=None,
 ):
     fp = tmt.FlushPrinter()
+    files, dims = _planRead(
+        fp, paths, varName, minMaxs, iDimT, decodeTime,
+        stackedAlong, ignoreDimNames, iDimValIgnored,
+        allowMissingFile, allowVaryingDimLength, workers, workerType,
+    )
+    dataShape = [len(d) for d in dims]
+
+    if dtype is None:
+        dtype = _getDtype(files, varName)
+    data = np.empty(dataShape, dtype=dtype)
+    if stackedAlong != 'new': # shift operation to idim = 0
+        data = np.swapaxes(data, 0, stackedAlong)
+    _fillMissing(data, files)
+
+    readArgs = (varName, minMaxs, iDimT, decodeTime, stackedAlong)
+    filesToRead = [file for file in files if file.stat]
+    numFiles = len(files)
+    if workers == 1:
+        for iFile, file in enumerate(files):
+            fp.flush(f'multi reading {iFile}/{numFiles}..')
+            if not file.stat:
+                continue
+            _readInto(data, file, *readArgs)
+
+    elif workerType == 'thread':  # the workers write into data directly
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_readInto, data, file, *readArgs)
+                for file in filesToRead
+            ]
+            for iDone, future in enumerate(as_completed(futures)):
+                fp.flush(f'multi reading {iDone}/{numFiles}..')
+                future.result()
+
+    elif workerType == 'process':
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = _submitFiles(executor, files, readArgs)
+            for iDone, future in enumerate(as_completed(futures)):
+                fp.flush(f'multi reading {iDone}/{numFiles}..')
+                _putData(data, futures[future], future.result())
+
+    fp.flush(f'')
+        
+    if stackedAlong != 'new':
+        data = np.swapaxes(data, 0, stackedAlong)
+
+    return data, dims
+
+
+def iterRead(
+    paths, varName, minMaxs, iDimT=None, decodeTime=True,
+    stackedAlong='new', ignoreDimNames=False, iDimValIgnored=[],
+    allowMissingFile=False, allowVaryingDimLength=False,
+    workers=1, workerType='process', chunk=1, readAhead=False, dtype=None,
+):
+    fp = tmt.FlushPrinter()
+    chkt.checkType(chunk, int, 'chunk')
+    chkt.checkType(readAhead, bool, 'readAhead')
+    if chunk < 1:
+        raise ValueError(f'"chunk" must be >= 1 but {chunk=}')
+
+    files, dims = _planRead(
+        fp, paths, varName, minMaxs, iDimT, decodeTime,
+        stackedAlong, ignoreDimNames, iDimValIgnored,
+        allowMissingFile, allowVaryingDimLength, workers, workerType,
+    )
+    fp.flush(f'')
+    if dtype is None:
+        dtype = _getDtype(files, varName)
+    iDimStacked = 0 if stackedAlong == 'new' else stackedAlong
+    chunkShape = [len(d) for d in dims]  # with the stacked dimension at axis 0
+    chunkShape[0], chunkShape[iDimStacked] = chunkShape[iDimStacked], chunkShape[0]
+
+    readArgs = (varName, minMaxs, iDimT, decodeTime, stackedAlong)
+    chunks = [files[i:i+chunk] for i in range(0, len(files), chunk)]
+
+    executor = None
+    if workers > 1 or readAhead:
+        Executor = ThreadPoolExecutor if workerType == 'thread' else ProcessPoolExecutor
+        executor = Executor(max_workers=workers)
+
+    try:
+        futures = None
+        for iChunk, chunkFiles in enumerate(chunks):
+            if executor is not None and futures is None:
+                futures = _submitFiles(executor, chunkFiles, readArgs)
+            nextFutures = None
+            if readAhead and iChunk + 1 < len(chunks):
+                nextFutures = _submitFiles(executor, chunks[iChunk + 1], readArgs)
+
+            # read the block, with the stacked dimension at axis 0
+            offset = chunkFiles[0].sliceStart
+            chunkShape[0] = sum(file.recordLen for file in chunkFiles)
+            data = np.empty(chunkShape, dtype=dtype)
+            _fillMissing(data, chunkFiles, offset)
+            if futures is None:
+                for file in chunkFiles:
+                    if file.stat:
+                        _readInto(data, file, *readArgs, offset=offset)
+            else:
+                for future in as_completed(futures):
+                    _putData(data, futures[future], future.result(), offset)
+            futures = nextFutures
+
+            if stackedAlong != 'new':
+                data = np.swapaxes(data, 0, stackedAlong)
+            chunkDims = dims.copy()
+            chunkDims[iDimStacked] = dims[iDimStacked][offset:offset + chunkShape[0]]
+            yield data, chunkDims
+
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _planRead(
+    fp, paths, varName, minMaxs, iDimT, decodeTime,
+    stackedAlong, ignoreDimNames, iDimValIgnored,
+    allowMissingFile, allowVaryingDimLength, workers, workerType,
+):
+    # -> files (with their position in the output) and the output dims
     #
     # ---- validations
     fp.flush('multi read: validating..')
@@ -49,6 +185,8 @@ def read(
     chkt.checkType(ignoreDimNames, bool, 'ignoreDimNames')
     chkt.checkType(iDimValIgnored, list, 'ignoreDimNames')
     chkt.checkType(allowMissingFile, bool, 'allowMissingFile')
+    chkt.checkType(workers, int, 'workers')
+    chkt.checkType(workerType, str, 'workerType')
 
     for path in paths:
         chkt.checkType(path, str, 'path in paths')
@@ -72,6 +210,11 @@ def read(
            
     for ignoreDimValue in iDimValIgnored:
         chkt.checkType(ignoreDimValue, int, 'elements in iDimValIgnored')
+
+    if workers < 1:
+        raise ValueError(f'"workers" must be >= 1 but {workers=}')
+    if workerType not in ['process', 'thread']:
+        raise ValueError(f'"workerType" can only be "process" or "thread"')
     
     #
     # ---- check the files
@@ -158,7 +301,7 @@ def read(
             stackedShape = [max([l1, l2]) for l1, l2 in zip(stackedShape, thisStackedShape)]
         
     # check and get the stacked dimValues
-    dimVals, dims = None, None
+    dimVals, stackedDims = None, []
     for file in files:
         if file.stat:
             thisDimVals = []
@@ -178,6 +321,9 @@ def read(
                     raise RuntimeError(f'{path=}, dimName={local_dimNames[i]}, minMax={minMaxs[i]}')
                 thisDimVals.append(dim)
 
+            if stackedAlong != 'new':
+                file.recordLen = len(thisDimVals[stackedAlong])
+
             # check the dimvalues
             if dimVals is None:
                 dimVals = thisDimVals
@@ -191,58 +337,73 @@ def read(
                             f'inconsistent dim values: {idim=} for {paths[0]}, {path}'
                         )
                 
-        # assign the output dim values
-        if dims is None:
-            if stackedAlong == 'new':
-                dims = [list(range(len(paths))), *dimVals]
-            else:
-                dims = dimVals
-        elif stackedAlong != 'new':
+        # the stacked dim values, NaN for a missing file
+        if stackedAlong != 'new':
             if file.stat:
-                stackedDim = thisDimVals[stackedAlong]
+                stackedDims.append(thisDimVals[stackedAlong])
             else:
-                stackedDim = np.nan
-            dims[stackedAlong] = np.concatenate((dims[stackedAlong], stackedDim))
+                stackedDims.append([np.nan] * file.recordLen)
 
-    dataShape = [len(d) for d in dims]
+    # assign the output dim values
+    if stackedAlong == 'new':
+        dims = [list(range(len(paths))), *dimVals]
+    else:
+        dims = list(dimVals)
+        dims[stackedAlong] = np.concatenate(stackedDims)
 
-    data = np.nan * np.ones((dataShape))
-    if stackedAlong != 'new': # shift operation to idim = 0
-        data = np.swapaxes(data, 0, stackedAlong)
+    # assign the destination of each file
+    sliceStart = 0
+    for file in files:
+        file.sliceStart = sliceStart
+        sliceStart += file.recordLen
 
-    sliceStart, sliceEnd = 0, 0
-    numFiles = len(files)
-    for iFile, file in enumerate(files):
-        fp.flush(f'multi reading {iFile}/{numFiles}..')
+    return files, dims
+
+
+def _readFile(path, varName, minMaxs, iDimT, decodeTime, stackedAlong):
+    # -> data of the file, with the stacked dimension at axis 0
+    thisData, __ = nct.ncreadByDimRange(
+        path, varName, minMaxs, iDimT, decodeTime
+    )
+    if stackedAlong != 'new':
+        thisData = np.swapaxes(thisData, 0, stackedAlong)
+    return thisData
+
+
+def _putData(data, file, thisData, offset=0):
+    # offset: position of data[0] in the output (e.g., a block of iterRead)
+    sliceStart = file.sliceStart - offset
+    data[sliceStart:(sliceStart + file.recordLen)] = thisData
+
+
+def _fillMissing(data, files, offset=0):
+    # NaN for the files not found
+    for file in files:
         if not file.stat:
-            sliceEnd += 1
-            sliceStart += 1
-            continue
+            _putData(data, file, np.nan, offset)
 
-        thisData, __ = nct.ncreadByDimRange( # read
-            file.path, varName, minMaxs, iDimT, decodeTime
-        )
-        if stackedAlong != 'new':
-            thisData = np.swapaxes(thisData, 0, stackedAlong)
-            thisRecordLen = thisData.shape[0]
-        elif stackedAlong == 'new':
-            thisRecordLen = 1
-
-        sliceEnd += thisRecordLen
-        if data.ndim == 1:
-            data[slice(sliceStart, sliceEnd)] = thisData
-        else:
-            data[slice(sliceStart, sliceEnd), :] = thisData
 
-        sliceStart += thisRecordLen
+def _getDtype(files, varName):
+    # -> dtype on disk, as a floating type for NaN
+    for file in files:
+        if file.stat:
+            return np.result_type(nct.getVarDtype(file.path, varName), np.float32)
+    return np.float64
 
-    fp.flush(f'')
-        
-    if stackedAlong != 'new':
-        data = np.swapaxes(data, 0, stackedAlong)
 
-    return data, dims
-    
+def _readInto(data, file, varName, minMaxs, iDimT, decodeTime, stackedAlong, offset=0):
+    _putData(data, file, _readFile(
+        file.path, varName, minMaxs, iDimT, decodeTime, stackedAlong
+    ), offset)
+
+
+def _submitFiles(executor, files, readArgs):
+    # -> {future: file} reading the existing files
+    return {
+        executor.submit(_readFile, file.path, *readArgs): file
+        for file in files if file.stat
+    }
+
 
 
 def test():
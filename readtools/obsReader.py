@@ -1,4 +1,6 @@
+from .. import climcache
 from .. import timetools as tt
+from ..caltools import subtractClim
 from ..readtools import multiNcRead as mread
 import numpy as np
 
@@ -27,6 +29,30 @@ def _removeDuplicates(inList):
 
 
 def total(varName, minMaxs, source=None, grid=None, freq=None, root=None):
+    paths, ncVarName, minMaxs2, stackedAlong, scale = _totalSource(
+        varName, minMaxs, source, grid, freq, root
+    )
+    data, dims = mread.read(paths, ncVarName, minMaxs2, stackedAlong=stackedAlong)
+    data = data * scale
+    return data, dims
+
+
+def iterTotal(varName, minMaxs, source=None, grid=None, freq=None, root=None,
+              chunk=1, readAhead=False):
+    # same as total, but yields (data, dims) blocks of "chunk" files in time order
+    paths, ncVarName, minMaxs2, stackedAlong, scale = _totalSource(
+        varName, minMaxs, source, grid, freq, root
+    )
+    for data, dims in mread.iterRead(
+        paths, ncVarName, minMaxs2, stackedAlong=stackedAlong,
+        chunk=chunk, readAhead=readAhead,
+    ):
+        data *= scale
+        yield data, dims
+
+
+def _totalSource(varName, minMaxs, source, grid, freq, root):
+    # -> paths, ncVarName, minMaxs, stackedAlong and scale to read the total
     minMaxs2 = minMaxs.copy()
     if source is None:
         source, grid, freq = _getDefaultSourceGridFreq(varName)
@@ -169,9 +195,7 @@ def total(varName, minMaxs, source=None, grid=None, freq=None, root=None):
         raise NotImplementedError(f'{source = }')
 
     paths = _removeDuplicates(paths)
-    data, dims = mread.read(paths, ncVarName, minMaxs2, stackedAlong=stackedAlong)
-    data = data * scale
-    return data, dims
+    return paths, ncVarName, minMaxs2, stackedAlong, scale
 
 
 def clim(varName, minMaxs, source=None, grid=None, freq=None, 
@@ -187,7 +211,7 @@ def clim(varName, minMaxs, source=None, grid=None, freq=None,
     stackedAlong = 0
     ncVarName = varName
     scale = 1.0
-    minMaxs2 = minMaxs.copy()
+    minMaxs2 = [list(minMax) for minMax in minMaxs]  # the caller's are kept
     if minMaxs2[0][1] % 1 == 0:
         minMaxs2[0][1] += 0.99
 
@@ -228,30 +252,33 @@ def clim(varName, minMaxs, source=None, grid=None, freq=None,
     else:
         raise NotImplementedError(f'{varName =}, {source = }')
 
-    # find the time to read
+    # the whole annual cycle is cached, the days are taken from it
     t1, t2 = minMaxs2[iDimT]
     j1, j2 = tt.dayOfYear229(t1), tt.dayOfYear229(t2)
     y1, y2 = tt.year(t1), tt.year(t2)
     c1 = tt.ymd2float(year0, 1, 1) + j1 - 1
     c2 = tt.ymd2float(year0, 1, 1) + j2 - 1
 
+    minMaxs2[iDimT] = [None, None]
+    spatialMinMaxs = [m for i, m in enumerate(minMaxs2) if i != iDimT]
+    dataYear, dimsYear = climcache.get(
+        tuple(paths), ncVarName, spatialMinMaxs,
+        mread.read, paths, ncVarName, minMaxs2, stackedAlong=stackedAlong,
+    )
+
+    timeYear = np.asarray(dimsYear[iDimT])
     if y1 == y2:
-        minMaxs2[iDimT] = [c1, c2]
-        data, dims = mread.read(paths, ncVarName, minMaxs2, stackedAlong=stackedAlong)
+        iDays = np.nonzero((timeYear >= c1) & (timeYear <= c2))[0]
     elif j2 >= j1 - 1: # for a full year
-        minMaxs2[iDimT] = [None, None]
-        data, dims = mread.read(paths, ncVarName, minMaxs2, stackedAlong=stackedAlong)
+        iDays = np.arange(len(timeYear))
     else: # an incomplete year, separate dates
-        minMaxs2[iDimT] = [None, c2]
-        data1, dims1 = mread.read(paths, ncVarName, minMaxs2, stackedAlong=stackedAlong)
-        minMaxs2[iDimT] = [c1, None]
-        data2, dims2 = mread.read(paths, ncVarName, minMaxs2, stackedAlong=stackedAlong)
-        data = np.concatenate((data1, data2), axis=stackedAlong)
-        dims = dims1
-        dims[stackedAlong] = np.concatenate((dims1[stackedAlong], dims2[stackedAlong]))
-        
+        iDays = np.r_[np.nonzero(timeYear <= c2)[0], np.nonzero(timeYear >= c1)[0]]
 
-    data = data * scale
+    data = np.take(dataYear, iDays, axis=iDimT)
+    dims = [np.array(dim) for dim in dimsYear]
+    dims[iDimT] = timeYear[iDays]
+
+    data *= scale
     return data, dims
 
 
@@ -265,13 +292,13 @@ def anomaly(varName, minMaxs, source=None, grid=None, freq=None,
     dataTotal, dimsTotal = total(varName, minMaxs, source, grid, freq, root)
     dataClim, dimsClim = clim(varName, minMaxs, source, grid, freq, climYears, climType, root)
     if interpolate_to is not None:
-        from ..caltools import interp_1d
+        from ..caltools import interp_2d
         if interpolate_to.lower() == 'total':
-            dataClim = interp_1d(dimsClim[-1], dataClim, dimsTotal[-1], -1, True)
-            dataClim = interp_1d(dimsClim[-2], dataClim, dimsTotal[-2], -2, True)
+            dataClim = interp_2d(dimsClim[-1], dimsClim[-2], dataClim,
+                                 dimsTotal[-1], dimsTotal[-2], True)
         elif interpolate_to.lower() == 'clim':
-            dataTotal = interp_1d(dimsTotal[-1], dataTotal, dimsClim[-1], -1, True)
-            dataTotal = interp_1d(dimsTotal[-2], dataTotal, dimsClim[-2], -2, True)
+            dataTotal = interp_2d(dimsTotal[-1], dimsTotal[-2], dataTotal,
+                                  dimsClim[-1], dimsClim[-2], True)
         else:
             raise NotImplementedError(f'{interpolate_to = }')
     elif dataTotal.shape[-2:] != dataClim.shape[-2:]:
@@ -279,10 +306,8 @@ def anomaly(varName, minMaxs, source=None, grid=None, freq=None,
                          'Set interpolate_to to "clim" or "total" for interpolation.')
 
 
-    jdTotal = [tt.dayOfYear229(int(d)) for d in dimsTotal[0]]
-    jdClim = [tt.dayOfYear229(int(d)) for d in dimsClim[0]]
-    iDayClims = [jdClim.index(d) for d in jdTotal]
-    data = dataTotal - dataClim[iDayClims, :]
+    iDayClims = tt.dayOfClimIndexArray(np.trunc(dimsTotal[0]), np.trunc(dimsClim[0]))
+    data = subtractClim(dataTotal, dataClim, iDayClims, inplace=True)
     return data, dimsTotal
 
 
@@ -5,7 +5,7 @@ from . import readtools as rt
 import numpy as np
 
 
-def readTotal(minMaxX, minMaxY, minMaxT):
+def readTotal(minMaxX, minMaxY, minMaxT, dtype=None):
     def getFileName(year):
         return f'/nwpr/gfs/com120/9_data/OISST/v_2p1/daymean/sst.day.mean.{year}.nc'
 
@@ -32,7 +32,9 @@ def readTotal(minMaxX, minMaxY, minMaxT):
         nt = len(timeSlice)
         if iYear == 0:  # initilize it
             nx, ny = len(lon), len(lat)
-            data = np.nan * np.ones((NT, ny, nx))
+            if dtype is None:
+                dtype = np.result_type(dataSlice.dtype, np.float32)
+            data = np.full((NT, ny, nx), np.nan, dtype=dtype)
 
         tStart = np.where(TIME == timeSlice[0])[0][0]
         data[tStart:(tStart+nt), :] = dataSlice
@@ -1,6 +1,7 @@
 # [SOURCE]_[VARIABLE]_[TOTAL/ANOM/CLIM]_[TIME_RES]_[SPATIAL_RES]
 import netCDF4 as nc
 import numpy as np
+from .. import climcache
 from .. import timetools as tt
 from .. import caltools as ct
 from ..plottools import FlushPrinter as Fp
@@ -73,8 +74,15 @@ def readw2g(filename, varName, minMaxs, iDimT=None, minTime=None, intervalTime=[
     return var, *dims
 
 # .... it only supports 3d variables ....
-def read_anom(func_read_total, func_read_clim, minMaxX, minMaxY, minMaxT, climYears=[2006, 2020], climType='3harm'):
-    var_clim, dims_clim = func_read_clim(
+def read_anom(func_read_total, func_read_clim, minMaxX, minMaxY, minMaxT, climYears=[2006, 2020], climType='3harm', climPath=None):
+    # climPath: the file read by func_read_clim, its whole annual cycle is
+    #           cached until the file changes (not cached if None)
+    readClim = func_read_clim if climPath is None else \
+        lambda **kwArgs: climcache.get(
+            climPath, func_read_clim.__qualname__, [minMaxX, minMaxY],
+            func_read_clim, **kwArgs
+        )
+    var_clim, dims_clim = readClim(
         minMaxX=minMaxX,
         minMaxY=minMaxY,
         minMaxT=[0, 365],
@@ -98,14 +106,11 @@ def read_anom(func_read_total, func_read_clim, minMaxX, minMaxY, minMaxT, climYe
         raise Exception(' lat are mismatched')
 
     # calculate anomalies
-    var_anom = cal_anomalies_366days(var_total, time_total, var_clim)
+    var_anom = cal_anomalies_366days(var_total, time_total, var_clim, inplace=True)
     return var_anom, [time_total, lat_total, lon_total]
 
 
-def cal_anomalies_366days(var_total, time_total, var_clim):
-    iDaysOfYear = [t - tt.ymd2float(tt.year(t), 1, 1) for t in time_total]
-    iDaysOfYear = [int(t) for t in iDaysOfYear]
-    # days after Feb29 are added by 1
-    iDaysOfYear = [t + 1 if t >
-                   60 and not tt.isleap(t) else t for t in iDaysOfYear]
-    return var_total - var_clim[iDaysOfYear, :]
+def cal_anomalies_366days(var_total, time_total, var_clim, inplace=False):
+    # var_clim has the 366 days of a leap year
+    iDaysOfYear = tt.dayOfYear229Array(time_total) - 1
+    return ct.subtractClim(var_total, var_clim, iDaysOfYear, inplace)
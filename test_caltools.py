@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+import contextlib
+import io
+import numpy as np
+
+
+def main():
+    test_interp_1d()
+    test_interpCache()
+    test_value2Slice()
+    test_w2g()
+    print('> test_caltools passed')
+
+
+def test_interp_1d():
+    # the vectorized interpolation against the former loop (bench.py)
+    from pytools import caltools as ct
+    from pytools.bench import _interp_1d_loop
+
+    lat, lon = np.linspace(-90, 90, 73), np.linspace(0, 357.5, 144)
+    data = np.random.rand(2, 3, 73, 144).astype(np.float32)
+    for extrapolate, latNew, lonNew in [
+        (False, np.arange(-90, 91, 5.), np.arange(0, 356, 5.)),
+        (True, np.arange(-95, 96, 5.), np.arange(-5, 365, 5.)),  # beyond the grid
+    ]:
+        for axis, x, xNew in [(-2, lat, latNew), (-1, lon, lonNew), (0, [0, 1], [0.25, 1])]:
+            reference = _interp_1d_loop(x, data, xNew, axis, extrapolate)
+            out = ct.interp_1d(x, data, xNew, axis, extrapolate, dtype=np.float64)
+            assert np.allclose(out, reference, rtol=0, atol=1e-12, equal_nan=True)
+            assert np.array_equal(np.isnan(out), np.isnan(reference))
+
+            out = ct.interp_1d(x, data, xNew, axis, extrapolate)
+            assert out.dtype == np.float32
+            assert np.allclose(out, reference, rtol=0, atol=1e-6, equal_nan=True)
+
+
+def test_interpCache():
+    from pytools import caltools as ct
+    lon, lat = np.arange(0, 360, 2.), np.linspace(-90, 90, 91)
+    lonNew, latNew = np.arange(0, 360, 3.), np.arange(-90, 90.1, 3.)
+    data = np.random.rand(2, 91, 180)
+
+    ct.clearInterpCache()
+    reference = ct.Interpolator(lat, latNew, True)(
+        ct.Interpolator(lon, lonNew, True)(data, -1), -2
+    )
+    for __ in range(2):  # computed, then cached
+        assert np.array_equal(ct.interp_2d(lon, lat, data, lonNew, latNew, True), reference)
+    ct.clearInterpCache()
+
+
+def test_value2Slice():
+    # the binary search against the former loop (bench.py)
+    from pytools import caltools as ct
+    from pytools.bench import _value2SliceLoop
+
+    lon = np.linspace(0, 360, 144, endpoint=False)
+    for valueStart, valueEnd in [
+        *[sorted(r) for r in np.random.uniform(0, 357.5, (200, 2))],
+        (0, 357.5), (2.5, 2.5), (1, 2), (-10, 400),
+    ]:
+        assert ct.value2Slice(lon, valueStart, valueEnd) == \
+            _value2SliceLoop(lon, valueStart, valueEnd)
+
+
+def test_w2g():
+    # the binary search against the former mask, including the wrap-around
+    from pytools import caltools as ct
+    from pytools.bench import _w2gMaskReference
+
+    lon = np.linspace(0, 360, 144, endpoint=False)
+    ranges = [*np.random.uniform(-10, 370, (200, 2)), (350, 10), (1, 2), (0, 357.5)]
+    for LON in [lon, lon[::-1]]:
+        for lon_s, lon_e in ranges:
+            with contextlib.redirect_stdout(io.StringIO()):  # no-value warnings
+                out = ct.w2g(LON, lon_s, lon_e)
+            assert out[:2] == _w2gMaskReference(LON, lon_s, lon_e)
+            assert out[2] == len(out[3])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import numpy as np
+
+
+def main():
+    test_hits()
+    test_stampInvalidation()
+    test_tupleSource()
+    test_eviction()
+    print('> test_climcache passed')
+
+
+def test_hits():
+    from pytools import climcache
+    climcache.clear()
+    reads = []
+
+    def read(value):
+        reads.append(value)
+        return np.full(3, value)
+
+    out = climcache.get('reader', 'olr', [[0, 10], np.arange(3)], read, 1)
+    assert climcache.get('reader', 'olr', [(0, 10), np.arange(3)], read, 1) is out
+    assert reads == [1]
+    assert not out.flags.writeable
+
+    climcache.get('reader', 'olr', [[0, 11], np.arange(3)], read, 2)
+    climcache.get('reader', 'u', [[0, 10], np.arange(3)], read, 3)
+    assert reads == [1, 2, 3]
+    info = climcache.info()
+    assert (info['hits'], info['misses'], info['entries'], info['bytes']) == (1, 3, 3, 3 * 24)
+    climcache.clear()
+
+
+def test_stampInvalidation():
+    from pytools import climcache
+    climcache.clear()
+    with tempfile.TemporaryDirectory() as workDir:
+        path = _write(f'{workDir}/clim.npy', 1)
+        read = lambda: np.load(path)
+        assert climcache.get(path, 'olr', None, read)[0] == 1
+
+        # regenerated: a new mtime (and the same size)
+        _write(path, 2, mtimeShift=10)
+        assert climcache.get(path, 'olr', None, read)[0] == 2
+        # keyed on the real path
+        os.symlink(path, f'{workDir}/link.npy')
+        assert climcache.get(f'{workDir}/link.npy', 'olr', None, read)[0] == 2
+        assert climcache.info()['misses'] == 2
+
+        climcache.invalidate(path)
+        assert climcache.info()['entries'] == 0
+    climcache.clear()
+
+
+def test_tupleSource():
+    # a selection read from several files is invalidated by any of them
+    from pytools import climcache
+    climcache.clear()
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = tuple(_write(f'{workDir}/clim{i}.npy', i) for i in range(3))
+        read = lambda: sum(np.load(path) for path in paths)
+        assert climcache.get(paths, 'olr', None, read)[0] == 3
+
+        _write(paths[1], 10, mtimeShift=10)
+        assert climcache.get(paths, 'olr', None, read)[0] == 12
+        assert climcache.info()['misses'] == 2
+
+        climcache.get(paths[:2], 'olr', None, read)
+        climcache.invalidate(paths[2])
+        assert climcache.info()['entries'] == 1
+        climcache.invalidate(paths[0])
+        assert climcache.info()['entries'] == 0
+    climcache.clear()
+
+
+def test_eviction():
+    from pytools import climcache
+    climcache.clear()
+    try:
+        climcache.setMaxBytes(2 * 80)
+        for i in range(3):
+            climcache.get('reader', 'olr', i, np.zeros, 10)
+        assert climcache.info()['entries'] == 2
+        # the least recent one is evicted
+        climcache.get('reader', 'olr', 1, np.zeros, 10)
+        assert climcache.info()['misses'] == 3
+        climcache.get('reader', 'olr', 0, np.zeros, 10)
+        assert climcache.info()['misses'] == 4
+
+        climcache.setMaxBytes(0)  # nothing is cached
+        assert climcache.info()['entries'] == 0
+        climcache.get('reader', 'olr', 1, np.zeros, 10)
+        assert climcache.info()['entries'] == 0
+    finally:
+        climcache.setMaxBytes(climcache.DEFAULT_MAX_MB * 1e6)
+        climcache.clear()
+
+
+def _write(path, value, mtimeShift=0):
+    np.save(path, np.full(4, value, dtype=np.float64))
+    if mtimeShift:
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + mtimeShift))
+    return path
+
+
+if __name__ == '__main__':
+    main()
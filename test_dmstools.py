@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+import io
+import tempfile
+import numpy as np
+
+SHAPE = (2, 3, 12, 20)
+
+
+def main():
+    test_readNd()
+    test_readNdShortReads()
+    test_readNdErrors()
+    test_memmapNd()
+    print('> test_dmstools passed')
+
+
+def test_readNd():
+    # readinto against the list of read2d
+    from pytools import dmstools as dt
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createFields(workDir)
+        reference = np.reshape([dt.read2d(path, SHAPE[:-3:-1]) for path in paths], SHAPE)
+        for workers in [1, 4]:
+            assert np.array_equal(dt.readNd(paths, SHAPE, workers=workers), reference)
+
+
+def test_readNdShortReads():
+    # a raw read may return fewer bytes than asked
+    from pytools import dmstools as dt
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createFields(workDir)
+        reference = dt.readNd(paths, SHAPE)
+
+        class ShortFile(io.FileIO):
+            def readinto(s, buffer):
+                return super().readinto(buffer[:100])
+
+        dt.open = lambda path, mode, buffering=-1: ShortFile(path, 'r')
+        try:
+            assert np.array_equal(dt.readNd(paths, SHAPE), reference)
+        finally:
+            del dt.open
+
+
+def test_readNdErrors():
+    from pytools import dmstools as dt
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createFields(workDir)
+        np.zeros(SHAPE[-2:]).ravel()[:-1].tofile(paths[-1])  # a field short of a value
+        for call in [
+            lambda: dt.readNd(paths, SHAPE),
+            lambda: dt.readNd(paths, SHAPE, workers=0),
+            lambda: dt.readNd(paths[:-1], SHAPE),
+        ]:
+            try:
+                call()
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('should raise ValueError')
+
+
+def test_memmapNd():
+    from pytools import dmstools as dt
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createFields(workDir)
+        reference = dt.readNd(paths, SHAPE)
+        view = dt.memmapNd(paths, SHAPE)
+        assert np.array_equal(np.asarray(view), reference)
+        assert np.array_equal(view[:, 1, 2:10, 5:15], reference[:, 1, 2:10, 5:15])
+        assert np.array_equal(view[1, [0, 2], 3], reference[1, [0, 2], 3])
+
+
+def _createFields(workDir):
+    paths = []
+    for i in range(int(np.prod(SHAPE[:-2]))):
+        paths.append(f'{workDir}/field{i:04d}')
+        np.random.rand(*SHAPE[-2:]).tofile(paths[-1])
+    return paths
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+import os
+import stat
+import tempfile
+import time
+
+# a synthetic "wgrib2 -s" inventory: record 1 has a submessage 1.2,
+# records 3 and 4 are duplicated (as prec of TGFS at 0-6h)
+INVENTORY = '''1:0:d=2024010100:UGRD:500 mb:6 hour fcst:
+1.2:0:d=2024010100:VGRD:500 mb:6 hour fcst:
+2:100:d=2024010100:TMP:2 m above ground:6 hour fcst:
+3:250:d=2024010100:APCP:surface:0-6 hour acc fcst:
+4:400:d=2024010100:APCP:surface:0-6 hour acc fcst:
+Warning: a line of wgrib2 that is not a record
+5:520:d=2024010100:HGT:500 mb:6 hour fcst:
+'''
+OFFSETS = [0, 100, 250, 400, 520, 600]  # and the file size
+
+
+def main():
+    test_parseInventory()
+    test_uniqueRecords()
+    test_uniqueRecordsQuadratic()
+    test_byteRanges()
+    test_routeRecords()
+    test_index()
+    print('> test_grib2index passed')
+
+
+def test_parseInventory():
+    from pytools.modeldata import grib2index as gi
+    records = gi._parseInventory(INVENTORY, OFFSETS[-1])
+    assert [r.recNum for r in records] == ['1', '1.2', '2', '3', '4', '5']
+    assert [r.offset for r in records] == [0, 0, 100, 250, 400, 520]
+    # a submessage has the length of its whole message
+    assert [r.length for r in records] == [100, 100, 150, 150, 120, 80]
+    assert [r.isSubmessage for r in records] == [False, True, False, False, False, False]
+    assert records[3].key == records[4].key
+
+
+def test_uniqueRecords():
+    from pytools.modeldata import grib2index as gi
+    records = gi._parseInventory(INVENTORY, OFFSETS[-1])
+    inventory = gi.Grib2Inventory('', records)
+    unique = gi.uniqueRecords(inventory.match('(:APCP:surface:|:TMP:)'))
+    assert [r.recNum for r in unique] == ['2', '4']  # the last duplicate is kept
+
+
+def test_uniqueRecordsQuadratic():
+    # the set against the former O(n^2) check (bench.py)
+    from pytools.modeldata import grib2index as gi
+    from pytools.bench import _uniqueRecordsQuadratic
+    lines = [
+        f'{i + 1}:{i * 10}:d=2024010100:VAR{i % 7}:{i % 5} mb:6 hour fcst:' for i in range(100)
+    ]
+    inventory = gi.Grib2Inventory('', gi._parseInventory('\n'.join(lines), 1000))
+    assert [r.recNum for r in gi.uniqueRecords(inventory.records)] == \
+        _uniqueRecordsQuadratic(lines)
+
+
+def test_byteRanges():
+    from pytools.modeldata import grib2index as gi
+    r = {r.recNum: r for r in gi._parseInventory(INVENTORY, OFFSETS[-1])}
+    # a message is read once for its submessages, consecutive ones are merged
+    assert gi._byteRanges([r['1'], r['1.2'], r['2']]) == [(0, 250)]
+    assert gi._byteRanges([r['1.2']]) == [(0, 100)]
+    assert gi._byteRanges([r['1'], r['3']]) == [(0, 100), (250, 150)]
+    assert gi._byteRanges([r['2'], r['3'], r['5']]) == [(100, 300), (520, 80)]
+
+
+def test_routeRecords():
+    from pytools.modeldata import grib2index as gi
+    with tempfile.TemporaryDirectory() as workDir:
+        srcPath = _createGrib2(workDir, 'a.grb2')
+        content = open(srcPath, 'rb').read()
+        r = {r.recNum: r for r in gi._parseInventory(INVENTORY, OFFSETS[-1])}
+
+        desPaths = [f'{workDir}/1', f'{workDir}/2']
+        numBytes = gi.routeRecords(srcPath, [
+            ([r['3'], r['1.2']], desPaths[0]),
+            ([r['1'], r['5']], desPaths[1]),
+        ])
+        # message 1 is read once for both routes
+        assert numBytes == 100 + 150 + 80
+        # in the file order
+        assert open(desPaths[0], 'rb').read() == content[0:100] + content[250:400]
+        assert open(desPaths[1], 'rb').read() == content[0:100] + content[520:600]
+
+        # appended to the existing file
+        assert gi.appendRecords(srcPath, [r['2']], desPaths[0]) == 150
+        assert open(desPaths[0], 'rb').read() == \
+            content[0:100] + content[250:400] + content[100:250]
+
+        # the file is shorter than the inventory
+        with open(srcPath, 'r+b') as f:
+            f.truncate(500)
+        try:
+            gi.appendRecords(srcPath, [r['5']], desPaths[1])
+        except OSError:
+            pass
+        else:
+            raise AssertionError('reading beyond the end of the file should fail')
+
+
+def test_index():
+    from pytools.modeldata import grib2index as gi
+    with tempfile.TemporaryDirectory() as workDir:
+        wgrib2 = _createWgrib2(workDir)
+        paths = [_createGrib2(workDir, f'{i}.grb2') for i in range(3)]
+        dbPath = f'{workDir}/index.sqlite'
+
+        index = gi.Grib2Index(dbPath, maxInventories=2)
+        assert index.get(paths[0], wgrib2, scan=False) is None
+        assert index.get(f'{workDir}/missing.grb2', wgrib2) is None
+        inventory = index.get(paths[0], wgrib2)
+        assert [r.recNum for r in inventory.match(':UGRD:')] == ['1']
+        assert index.get(paths[0], wgrib2) is inventory
+        assert (index.scans, index.hits) == (1, 1)
+
+        # the memory is bounded, the others are loaded from the index
+        for path in paths:
+            index.get(path, wgrib2)
+        assert len(index._memory) == 2 and index.scans == 3
+        assert index.get(paths[0], wgrib2).records == inventory.records
+        assert index.scans == 3
+
+        # shared through the index file
+        index = gi.Grib2Index(dbPath)
+        assert index.get(paths[1], wgrib2, scan=False) is not None
+        assert index.scans == 0
+
+        # invalidated when the file changes
+        time.sleep(0.01)
+        with open(paths[1], 'ab') as f:
+            f.write(b'\0' * 10)
+        assert index.get(paths[1], wgrib2, scan=False) is None
+        assert index.get(paths[1], wgrib2).records[-1].length == 80 + 10
+        index.invalidate(paths[1])
+        assert index.get(paths[1], wgrib2, scan=False) is None
+
+
+def _createGrib2(workDir, fileName):
+    # messages of distinct bytes at OFFSETS, and the inventory next to it
+    path = f'{workDir}/{fileName}'
+    with open(path, 'wb') as f:
+        for i, (offset, nextOffset) in enumerate(zip(OFFSETS[:-1], OFFSETS[1:])):
+            f.write(bytes([65 + i]) * (nextOffset - offset))
+    with open(f'{path}.inv', 'w') as f:
+        f.write(INVENTORY)
+    return path
+
+
+def _createWgrib2(workDir):
+    # "wgrib2 -s path" prints the inventory next to the file
+    path = f'{workDir}/wgrib2'
+    with open(path, 'w') as f:
+        f.write('#!/bin/sh\ncat "$2.inv"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+import contextlib
+import io
+import tempfile
+import numpy as np
+
+SHAPE = (10, 19, 36)
+MINMAXS = [[0, 9], [-30, 30], [None, None]]
+
+
+def main():
+    test_readTotalWorkers()
+    test_ensembleCube()
+    test_readStats()
+    test_normalizeUnits()
+    print('> test_modelreader passed')
+
+
+def test_readTotalWorkers():
+    from pytools.modelreader import readTotal as rtm
+    from pytools.bench import _createModelFiles
+    initTimes, members = _getInitTimes(3), [0, 1]
+    with tempfile.TemporaryDirectory() as rootDir, _quiet():
+        _createModelFiles(rootDir, initTimes, members, SHAPE)
+        reference, referenceDims = rtm.readTotal(
+            'bench', 'global', 'u10', MINMAXS, initTimes, members, rootDir=rootDir
+        )
+        assert reference.shape == (3, 2, 10, 7, 36)
+        data, dims = rtm.readTotal(
+            'bench', 'global', 'u10', MINMAXS, initTimes, members, rootDir=rootDir, workers=3
+        )
+        assert np.array_equal(data, reference, equal_nan=True)
+        assert all(np.array_equal(d, r) for d, r in zip(dims, referenceDims))
+
+
+def test_ensembleCube():
+    # the lazy statistics against readTotal + numpy
+    from pytools.modelreader import readTotal as rtm
+    from pytools.modelreader.ensembleCube import EnsembleCube
+    from pytools.bench import _createModelFiles
+    initTimes, members = _getInitTimes(3), [0, 1, 2]
+    with tempfile.TemporaryDirectory() as rootDir, _quiet():
+        _createModelFiles(rootDir, initTimes, members, SHAPE)
+        data, __ = rtm.readTotal(
+            'bench', 'global', 'u10', MINMAXS, initTimes, members, rootDir=rootDir
+        )
+        cube = EnsembleCube('bench', 'global', 'u10', MINMAXS, initTimes, members, rootDir=rootDir)
+        assert np.allclose(cube.std(['init', 'member']).compute()[0], np.nanstd(data, axis=(0, 1)))
+        assert np.allclose(cube.mean('member').compute()[0], np.nanmean(data, axis=1))
+
+
+def test_readStats():
+    # the streamed statistics against readTotal + numpy
+    from pytools.modelreader import readTotal as rtm
+    from pytools.modelreader import readStats as rs
+    from pytools.bench import _createModelFiles
+    initTimes, members = _getInitTimes(3), [0, 1, 2]
+    with tempfile.TemporaryDirectory() as rootDir, _quiet():
+        _createModelFiles(rootDir, initTimes, members, SHAPE)
+        data, __ = rtm.readTotal(
+            'bench', 'global', 'u10', MINMAXS, initTimes, members, rootDir=rootDir
+        )
+        for workers in [1, 2]:
+            stats, __ = rs.readStats(
+                'bench', 'global', 'u10', MINMAXS, initTimes, members,
+                statDims=['init', 'member'], rootDir=rootDir, workers=workers,
+            )
+            assert np.allclose(stats['std'], np.nanstd(data, axis=(0, 1)))
+            assert np.allclose(stats['mean'], np.nanmean(data, axis=(0, 1)))
+            assert np.array_equal(stats['max'], np.nanmax(data, axis=(0, 1)))
+
+
+def test_normalizeUnits():
+    # the vectorized mslp units against the former loop of readTotal (bench.py)
+    from pytools.modelreader._shared import normalizeUnits
+    from pytools.bench import _normalizeMslpLoop
+    data = (1000 + 10 * np.random.rand(2, 3, 9, 4, 5)).astype(np.float32)
+    data[:, :, ::3] *= 100  # Pa
+    data[:, :, 1::3] /= 100  # GEPSv3
+    reference = data.copy()
+    _normalizeMslpLoop(reference)
+    assert np.array_equal(normalizeUnits('mslp', data.copy()), reference)
+
+
+def _getInitTimes(numInits):
+    from pytools import timetools as tt
+    return [tt.ymd2float(2020, 1, 1) + 7 * i for i in range(numInits)]
+
+
+def _quiet():
+    # the readers print their progress
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+if __name__ == '__main__':
+    main()
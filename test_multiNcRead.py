@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+import tempfile
+import numpy as np
+
+MINMAXS = [[None, None], [-30, 30], [None, None]]
+
+
+def main():
+    test_readWorkers()
+    test_iterRead()
+    test_readMissingFile()
+    test_readDtype()
+    print('> test_multiNcRead passed')
+
+
+def test_readWorkers():
+    from pytools.readtools import multiNcRead as mread
+    from pytools.bench import _createDailyFiles
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createDailyFiles(workDir, 12, (2, 37, 72))
+        reference, referenceDims = mread.read(paths, 'u', MINMAXS, stackedAlong=0)
+        assert reference.shape == (24, 13, 72)
+        # (threads only with a thread-safe netCDF-C/HDF5)
+        data, dims = mread.read(paths, 'u', MINMAXS, stackedAlong=0, workers=3)
+        assert np.array_equal(data, reference)
+        assert all(np.array_equal(d, r) for d, r in zip(dims, referenceDims))
+
+
+def test_iterRead():
+    from pytools.readtools import multiNcRead as mread
+    from pytools.bench import _createDailyFiles
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createDailyFiles(workDir, 10, (2, 37, 72))
+        reference, __ = mread.read(paths, 'u', MINMAXS, stackedAlong=0)
+        for readAhead in [False, True]:
+            blocks = [
+                data for data, __ in mread.iterRead(
+                    paths, 'u', MINMAXS, stackedAlong=0, chunk=4, readAhead=readAhead
+                )
+            ]
+            assert [len(data) for data in blocks] == [8, 8, 4]
+            assert np.array_equal(np.concatenate(blocks), reference)
+
+
+def test_readMissingFile():
+    # NaN in the place of a missing file, the first one included
+    from pytools.readtools import multiNcRead as mread
+    from pytools.bench import _createDailyFiles
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createDailyFiles(workDir, 3, (2, 37, 72))
+        references = [mread.read([path], 'u', MINMAXS, stackedAlong=0) for path in paths]
+        missingRecord = (np.full((1, 13, 72), np.nan), [[np.nan]])
+        for iMissing in range(3):
+            missingPaths = paths.copy()
+            missingPaths[iMissing] = f'{workDir}/missing.nc'
+            expected = references.copy()
+            expected[iMissing] = missingRecord
+
+            # one NaN step along the stacked dimension
+            data, dims = mread.read(
+                missingPaths, 'u', MINMAXS, stackedAlong=0, allowMissingFile=True
+            )
+            assert np.array_equal(data, np.concatenate([d for d, __ in expected]), equal_nan=True)
+            assert np.array_equal(
+                dims[0], np.concatenate([dims[0] for __, dims in expected]), equal_nan=True
+            )
+            assert np.array_equal(dims[1], references[0][1][1])
+
+            data, dims = mread.read(
+                missingPaths, 'u', MINMAXS, stackedAlong='new', allowMissingFile=True,
+                iDimValIgnored=[0],  # the files have their own times
+            )
+            assert data.shape == (3, 2, 13, 72) and list(dims[0]) == [0, 1, 2]
+            for i, (reference, __) in enumerate(references):
+                if i == iMissing:
+                    assert np.isnan(data[i]).all()
+                else:
+                    assert np.array_equal(data[i], reference)
+
+
+def test_readDtype():
+    from pytools.readtools import multiNcRead as mread
+    from pytools.bench import _createDailyFiles
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = _createDailyFiles(workDir, 3, (2, 37, 72))
+        data, __ = mread.read(paths, 'u', MINMAXS, stackedAlong=0)
+        assert data.dtype == np.float32  # as on disk
+        data64, __ = mread.read(paths, 'u', MINMAXS, stackedAlong=0, dtype=np.float64)
+        assert data64.dtype == np.float64 and np.array_equal(data64, data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import numpy as np
+
+
+def main():
+    test_lookup()
+    test_load()
+    test_invalidation()
+    test_sharedIndex()
+    test_memoryBound()
+    test_readWithIndex()
+    print('> test_ncindex passed')
+
+
+def test_lookup():
+    from pytools import ncindex
+    with tempfile.TemporaryDirectory() as workDir:
+        path = _createFile(f'{workDir}/u.nc', numTimes=3)
+        ncindex.enable(f'{workDir}/ncindex.sqlite')
+        try:
+            meta = ncindex.lookup(path)
+            assert meta.varNames == ['time', 'lat', 'lon', 'u']
+            assert meta.getDimNames('u') == ['time', 'lat', 'lon']
+            assert meta.getVarShape('u') == (3, 5, 8)
+            assert np.array_equal(meta.getCoord('time', decodeTime=True), [10, 11, 12])
+            assert meta.getCoord('u') is None
+            assert ncindex.lookup(f'{workDir}/missing.nc') is None
+        finally:
+            ncindex.disable()
+        assert ncindex.lookup(path) is None
+
+
+def test_load():
+    # the metadata without an index, from one open
+    from pytools import ncindex
+    with tempfile.TemporaryDirectory() as workDir:
+        path = _createFile(f'{workDir}/u.nc', numTimes=3)
+        with _OpenCounter() as counter:
+            meta = ncindex.load(path)
+        assert counter.numOpens == 1
+        assert meta.getVarShape('u') == (3, 5, 8)
+        assert meta.isMonotonic('lat') and meta.isMonotonic('lon')
+
+
+def test_invalidation():
+    from pytools import ncindex
+    from pytools import nctools as nct
+    with tempfile.TemporaryDirectory() as workDir:
+        path = _createFile(f'{workDir}/u.nc', numTimes=3)
+        ncindex.enable(f'{workDir}/ncindex.sqlite')
+        try:
+            assert nct.getVarShape(path, 'u') == (3, 5, 8)
+
+            # rewritten with another size
+            os.remove(path)
+            _createFile(path, numTimes=4)
+            assert nct.getVarShape(path, 'u') == (4, 5, 8)
+            assert np.array_equal(nct.ncreadtime(path), [10, 11, 12, 13])
+
+            # the same size, only the mtime changes
+            os.remove(path)
+            _createFile(path, numTimes=4, firstTime=20)
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+            assert np.array_equal(nct.ncreadtime(path), [20, 21, 22, 23])
+
+            index = ncindex.enable(f'{workDir}/ncindex.sqlite')
+            assert index.get(path) is not None
+            index.invalidate(path)
+            assert index._load(os.path.realpath(path), stat.st_mtime + 10, stat.st_size) is None
+        finally:
+            ncindex.disable()
+
+
+def test_sharedIndex():
+    # a new index on the same file answers without opening the netCDF file
+    from pytools import ncindex
+    with tempfile.TemporaryDirectory() as workDir:
+        path = _createFile(f'{workDir}/u.nc', numTimes=3)
+        dbPath = f'{workDir}/ncindex.sqlite'
+        ncindex.NcIndex(dbPath).get(path)
+        with _OpenCounter() as counter:
+            meta = ncindex.NcIndex(dbPath).get(path)
+        assert counter.numOpens == 0
+        assert np.array_equal(meta.getCoord('time', decodeTime=True), [10, 11, 12])
+
+
+def test_memoryBound():
+    # the last maxFiles in memory, the others loaded again from the index
+    from pytools import ncindex
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = [_createFile(f'{workDir}/u{i}.nc', numTimes=2) for i in range(3)]
+        index = ncindex.NcIndex(f'{workDir}/ncindex.sqlite', maxFiles=2)
+        meta = index.get(paths[0])
+        for path in paths:
+            index.get(path)
+        assert list(index._memory) == [os.path.realpath(p) for p in paths[1:]]
+        with _OpenCounter() as counter:
+            assert index.get(paths[0]).getVarShape('u') == meta.getVarShape('u')
+        assert counter.numOpens == 0
+        index.get(paths[2])  # the most recent one is kept
+        index.get(paths[1])
+        assert list(index._memory) == [os.path.realpath(p) for p in [paths[2], paths[1]]]
+
+
+def test_readWithIndex():
+    from pytools import ncindex
+    from pytools.readtools import multiNcRead as mread
+    with tempfile.TemporaryDirectory() as workDir:
+        paths = [
+            _createFile(f'{workDir}/u{i}.nc', numTimes=2, firstTime=10 + 2*i) for i in range(4)
+        ]
+        minMaxs = [[None, None], [-30, 30], [90, 270]]
+        reference, referenceDims = mread.read(paths, 'u', minMaxs, stackedAlong=0)
+        ncindex.enable(f'{workDir}/ncindex.sqlite')
+        try:
+            for __ in range(2):  # a cold and a warm index
+                data, dims = mread.read(paths, 'u', minMaxs, stackedAlong=0)
+                assert np.array_equal(data, reference)
+                assert all(np.array_equal(d, r) for d, r in zip(dims, referenceDims))
+        finally:
+            ncindex.disable()
+
+
+def _createFile(path, numTimes, firstTime=10):
+    from pytools import nctools as nct
+    nct.save(path, {
+        'u': np.random.rand(numTimes, 5, 8).astype(np.float32),
+        'time': firstTime + np.arange(numTimes),
+        'lat': np.linspace(-60, 60, 5),
+        'lon': np.linspace(0, 360, 8, endpoint=False),
+    }, overwrite=True)
+    return path
+
+
+class _OpenCounter:
+    # count how many times netCDF4.Dataset is opened within the "with" block
+    def __enter__(self):
+        import netCDF4 as nc
+        Dataset = nc.Dataset
+
+        def countedDataset(*args, **kwArgs):
+            self.numOpens += 1
+            return Dataset(*args, **kwArgs)
+
+        self.numOpens = 0
+        self._module, self._Dataset = nc, Dataset
+        nc.Dataset = countedDataset
+        return self
+
+    def __exit__(self, *args):
+        self._module.Dataset = self._Dataset
+
+
+if __name__ == '__main__':
+    main()
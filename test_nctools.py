@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import numpy as np
+
+
+def main():
+    test_compress()
+    test_compressErrors()
+    test_ncreadByDimRange()
+    test_ncreadtime()
+    test_getVarDtype()
+    print('> test_nctools passed')
+
+
+def test_compress():
+    import netCDF4 as nc
+    from pytools import nctools as nct
+    with tempfile.TemporaryDirectory() as workDir:
+        for fileFormat in ['NETCDF3_CLASSIC', 'NETCDF4_CLASSIC', 'NETCDF4']:
+            path = f'{workDir}/{fileFormat}.nc'
+            reference = _createFile(path, fileFormat)
+            slabBytes = nct.COMPRESS_SLAB_BYTES
+            nct.COMPRESS_SLAB_BYTES = 3 * 20 * 4  # 3 steps of u at once
+            try:
+                nct.compress(path, complevel=4, chunkSizes={'time': 1})
+            finally:
+                nct.COMPRESS_SLAB_BYTES = slabBytes
+
+            assert not [name for name in os.listdir(workDir) if '.compress.' in name]
+            with nc.Dataset(path, 'r') as h:
+                assert h.data_model == {'NETCDF3_CLASSIC': 'NETCDF4'}.get(fileFormat, fileFormat)
+                assert h.title == 'test' and h['u'].units == 'm/s'
+                assert h.dimensions['time'].isunlimited()
+                assert h['u'].filters()['zlib'] and h['u'].filters()['complevel'] == 4
+                assert h['u'].chunking() == [1, 4, 5]
+                assert h['u']._FillValue == -999
+                u = h['u'][:]
+                assert np.ma.allequal(u, reference['u']) and u.mask[2, 1, 3]
+                assert np.array_equal(h['time'][:], reference['time'])
+                assert h['level'].getValue() == 850
+
+
+def test_compressErrors():
+    from pytools import nctools as nct
+    with tempfile.TemporaryDirectory() as workDir:
+        path = f'{workDir}/u.nc'
+        _createFile(path, 'NETCDF4')
+        content = open(path, 'rb').read()
+        for kwArgs, error in [
+            ({'complevel': 10}, ValueError),
+            ({'complevel': 1.}, TypeError),
+            ({'chunkSizes': {'time': 'a'}}, TypeError),
+        ]:
+            try:
+                nct.compress(path, **kwArgs)
+            except error:
+                pass
+            else:
+                raise AssertionError(f'compress({kwArgs}) should raise {error.__name__}')
+            # the file is left untouched, without temporary files
+            assert open(path, 'rb').read() == content
+            assert os.listdir(workDir) == ['u.nc']
+
+
+def test_ncreadByDimRange():
+    from pytools import nctools as nct
+    with tempfile.TemporaryDirectory() as workDir:
+        path = f'{workDir}/u.nc'
+        nct.save(path, {
+            'u': np.random.rand(3, 37, 72).astype(np.float32),
+            'time': np.arange(3),
+            'lat': np.linspace(90, -90, 37),
+            'lon': np.linspace(0, 360, 72, endpoint=False),
+        }, overwrite=True)
+        for minMaxs in [
+            [[None, None], [None, None], [None, None]],
+            [[1, 2], [-30, 30], [90, 180]],
+        ]:
+            data, dims = nct.ncreadByDimRange(path, 'u', minMaxs, singleOpen=True)
+            reference, referenceDims = nct.ncreadByDimRange(path, 'u', minMaxs, singleOpen=False)
+            assert np.array_equal(data, reference)
+            assert all(np.array_equal(d, r) for d, r in zip(dims, referenceDims))
+        assert data.shape == (2, 13, 19)
+
+
+def test_ncreadtime():
+    import netCDF4 as nc
+    from pytools import nctools as nct
+    from pytools import timetools as tt
+    with tempfile.TemporaryDirectory() as workDir:
+        path = f'{workDir}/time.nc'
+        with nc.Dataset(path, 'w') as h:
+            h.createDimension('time', 100)
+            h.createVariable('time', np.int32, ('time',))
+            h['time'].units = 'hours since 1900-01-01 00:00:00.0'
+            h['time'][:] = np.arange(100) + 692_496
+            h.createVariable('month', np.int32, ('time',))
+            h['month'].units = 'months since 2000-01-01'
+            h['month'][:] = np.arange(100)
+
+        timeOrigin = tt.string2float('1900-01-01 00:00:00.0')
+        reference = np.array([timeOrigin + v*(1/24) for v in np.arange(100) + 692_496])
+        assert np.array_equal(nct.ncreadtime(path), reference)
+        assert np.array_equal(
+            nct.ncreadtime(path, 'month'), [tt.addMonth(0, m) for m in range(100)]
+        )
+
+
+def test_getVarDtype():
+    # the dtype as read, i.e., unpacked by scale_factor/add_offset
+    import netCDF4 as nc
+    from pytools import nctools as nct
+    with tempfile.TemporaryDirectory() as workDir:
+        path = f'{workDir}/packed.nc'
+        with nc.Dataset(path, 'w') as h:
+            h.createDimension('x', 3)
+            h.createVariable('count', 'i2', ('x',))
+            h.createVariable('packed', 'i2', ('x',)).scale_factor = np.float32(0.1)
+            h.createVariable('double', 'f8', ('x',))
+        assert nct.getVarDtype(path, 'count') == np.int16
+        assert nct.getVarDtype(path, 'packed') == np.float32
+        assert nct.getVarDtype(path, 'double') == np.float64
+
+
+def _createFile(path, fileFormat):
+    # u(time, lat, lon) with a masked value, a scalar level and attributes
+    import netCDF4 as nc
+    values = {
+        'u': np.ma.masked_array(np.random.rand(7, 4, 5).astype(np.float32)),
+        'time': np.arange(7.),
+    }
+    values['u'][2, 1, 3] = np.ma.masked
+    with nc.Dataset(path, 'w', format=fileFormat) as h:
+        h.title = 'test'
+        h.createDimension('time', None)
+        h.createDimension('lat', 4)
+        h.createDimension('lon', 5)
+        h.createVariable('time', 'f8', ('time',))[:] = values['time']
+        u = h.createVariable('u', 'f4', ('time', 'lat', 'lon'), fill_value=-999)
+        u.units = 'm/s'
+        u[:] = values['u']
+        h.createVariable('level', 'i4').assignValue(850)
+    return values
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+import sqlite3
+import tempfile
+
+KEY = ('M', 9000, 0, 'u', 'global_daily_1p0')
+
+
+def main():
+    test_update()
+    test_query()
+    test_isCurrent()
+    test_getRates()
+    test_migration()
+    print('> test_pipelinestate passed')
+
+
+def test_update():
+    from pytools.modeldata.pipelinestate import PipelineState
+    with tempfile.TemporaryDirectory() as workDir:
+        state = PipelineState(f'{workDir}/state.sqlite')
+        assert state.lookup(KEY) is None
+
+        state.update(KEY, status='running', stage='mergeGrib2')
+        created = state.lookup(KEY).created
+        state.update(KEY, status='done', numTimes=45)
+        unit = state.lookup(KEY)
+        assert (unit.status, unit.stage, unit.numTimes) == ('done', 'mergeGrib2', 45)
+        assert unit.created == created and unit.updated >= created
+        assert unit.key == ('M', 9000.0, 0, 'u', 'global_daily_1p0')
+
+        # shared through the file
+        assert PipelineState(f'{workDir}/state.sqlite').lookup(KEY).numTimes == 45
+
+        for badCall in [
+            lambda: state.update(KEY, unknown=1),
+            lambda: state.update(KEY, varName='t2m'),
+            lambda: state.lookup(KEY[:4]),
+        ]:
+            try:
+                badCall()
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('should raise ValueError')
+
+
+def test_query():
+    from pytools.modeldata.pipelinestate import PipelineState
+    with tempfile.TemporaryDirectory() as workDir:
+        state = PipelineState(f'{workDir}/state.sqlite')
+        for member, status in enumerate(['done', 'failed', 'done', 'converted']):
+            state.update((*KEY[:2], member, *KEY[3:]), status=status)
+        state.update(('N', *KEY[1:]), status='done')
+
+        assert [u.member for u in state.query(modelName='M', status='done')] == [0, 2]
+        assert [u.member for u in state.query(status=['failed', 'converted'])] == [1, 3]
+        assert state.summary() == {'done': 3, 'failed': 1, 'converted': 1}
+        assert state.summary('N') == {'done': 1}
+
+        state.invalidate(modelName='M', status='done')
+        assert state.summary() == {'done': 1, 'failed': 1, 'converted': 1}
+        state.invalidate()
+        assert state.query() == []
+
+
+def test_isCurrent():
+    from pytools.modeldata.pipelinestate import PipelineState, fileStamp, sourceFingerprint
+    with tempfile.TemporaryDirectory() as workDir:
+        state = PipelineState(f'{workDir}/state.sqlite')
+        desPath, srcPath = f'{workDir}/des.nc', f'{workDir}/src.grb2'
+        for path in [desPath, srcPath]:
+            with open(path, 'w') as f:
+                f.write('0')
+        fingerprint = sourceFingerprint([srcPath])
+        desMtime, desSize = fileStamp(desPath)
+        state.update(KEY, status='converted', desMtime=desMtime, desSize=desSize,
+                     srcFingerprint=fingerprint)
+        assert not state.lookup(KEY).isCurrent(desPath)
+
+        state.update(KEY, status='done')
+        assert state.lookup(KEY).isCurrent(desPath, fingerprint)
+
+        # a new source file, then a new output
+        with open(srcPath, 'a') as f:
+            f.write('1')
+        assert sourceFingerprint([srcPath]) != fingerprint
+        assert not state.lookup(KEY).isCurrent(desPath, sourceFingerprint([srcPath]))
+        with open(desPath, 'a') as f:
+            f.write('1')
+        assert not state.lookup(KEY).isCurrent(desPath)
+        assert fileStamp(f'{workDir}/missing.nc') == (None, None)
+
+
+def test_getRates():
+    from pytools.modeldata.pipelinestate import PipelineState
+    with tempfile.TemporaryDirectory() as workDir:
+        state = PipelineState(f'{workDir}/state.sqlite')
+        assert state.getRates('M') == {
+            'numUnits': 0, 'srcBytesPerFile': None, 'desBytesPerDay': None,
+            'mergeSecondsPerFile': None, 'convertCpuSecondsPerFile': None,
+        }
+
+        common = {'numMergedFiles': 10, 'srcBytes': 1000, 'desSize': 450, 'leadDays': 45,
+                  'mergeSeconds': 2.0, 'convertSeconds': 3.0}
+        state.update(KEY, status='done', cdoThreads=4, **common)
+        state.update((*KEY[:2], 1, *KEY[3:]), status='done', **{**common, 'numMergedFiles': 30})
+        state.update((*KEY[:2], 2, *KEY[3:]), status='failed', **common)  # not counted
+        state.update((*KEY[:3], 't2m', KEY[4]), status='done', numMergedFiles=5)
+
+        rates = state.getRates('M', 'u', 'global_daily_1p0')
+        assert rates['numUnits'] == 2
+        assert rates['srcBytesPerFile'] == 2000 / 40
+        assert rates['desBytesPerDay'] == 900 / 90
+        assert rates['mergeSecondsPerFile'] == 4 / 40
+        assert rates['convertCpuSecondsPerFile'] == (3 * 4 + 3 * 1) / 40
+
+        # the units without the numbers are left out of the rates
+        rates = state.getRates('M')
+        assert rates['numUnits'] == 3 and rates['srcBytesPerFile'] == 2000 / 40
+
+
+def test_migration():
+    # the columns added since a state file was created
+    from pytools.modeldata import pipelinestate as ps
+    with tempfile.TemporaryDirectory() as workDir:
+        dbPath = f'{workDir}/state.sqlite'
+        with sqlite3.connect(dbPath) as con:
+            con.execute(
+                'CREATE TABLE units (modelName, initTime REAL, member INTEGER, varName, ' +
+                'outputType, status, numTimes, ' +
+                'PRIMARY KEY (modelName, initTime, member, varName, outputType))'
+            )
+            con.execute("INSERT INTO units VALUES ('M', 9000, 0, 'u', 'global_daily_1p0', 'done', 45)")
+        con.close()
+
+        state = ps.PipelineState(dbPath)
+        unit = state.lookup(KEY)
+        assert (unit.status, unit.numTimes, unit.mergeSeconds) == ('done', 45, None)
+        state.update(KEY, mergeSeconds=1.5)
+        assert state.lookup(KEY).mergeSeconds == 1.5
+        with sqlite3.connect(dbPath) as con:
+            assert con.execute('PRAGMA user_version').fetchone()[0] == ps.SCHEMA
+        con.close()
+
+
+if __name__ == '__main__':
+    main()
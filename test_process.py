@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import numpy as np
+
+INIT = 9000.  # 2024-08-22, days since 2000-01-01
+HOURS_UNITS = 'hours since 2024-08-22 00:00:00'
+DAYS_UNITS = 'days since 2000-01-01 00:00:00'
+
+
+def main():
+    test_recodeTime()
+    test_appendTimeSteps()
+    test_appendTimeStepsErrors()
+    print('> test_process passed')
+
+
+def test_recodeTime():
+    from pytools.modeldata.process import _recodeTime
+    assert np.allclose(_recodeTime([0, 12, 36], HOURS_UNITS, DAYS_UNITS), [9000, 9000.5, 9001.5])
+    assert np.allclose(_recodeTime([9001.5], DAYS_UNITS, HOURS_UNITS), [36])
+    assert np.allclose(
+        _recodeTime([90], 'minutes since 2024-08-22 00:00:00', HOURS_UNITS), [1.5]
+    )
+    try:
+        _recodeTime([1], 'months since 2024-08-01', DAYS_UNITS)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('months cannot be recoded')
+
+
+def test_appendTimeSteps():
+    import netCDF4 as nc
+    from pytools import nctools as nct
+    from pytools.modeldata.process import _appendTimeSteps
+    with tempfile.TemporaryDirectory() as workDir:
+        desPath = _createFile(f'{workDir}/des.nc', INIT + np.arange(4), HOURS_UNITS, 1)
+        partPath = _createFile(f'{workDir}/part.nc', INIT + np.arange(2, 5), DAYS_UNITS, 2)
+
+        # the steps from the cut on are overwritten, the others appended
+        assert _appendTimeSteps(desPath, partPath, INIT + 2) == 3
+        assert np.allclose(nct.ncreadtime(desPath), INIT + np.arange(5))
+        with nc.Dataset(desPath, 'r') as h:
+            assert h['time'].units == HOURS_UNITS  # recoded in the units of the output
+            assert np.allclose(h['time'][:], [0, 24, 48, 72, 96])
+            assert np.allclose(h['time_bnds'][:], np.stack([h['time'][:] - 6, h['time'][:]], -1))
+            assert np.allclose(h['u'][:], [1, 1, 2, 2, 2])
+        assert sorted(os.listdir(workDir)) == ['des.nc', 'part.nc']
+
+        # a part starting after the cut
+        partPath = _createFile(f'{workDir}/part.nc', INIT + np.arange(5, 7), HOURS_UNITS, 3)
+        assert _appendTimeSteps(desPath, partPath, INIT + 5) == 2
+        with nc.Dataset(desPath, 'r') as h:
+            assert np.allclose(h['time'][:], np.arange(7) * 24)
+            assert np.allclose(h['u'][:], [1, 1, 2, 2, 2, 3, 3])
+
+
+def test_appendTimeStepsErrors():
+    from pytools.modeldata.process import _appendTimeSteps
+    with tempfile.TemporaryDirectory() as workDir:
+        desPath = _createFile(f'{workDir}/des.nc', INIT + np.arange(4), HOURS_UNITS, 1)
+        desBytes = open(desPath, 'rb').read()
+
+        def checkRefused(partPath):
+            try:
+                _appendTimeSteps(desPath, partPath, INIT + 2)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f'appending {partPath} should fail')
+            # the output is left untouched, without temporary files
+            assert open(desPath, 'rb').read() == desBytes
+            assert sorted(os.listdir(workDir)) == sorted(['des.nc', os.path.basename(partPath)])
+            os.remove(partPath)
+
+        # the output would lose its last step
+        checkRefused(_createFile(f'{workDir}/short.nc', INIT + np.arange(2, 3), DAYS_UNITS, 2))
+        # a variable that the output does not have
+        checkRefused(_createFile(f'{workDir}/v.nc', INIT + np.arange(2, 5), DAYS_UNITS, 2, 'v'))
+
+        # time is not unlimited
+        fixedPath = _createFile(f'{workDir}/fixed.nc', INIT + np.arange(4), HOURS_UNITS, 1,
+                                unlimited=False)
+        partPath = _createFile(f'{workDir}/part.nc', INIT + np.arange(2, 5), DAYS_UNITS, 2)
+        try:
+            _appendTimeSteps(fixedPath, partPath, INIT + 2)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('time of fixed.nc is not unlimited')
+
+
+def _createFile(path, days, units, value, varName='u', unlimited=True):
+    # var(time) with time in units and time_bnds of the 6 hours before
+    import netCDF4 as nc
+    from pytools.modeldata.process import _recodeTime
+    with nc.Dataset(path, 'w') as h:
+        h.createDimension('time', None if unlimited else len(days))
+        h.createDimension('bnds', 2)
+        time = h.createVariable('time', 'f8', ('time',))
+        time.units, time.bounds = units, 'time_bnds'
+        time[:] = _recodeTime(days, DAYS_UNITS, units)
+        bounds = np.stack([days - 0.25, days], -1)
+        h.createVariable('time_bnds', 'f8', ('time', 'bnds'))[:] = \
+            _recodeTime(bounds, DAYS_UNITS, units)
+        h.createVariable(varName, 'f4', ('time',))[:] = np.full(len(days), value)
+    return path
+
+
+if __name__ == '__main__':
+    main()
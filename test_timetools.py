@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+import numpy as np
+
+
+def main():
+    test_arrayFunctions()
+    test_dayOfClimIndexArray()
+    print('> test_timetools passed')
+
+
+def test_arrayFunctions():
+    # the array functions against their scalar functions
+    from pytools import timetools as tt
+    times = np.arange(tt.ymd2float(1999, 12, 25), tt.ymd2float(2005, 1, 5), 5 / 24)
+    for name in [
+        'year', 'month', 'day', 'daysOfMonth', 'dayOfYear229', 'dayOfClim', 'float2format',
+    ]:
+        scalarFunc, arrayFunc = getattr(tt, name), getattr(tt, f'{name}Array')
+        assert np.array_equal(arrayFunc(times), [scalarFunc(t) for t in times]), name
+
+
+def test_dayOfClimIndexArray():
+    from pytools import timetools as tt
+    timeClim = tt.ymd2float(2000, 1, 1) + np.arange(366)
+    initTimes = tt.ymd2float(2021, 1, 1) + 7 * np.arange(60)
+    valids = np.floor(np.add.outer(initTimes, np.arange(45)))
+
+    jdClim = [tt.dayOfClim(t) for t in timeClim]
+    reference = [
+        [jdClim.index(tt.dayOfClim(float(valid))) for valid in row] for row in valids
+    ]
+    assert np.array_equal(tt.dayOfClimIndexArray(valids, timeClim), reference)
+
+
+if __name__ == '__main__':
+    main()
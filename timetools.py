@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from calendar import isleap as cisleap
 from math import isnan, isinf, floor
 from dateutil.parser import parse as parseDate
+import numpy as np
 
 
 def example():
@@ -143,3 +144,117 @@ def times2string(times, formatter='%Y%m%d', joiner='-', indices=[0, -1]):
     strings = [s for i, s in enumerate(strings) if s not in strings[:i]]
     return joiner.join(strings)
 
+
+# ---- array versions: ndarray in, ndarray out, same results as the scalar ones
+_ORIGIN64 = np.datetime64('2000-01-01T00:00:00.000000', 'us')
+_TIME_DIRECTIVES = ['%H', '%I', '%M', '%S', '%f', '%p', '%X', '%c', '%T', '%R', '%s']
+
+
+def _float2datetime64Array(f):
+    f = np.asarray(f, dtype=np.float64)
+    if not np.all(np.isfinite(f)):
+        raise ValueError('times must be finite')
+    return _ORIGIN64 + np.round(f * 86400e6).astype('timedelta64[us]')
+
+
+def _datetime64Array2float(d):
+    return (d - _ORIGIN64).astype('timedelta64[us]').astype(np.float64) / 86400e6
+
+
+def ymd2floatArray(y, m, d):
+    y, m, d = np.broadcast_arrays(*[np.asarray(v, dtype=np.int64) for v in [y, m, d]])
+    months = ((y - 1970) * 12 + m - 1).astype('datetime64[M]')
+    return _datetime64Array2float(months.astype('datetime64[D]') + (d - 1))
+
+
+def yearArray(f):
+    return _float2datetime64Array(f).astype('datetime64[Y]').astype(np.int64) + 1970
+
+
+def monthArray(f):
+    return _float2datetime64Array(f).astype('datetime64[M]').astype(np.int64) % 12 + 1
+
+
+def dayArray(f):
+    d = _float2datetime64Array(f)
+    return (d.astype('datetime64[D]') - d.astype('datetime64[M]')).astype(np.int64) + 1
+
+
+def float2ymdArray(f):
+    d = _float2datetime64Array(f)
+    months = d.astype('datetime64[M]')
+    days = (d.astype('datetime64[D]') - months).astype(np.int64) + 1
+    months = months.astype(np.int64)
+    return months // 12 + 1970, months % 12 + 1, days
+
+
+def yearIsLeapArray(year):
+    year = np.asarray(year)
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+def isleapArray(f): return yearIsLeapArray(yearArray(f))
+
+
+def daysOfMonthArray(f):
+    months = _float2datetime64Array(f).astype('datetime64[M]')
+    return ((months + np.timedelta64(1, 'M')).astype('datetime64[D]')
+            - months.astype('datetime64[D]')).astype(np.int64)
+
+
+def dayOfYearArray(f):
+    d = _float2datetime64Array(f)
+    return (d.astype('datetime64[D]') - d.astype('datetime64[Y]')).astype(np.int64) + 1
+
+
+def dayOfYear229Array(f):
+    doy = dayOfYearArray(f)
+    return doy + ((doy > 31 + 28) & ~isleapArray(f))  # skipped 229
+
+
+def dayOfClimArray(f, keepDecimals=False):
+    out = (dayOfYear229Array(f) - 1).astype(np.float64)
+    if keepDecimals:
+        out += np.asarray(f) % 1
+    return out
+
+
+def dayOfClimIndexArray(f, fClim):
+    # -> indices into fClim of the same day of year (Feb 29 kept) as f,
+    #    the first one if repeated, ValueError if a day is not in fClim
+    jdClim = dayOfYear229Array(fClim)
+    jdUnique, iFirst = np.unique(jdClim, return_index=True)
+    table = np.full(366 + 1, -1, dtype=np.int64)
+    table[jdUnique] = iFirst
+
+    jd = dayOfYear229Array(f)
+    indices = table[jd]
+    if np.any(indices < 0):
+        raise ValueError(
+            f'days of year {np.unique(jd[indices < 0]).tolist()} not in the climatology'
+        )
+    return indices
+
+
+def addMonthArray(f0, delta=1, warning=True):
+    f0 = np.asarray(f0, dtype=np.float64)
+    y, m, d = float2ymdArray(f0)
+    months = (y - 1970) * 12 + m - 1 + np.asarray(delta, dtype=np.int64)
+    dom = daysOfMonthArray(_datetime64Array2float(
+        months.astype('datetime64[M]').astype('datetime64[D]')
+    ))
+    if warning and np.any(d > dom):
+        print(f'Warning (addMonthArray): day is changed to the end of month '
+              f'for {np.sum(d > dom)} times')
+    d = np.minimum(d, dom)
+    return ymd2floatArray(months // 12 + 1970, months % 12 + 1, d) + f0 % 1
+
+
+def float2formatArray(f, fmt='%Y%m%d'):
+    d = _float2datetime64Array(f)
+    if not any(directive in fmt for directive in _TIME_DIRECTIVES):
+        d = d.astype('datetime64[D]').astype('datetime64[us]')
+    # format each distinct time only once
+    uniques, inverse = np.unique(d, return_inverse=True)
+    strings = np.array([u.strftime(fmt) for u in uniques.astype(object)])
+    return strings[inverse].reshape(d.shape)